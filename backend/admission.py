@@ -0,0 +1,166 @@
+"""
+Ağır endpoint'ler için kabul kontrolü (admission control)
+
+Export, ZIP ve Excel içe aktarma gibi istekler worker'ı uzun süre meşgul
+eder. Her endpoint sınıfı için worker başına:
+
+- en fazla `concurrency` istek aynı anda çalışır,
+- en fazla `queue` istek sırada bekler (sıra adil, FIFO),
+- bir kullanıcının aynı sınıfta çalışan + bekleyen en fazla `per_user` isteği olur.
+
+Sıra doluysa, kullanıcı sınırını aşmışsa veya istek QUEUE_TIMEOUT_SECONDS
+içinde sıradan çıkamazsa beklemeden 429 ve Retry-After döner. Retry-After,
+sınıfın son istek sürelerinin ortalamasından tahmin edilir. Etkileşimli
+endpoint'ler (liste, detay) sınırlanmaz; ağır işler onların kaynaklarını
+tüketemez.
+
+Sınırlar ortam değişkenleriyle ayarlanır, ör. ADMISSION_ZIP_EXPORT_CONCURRENCY,
+ADMISSION_ZIP_EXPORT_QUEUE, ADMISSION_ZIP_EXPORT_PER_USER. Kullanım:
+
+    @router.post("/zip-export")
+    @limit_concurrency("zip_export")
+    @with_time_limit("export")
+    async def zip_export_raporlar(..., current_user: dict = Depends(get_current_user)):
+
+Sıra beklemesi Mongo zaman sınırına sayılmasın diye limit_concurrency
+with_time_limit'in üstüne yazılır.
+"""
+import asyncio
+import functools
+import math
+import os
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Dict, Tuple
+
+from fastapi import HTTPException
+
+from metrics import registry
+
+QUEUE_TIMEOUT_SECONDS = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT_SECONDS", "30"))
+# Henüz süre ölçülmemiş sınıflar için Retry-After tahmini
+DEFAULT_DURATION_SECONDS = 5.0
+# Ortalama süre için üstel hareketli ortalama ağırlığı
+DURATION_SMOOTHING = 0.2
+
+admission_in_flight = registry.gauge(
+    "ekos_admission_in_flight", "Kabul kontrolünden geçip çalışan ağır istekler", ["sinif"]
+)
+admission_queued = registry.gauge(
+    "ekos_admission_queued", "Sırada bekleyen ağır istekler", ["sinif"]
+)
+admission_rejected = registry.counter(
+    "ekos_admission_rejected_total", "429 ile reddedilen ağır istekler", ["sinif", "neden"]
+)
+admission_wait = registry.histogram(
+    "ekos_admission_wait_seconds", "Ağır isteklerin sırada bekleme süresi", ["sinif"]
+)
+
+REJECT_MESSAGES = {
+    "kuyruk_dolu": "Sunucu şu anda çok sayıda benzer işlem yürütüyor, lütfen biraz sonra tekrar deneyin",
+    "kullanici_limiti": "Bu türde devam eden bir işleminiz var, tamamlanmasını bekleyin",
+    "bekleme_suresi": "İşlem sırası zamanında boşalmadı, lütfen biraz sonra tekrar deneyin",
+}
+
+
+def _env_int(name: str, key: str, default: int) -> int:
+    return int(os.environ.get(f"ADMISSION_{name.upper()}_{key}", str(default)))
+
+
+class AdmissionLimiter:
+    def __init__(self, name: str, concurrency: int, queue: int, per_user: int):
+        self.name = name
+        self.concurrency = _env_int(name, "CONCURRENCY", concurrency)
+        self.queue = _env_int(name, "QUEUE", queue)
+        self.per_user = _env_int(name, "PER_USER", per_user)
+        self.queued = 0
+        self.avg_duration = DEFAULT_DURATION_SECONDS
+        self._users: Dict[str, int] = defaultdict(int)
+        self._semaphore = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Event loop'a bağlı olduğu için ilk istekte oluşturulur
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    def retry_after(self) -> int:
+        """Sıradaki herkesin ve yeni isteğin bir yuva bulması için tahmini süre (sn)"""
+        rounds = (self.queued + 1) / max(self.concurrency, 1)
+        return max(1, math.ceil(self.avg_duration * rounds))
+
+    def _reject(self, reason: str):
+        admission_rejected.inc(sinif=self.name, neden=reason)
+        raise HTTPException(
+            status_code=429,
+            detail=REJECT_MESSAGES[reason],
+            headers={"Retry-After": str(self.retry_after())}
+        )
+
+    @asynccontextmanager
+    async def slot(self, user_id: str):
+        if self._users.get(user_id, 0) >= self.per_user:
+            self._reject("kullanici_limiti")
+        if self.semaphore.locked() and self.queued >= self.queue:
+            self._reject("kuyruk_dolu")
+
+        self._users[user_id] += 1
+        try:
+            waited_from = time.monotonic()
+            if not self.semaphore.locked():
+                # Boş yuva varsa acquire beklemeden döner; sıra sayacına girmez
+                await self.semaphore.acquire()
+            else:
+                self.queued += 1
+                admission_queued.inc(sinif=self.name)
+                try:
+                    await asyncio.wait_for(self.semaphore.acquire(), QUEUE_TIMEOUT_SECONDS)
+                except asyncio.TimeoutError:
+                    self._reject("bekleme_suresi")
+                finally:
+                    self.queued -= 1
+                    admission_queued.dec(sinif=self.name)
+            admission_wait.observe(time.monotonic() - waited_from, sinif=self.name)
+
+            admission_in_flight.inc(sinif=self.name)
+            started = time.monotonic()
+            try:
+                yield
+            finally:
+                duration = time.monotonic() - started
+                self.avg_duration += DURATION_SMOOTHING * (duration - self.avg_duration)
+                admission_in_flight.dec(sinif=self.name)
+                self.semaphore.release()
+        finally:
+            self._users[user_id] -= 1
+            if not self._users[user_id]:
+                del self._users[user_id]
+
+
+# Endpoint sınıfı -> (eş zamanlı, sıra, kullanıcı başına) varsayılanları
+DEFAULT_LIMITS: Dict[str, Tuple[int, int, int]] = {
+    "zip_export": (2, 4, 1),
+    "excel_export": (4, 8, 2),
+    "excel_import": (2, 4, 1),
+}
+
+LIMITERS: Dict[str, AdmissionLimiter] = {
+    name: AdmissionLimiter(name, *limits) for name, limits in DEFAULT_LIMITS.items()
+}
+
+
+def limit_concurrency(name: str):
+    """Endpoint'i LIMITERS[name] yuvası içinde çalıştıran dekoratör; kullanıcı current_user'dan alınır"""
+    limiter = LIMITERS[name]
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            user = kwargs.get("current_user") or {}
+            async with limiter.slot(user.get("id", "")):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
@@ -0,0 +1,120 @@
+"""
+Uçtan uca endpoint benchmark'ı
+
+seed_data ile doldurulmuş yerel MongoDB üzerinde ana endpoint'leri ASGI
+uygulaması üzerinden (ağ/uvicorn olmadan) sürer; her senaryo için gecikme
+yüzdelikleri ve throughput ölçer. Sonuçlar benchmarks/results altına JSON
+olarak yazılır ve bir önceki çalıştırmayla karşılaştırılır.
+
+Kullanım:
+    cd backend
+    python -m benchmarks.seed_data --drop
+    python -m benchmarks.bench_e2e [--requests 200] [--concurrency 1] [--scenarios raporlar_liste dashboard]
+    python -m benchmarks.bench_e2e --label v2.1 --fail-on-regression 20
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+from benchmarks.common import (
+    DEFAULT_DB_NAME, compare, latest_results, save_results, start_app, stop_app, summarize,
+    use_benchmark_database
+)
+
+
+async def run_scenario(client, ctx, scenario, count: int, concurrency: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    remaining = count
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            response = await scenario(client, ctx)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    wall_started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - wall_started, errors)
+
+
+async def run(args) -> Dict[str, dict]:
+    import httpx
+    from database import db
+    from benchmarks.scenarios import SCENARIOS, HEAVY_SCENARIOS, BenchContext, cleanup_created
+
+    app = await start_app()
+    try:
+        ctx = await BenchContext.load(seed=args.seed)
+        hacim = {
+            name: await db[name].estimated_document_count()
+            for name in ("raporlar", "iskele_bilesenleri", "makineler", "operatorler", "medya_dosyalari")
+        }
+        print("Veri hacmi: " + ", ".join(f"{k}={v}" for k, v in hacim.items()))
+
+        transport = httpx.ASGITransport(app=app)
+        results: Dict[str, dict] = {}
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for name in args.scenarios or SCENARIOS:
+                scenario = SCENARIOS[name]
+                count = args.heavy_requests if name in HEAVY_SCENARIOS else args.requests
+                await run_scenario(client, ctx, scenario, min(args.warmup, count), 1)
+                stats = await run_scenario(client, ctx, scenario, count, args.concurrency)
+                results[name] = stats
+                print(
+                    f"{name:<22} p50={stats['p50_ms']:>9} p95={stats['p95_ms']:>9} p99={stats['p99_ms']:>9} ms "
+                    f"{stats['istek_per_sn']:>8} istek/sn  hata={stats['hata']}"
+                )
+        silinen = await cleanup_created()
+        if silinen:
+            print(f"Benchmark sırasında eklenen {silinen} rapor silindi")
+        return {"hacim": hacim, "senaryolar": results}
+    finally:
+        await stop_app(app)
+
+
+def main():
+    from benchmarks.scenarios import SCENARIOS
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DEFAULT_DB_NAME)
+    parser.add_argument("--force", action="store_true")
+    parser.add_argument("--scenarios", nargs="*", choices=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="Senaryo başına istek sayısı")
+    parser.add_argument("--heavy-requests", type=int, default=10, help="Excel/ZIP senaryoları için istek sayısı")
+    parser.add_argument("--concurrency", type=int, default=1, help="Aynı anda çalışan istemci sayısı")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--label", help="Sonuç dosyası etiketi (varsayılan: git commit)")
+    parser.add_argument("--fail-on-regression", type=float, metavar="YUZDE",
+                        help="p50/p95 bu yüzdeden fazla kötüleşirse 1 ile çık")
+    args = parser.parse_args()
+    use_benchmark_database(args.db, args.force)
+
+    current = asyncio.run(run(args))
+    current["ayarlar"] = {
+        "requests": args.requests, "heavy_requests": args.heavy_requests,
+        "concurrency": args.concurrency, "seed": args.seed,
+    }
+    previous = latest_results("e2e")
+    path = save_results("e2e", current, args.label)
+    print(f"\nSonuçlar: {path}")
+
+    if previous:
+        print(f"Karşılaştırma: {previous['etiket']} ({previous['zaman'][:19]})")
+        regressions = compare(current["senaryolar"], previous["senaryolar"], args.fail_on_regression or 20)
+        if regressions:
+            print("\n⚠️  Gerilemeler:")
+            for line in regressions:
+                print(f"  - {line}")
+            if args.fail_on_regression is not None:
+                raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Metrik middleware'inin ek maliyeti
+
+Aynı küçük FastAPI uygulaması middleware'siz ve RequestContextMiddleware +
+MetricsMiddleware ile, HTTP istemcisi olmadan doğrudan ASGI çağrılarıyla
+sürülür. Fark istek başına eklenen süredir.
+
+Kullanım:
+    cd backend && python -m benchmarks.bench_metrics [--requests 20000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+
+from http_metrics import MetricsMiddleware, render_metrics
+from request_context import RequestContextMiddleware
+
+
+def build_app(instrumented: bool) -> FastAPI:
+    app = FastAPI(default_response_class=ORJSONResponse)
+
+    @app.get("/api/raporlar/{rapor_id}")
+    async def get_rapor(rapor_id: str):
+        return {"id": rapor_id, "rapor_no": "PK2025-ANK001", "durum": "Aktif"}
+
+    if instrumented:
+        app.add_middleware(RequestContextMiddleware)
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def drive(app, count: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for i in range(count):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": f"/api/raporlar/{i}",
+            "raw_path": f"/api/raporlar/{i}".encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"bench")],
+            "client": ("127.0.0.1", 1234),
+            "server": ("bench", 80),
+        }
+        await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+async def run(count: int, repeat: int):
+    plain = build_app(False)
+    instrumented = build_app(True)
+    # Isınma (route derleme, lazy importlar)
+    await drive(plain, 200)
+    await drive(instrumented, 200)
+
+    base = min([await drive(plain, count) for _ in range(repeat)])
+    with_metrics = min([await drive(instrumented, count) for _ in range(repeat)])
+
+    per_base = base / count * 1e6
+    per_metrics = with_metrics / count * 1e6
+    print(f"{count} istek, en iyi {repeat} ölçüm:")
+    print(f"  middleware'siz : {per_base:8.1f} µs/istek")
+    print(f"  metrikli       : {per_metrics:8.1f} µs/istek")
+    print(f"  ek maliyet     : {per_metrics - per_base:8.1f} µs/istek ({(per_metrics / per_base - 1) * 100:.1f}%)")
+
+    render_metrics()
+    start = time.perf_counter()
+    body = render_metrics()
+    print(f"  /metrics render: {(time.perf_counter() - start) * 1000:8.2f} ms ({len(body)} byte)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Liste serileştirme mikro-benchmark'ı
+
+Eski yol (fromisoformat döngüsü + response_model doğrulaması + stdlib json)
+ile yeni yol (LeanSerializer + orjson) arasındaki 500 satırlık sayfa maliyetini
+karşılaştırır.
+
+Kullanım:
+    cd backend && python -m benchmarks.bench_serialization [--rows 500] [--repeat 50]
+"""
+import argparse
+import json
+import sys
+import timeit
+import uuid
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from models import Rapor
+from serialization import LeanSerializer
+
+
+def make_raporlar(count: int) -> List[dict]:
+    now = datetime.now(timezone.utc)
+    docs = []
+    for i in range(count):
+        created = (now - timedelta(minutes=i)).isoformat()
+        docs.append({
+            "id": str(uuid.uuid4()),
+            "rapor_no": f"PK2025-ANK{i:03d}",
+            "proje_id": str(uuid.uuid4()),
+            "proje_adi": "Çukurova Deprem Konutları Projesi",
+            "sehir": "Ankara",
+            "sehir_kodu": "ANK",
+            "ekipman_adi": f"Asansör A{i}",
+            "kategori": "Asansör",
+            "alt_kategori": "Yolcu Asansörü",
+            "firma": "ABC Firma",
+            "lokasyon": "Ankara Ofis",
+            "marka_model": "Otis 2000",
+            "seri_no": f"SN{i:05d}",
+            "periyot": "6 Aylık",
+            "gecerlilik_tarihi": "2025-12-31",
+            "aciklama": "Periyodik kontrol sonucu uygun bulunmuştur. " * 8,
+            "uygunluk": "Uygun",
+            "durum": "Aktif",
+            "created_by": str(uuid.uuid4()),
+            "created_by_username": "inspector",
+            "created_at": created,
+            "updated_at": created,
+        })
+    return docs
+
+
+def old_path(docs: List[dict], adapter: TypeAdapter) -> bytes:
+    rows = [dict(d) for d in docs]
+    for rapor in rows:
+        if isinstance(rapor['created_at'], str):
+            rapor['created_at'] = datetime.fromisoformat(rapor['created_at'])
+        if isinstance(rapor['updated_at'], str):
+            rapor['updated_at'] = datetime.fromisoformat(rapor['updated_at'])
+        if 'created_by_username' not in rapor or not rapor['created_by_username']:
+            rapor['created_by_username'] = 'Bilinmiyor'
+    validated = adapter.validate_python(rows)
+    content = jsonable_encoder(validated)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def new_path(docs: List[dict], serializer: LeanSerializer) -> bytes:
+    return orjson.dumps(serializer.many(docs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    docs = make_raporlar(args.rows)
+    adapter = TypeAdapter(List[Rapor])
+    serializer = LeanSerializer(Rapor, overrides={"created_by_username": "Bilinmiyor"})
+
+    old = min(timeit.repeat(lambda: old_path(docs, adapter), number=1, repeat=args.repeat))
+    new = min(timeit.repeat(lambda: new_path(docs, serializer), number=1, repeat=args.repeat))
+
+    print(f"{args.rows} satır, en iyi {args.repeat} ölçüm:")
+    print(f"  eski yol : {old * 1000:8.2f} ms")
+    print(f"  yeni yol : {new * 1000:8.2f} ms")
+    print(f"  hızlanma : {old / new:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
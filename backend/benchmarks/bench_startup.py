@@ -0,0 +1,99 @@
+"""
+Soğuk açılış süresi ve boştaki bellek bütçesi
+
+server modülünü her seferinde yeni bir Python sürecinde içe aktarır (Mongo
+bağlantısı gerekmez; istemci ilk komutta bağlanır) ve şunları ölçer:
+  - import süresi (medyan / en kötü)
+  - içe aktarma sonrası tepe RSS
+  - LAZY_MODULES'tan herhangi birinin açılışta yüklenip yüklenmediği
+
+Bütçe aşılırsa veya tembel yüklenmesi gereken bir modül açılışta yüklenirse
+1 ile çıkar. Tembel modül ve import süresi kontrolü testlerde de vardır
+(tests/test_startup.py); bu betik isteğe bağlı ayrıntılı ölçüm (RSS, önceki
+çalıştırmayla karşılaştırma) içindir.
+
+Kullanım:
+    cd backend && python -m benchmarks.bench_startup [--runs 5] [--budget-ms 1500] [--budget-rss-mb 150]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import BACKEND_DIR, latest_results, save_results
+
+# Yalnızca ilgili endpoint'lerin ilk çağrısında yüklenmesi gereken modüller
+LAZY_MODULES = ["openpyxl", "passlib", "bcrypt", "PIL"]
+
+CHILD = """
+import json, resource, sys, time
+started = time.perf_counter()
+import server
+elapsed = time.perf_counter() - started
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    "import_ms": elapsed * 1000,
+    "rss_mb": rss_kb / 1024,
+    "yuklenen": [m for m in %r if m in sys.modules],
+}))
+"""
+
+
+def measure_once() -> dict:
+    env = dict(os.environ)
+    env.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    env.setdefault("DB_NAME", "ekos_benchmark")
+    output = subprocess.check_output(
+        [sys.executable, "-c", CHILD % (LAZY_MODULES,)], cwd=BACKEND_DIR, env=env
+    )
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500, help="Medyan import süresi üst sınırı")
+    parser.add_argument("--budget-rss-mb", type=float, default=150, help="Açılış sonrası tepe RSS üst sınırı")
+    parser.add_argument("--label")
+    args = parser.parse_args()
+
+    # İlk çalıştırma .pyc derlemesini de içerir; ölçüme katılmaz
+    measure_once()
+    runs = [measure_once() for _ in range(args.runs)]
+    import_ms = [r["import_ms"] for r in runs]
+    rss_mb = [r["rss_mb"] for r in runs]
+    yuklenen = sorted({m for r in runs for m in r["yuklenen"]})
+
+    results = {
+        "import_medyan_ms": round(statistics.median(import_ms), 1),
+        "import_max_ms": round(max(import_ms), 1),
+        "rss_medyan_mb": round(statistics.median(rss_mb), 1),
+        "acilista_yuklenen_tembel_moduller": yuklenen,
+    }
+    print(f"import: medyan {results['import_medyan_ms']} ms, en kötü {results['import_max_ms']} ms")
+    print(f"RSS   : medyan {results['rss_medyan_mb']} MB")
+
+    previous = latest_results("startup")
+    path = save_results("startup", results, args.label)
+    print(f"Sonuçlar: {path}")
+    if previous:
+        print(f"Önceki ({previous['etiket']}): import {previous['import_medyan_ms']} ms, RSS {previous['rss_medyan_mb']} MB")
+
+    violations = []
+    if results["import_medyan_ms"] > args.budget_ms:
+        violations.append(f"import süresi {results['import_medyan_ms']} ms > {args.budget_ms} ms")
+    if results["rss_medyan_mb"] > args.budget_rss_mb:
+        violations.append(f"RSS {results['rss_medyan_mb']} MB > {args.budget_rss_mb} MB")
+    if yuklenen:
+        violations.append(f"açılışta yüklenmemesi gereken modüller: {', '.join(yuklenen)}")
+    if violations:
+        print("\n⚠️  Açılış bütçesi aşıldı:")
+        for line in violations:
+            print(f"  - {line}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
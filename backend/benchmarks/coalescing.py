@@ -0,0 +1,98 @@
+"""
+İstek birleştirme (single-flight) kontrolü
+
+Aynı anda gelen N özdeş isteğin hedef sorguları kaç kez çalıştırdığını
+query_counter ile ölçer ve tek isteğin maliyetiyle karşılaştırır. Kimlik
+doğrulama ve ETag sürüm okuması her istekte yapılır; yalnızca senaryonun
+KOLEKSIYONLAR listesindeki komutlar sayılır. Ani yükte bu komutlar tek
+isteğin --tolerans katını aşarsa 1 ile çıkar.
+
+Uygulama ASGI üzerinden bu süreçte çalıştırılır; seed_data ile doldurulmuş
+benchmark veritabanı gerekir.
+
+Kullanım:
+    cd backend
+    python -m benchmarks.seed_data --drop
+    python -m benchmarks.coalescing [--istek 50] [--tolerans 2]
+"""
+import argparse
+import asyncio
+from typing import Dict, List, Tuple
+
+from benchmarks.common import DEFAULT_DB_NAME, start_app, stop_app, use_benchmark_database
+
+# Senaryo -> (yol, parametreler, sayılan koleksiyonlar)
+SCENARIOS: Dict[str, Tuple[str, dict, List[str]]] = {
+    "dashboard": ("/api/dashboard/stats", {}, ["raporlar", "iskele_bilesenleri"]),
+    "raporlar_liste": ("/api/raporlar", {"view": "summary", "limit": 50}, ["raporlar"]),
+}
+
+
+def target_commands(counter, collections: List[str]) -> int:
+    return sum(
+        count for key, count in counter.by_command().items()
+        if key.split(" ", 1)[-1] in collections and not key.startswith("getMore")
+    )
+
+
+async def run(args) -> List[str]:
+    import httpx
+    from benchmarks.scenarios import BenchContext
+    from query_counter import count_queries
+
+    app = await start_app()
+    violations = []
+    try:
+        ctx = await BenchContext.load(seed=args.seed)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://coalescing", timeout=None) as client:
+            print(f"{'senaryo':<18}{'tek istek':>10}{f'{args.istek} istek':>12}{'kat':>8}")
+            for name in args.scenarios or SCENARIOS:
+                path, params, collections = SCENARIOS[name]
+                if name == "raporlar_liste":
+                    params = {**params, "proje_id": ctx.proje_ids[0]}
+
+                async def call():
+                    response = await client.get(path, params=params, headers=ctx.headers)
+                    if response.status_code >= 400:
+                        raise SystemExit(f"{name} HTTP {response.status_code}: {response.text[:300]}")
+
+                with count_queries() as single:
+                    await call()
+                with count_queries() as spike:
+                    await asyncio.gather(*(call() for _ in range(args.istek)))
+
+                base = max(target_commands(single, collections), 1)
+                ratio = target_commands(spike, collections) / base
+                ok = ratio <= args.tolerans
+                print(f"{name:<18}{base:>10}{target_commands(spike, collections):>12}{ratio:>8.1f}  {'✓' if ok else '✗'}")
+                if not ok:
+                    violations.append(f"{name}: {args.istek} eş zamanlı istek {ratio:.1f} kat sorgu çalıştırdı "
+                                      f"(sınır {args.tolerans}); {spike.summary()}")
+    finally:
+        await stop_app(app)
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DEFAULT_DB_NAME)
+    parser.add_argument("--force", action="store_true")
+    parser.add_argument("--scenarios", nargs="*", choices=list(SCENARIOS))
+    parser.add_argument("--istek", type=int, default=50, help="Aynı anda gönderilen özdeş istek sayısı")
+    parser.add_argument("--tolerans", type=float, default=2, help="Tek isteğe göre izin verilen sorgu katı")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    use_benchmark_database(args.db, args.force)
+
+    violations = asyncio.run(run(args))
+    if violations:
+        print("\n⚠️  Eş zamanlı özdeş istekler birleştirilmedi:")
+        for line in violations:
+            print(f"  - {line}")
+        raise SystemExit(1)
+    print("\nÖzdeş istekler tek sorguyu paylaşıyor")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Uçtan uca benchmark ve yük testi betiklerinin ortak yardımcıları
+
+- Ayrı bir benchmark veritabanı seçimi (üretim verisine yazmamak için)
+- ASGI uygulamasının startup/shutdown olaylarıyla birlikte ayağa kaldırılması
+- Yüzdelik hesapları ve sonuçların benchmarks/results altında saklanması
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+MEDIA_DIR = Path(__file__).resolve().parent / ".data" / "media"
+DEFAULT_DB_NAME = "ekos_benchmark"
+
+BENCH_PASSWORD = "bench12345"
+BENCH_USERS = {
+    "admin": {"id": "bench-admin", "username": "bench_admin", "email": "bench_admin@ekos.local", "role": "admin"},
+    "inspector": {"id": "bench-inspector", "username": "bench_inspector", "email": "bench_inspector@ekos.local", "role": "inspector"},
+}
+
+
+def use_benchmark_database(db_name: str, force: bool = False) -> None:
+    """database modülü içe aktarılmadan önce çağrılmalıdır"""
+    if "bench" not in db_name and not force:
+        raise SystemExit(f"'{db_name}' benchmark veritabanı gibi görünmüyor; yine de kullanmak için --force verin")
+    if "database" in sys.modules:
+        raise RuntimeError("database modülü zaten yüklenmiş; veritabanı adı değiştirilemez")
+    os.environ["DB_NAME"] = db_name
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+
+
+def auth_headers(role: str = "admin") -> Dict[str, str]:
+    from routers.auth import create_access_token
+    token = create_access_token({"sub": BENCH_USERS[role]["id"]})
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def start_app():
+    """server.app'i startup olaylarıyla başlatır (indeksler, varsayılan veriler, arka plan görevleri)"""
+    import server
+    await server.app.router.startup()
+    return server.app
+
+
+async def stop_app(app) -> None:
+    await app.router.shutdown()
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (k - lower)
+
+
+def summarize(latencies: List[float], wall_time: float, errors: int = 0) -> Dict[str, float]:
+    """Saniye cinsinden gecikmeleri ms yüzdeliklerine ve throughput'a çevirir"""
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        "adet": count,
+        "hata": errors,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p90_ms": round(percentile(values, 90) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+        "ortalama_ms": round(sum(values) / count * 1000, 2) if count else 0.0,
+        "istek_per_sn": round(count / wall_time, 2) if wall_time > 0 else 0.0,
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "bilinmiyor"
+
+
+def save_results(kind: str, results: dict, label: Optional[str] = None) -> Path:
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    revision = git_revision()
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    results = {
+        "tur": kind,
+        "etiket": label or revision,
+        "git": revision,
+        "zaman": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        **results,
+    }
+    path = RESULTS_DIR / f"{kind}-{stamp}-{label or revision}.json"
+    path.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+def latest_results(kind: str, exclude: Optional[Path] = None) -> Optional[dict]:
+    if not RESULTS_DIR.exists():
+        return None
+    files = sorted(p for p in RESULTS_DIR.glob(f"{kind}-*.json") if p != exclude)
+    if not files:
+        return None
+    return json.loads(files[-1].read_text(encoding="utf-8"))
+
+
+def compare(current: Dict[str, dict], previous: Dict[str, dict], threshold: float) -> List[str]:
+    """p50/p95 karşılaştırması yazdırır, eşiği aşan gerilemeleri döndürür"""
+    regressions = []
+    print(f"\n{'senaryo':<22}{'p50 önce':>10}{'p50 şimdi':>11}{'p95 önce':>10}{'p95 şimdi':>11}  değişim")
+    for name, stats in current.items():
+        old = previous.get(name)
+        if not old:
+            continue
+        changes = []
+        for key in ("p50_ms", "p95_ms"):
+            if old[key] > 0:
+                change = (stats[key] - old[key]) / old[key] * 100
+                changes.append(change)
+                if change > threshold:
+                    regressions.append(f"{name} {key}: {old[key]} -> {stats[key]} ms (+{change:.0f}%)")
+        worst = max(changes) if changes else 0.0
+        print(f"{name:<22}{old['p50_ms']:>10}{stats['p50_ms']:>11}{old['p95_ms']:>10}{stats['p95_ms']:>11}  {worst:+.0f}%")
+    return regressions
@@ -0,0 +1,170 @@
+"""
+Karma iş yükü yük testi
+
+Tek endpoint benchmark'larının göremediği çekişme etkilerini ölçer: bcrypt
+girişlerinin liste isteklerini bekletmesi, büyük bir Excel dışa aktarımının
+aynı worker'daki dashboard yenilemelerini durdurması gibi.
+
+Sanal kullanıcılar (--users) süre boyunca (--duration) karışım ağırlıklarına
+göre bir uç nokta sınıfı seçip istek gönderir. Rapor, sınıf başına kuyruk
+gecikmesini (p95/p99/max) ve throughput'u gösterir. Her kullanıcının rastgele
+üreteci --seed'den türetilir; aynı veriyle aynı istek karışımı tekrar üretilir.
+
+Kabul kontrolünün (admission.py) 429 ile geri çevirdiği ağır istekler hata
+sayılmaz, "red" sütununda ayrıca gösterilir. Sanal kullanıcılar aynı hesapla
+istek attığı için kullanıcı başına sınırlar da devrededir.
+
+Varsayılan olarak uygulama bu süreçte, tek worker gibi ASGI üzerinden
+çalıştırılır (yalnızca yerel MongoDB gerekir). --url ile ayrıca başlatılmış
+bir uvicorn sunucusu da hedeflenebilir.
+
+Kullanım:
+    cd backend
+    python -m benchmarks.seed_data --drop
+    python -m benchmarks.load_test --mix karma --users 20 --duration 60
+    python -m benchmarks.load_test --mix giris_firtinasi --url http://localhost:8001
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, List
+
+from benchmarks.common import (
+    DEFAULT_DB_NAME, compare, latest_results, save_results, start_app, stop_app, summarize,
+    use_benchmark_database
+)
+
+# Uç nokta sınıfları ve sınıf içindeki senaryolar
+CLASSES: Dict[str, List[str]] = {
+    "liste_arama": ["raporlar_liste", "raporlar_arama", "raporlar_filtre", "dashboard"],
+    "detay_medya": ["rapor_detay", "rapor_dosyalari"],
+    "olusturma": ["rapor_olustur"],
+    "ice_dis_aktarma": ["excel_export", "excel_import", "zip_export"],
+    "giris": ["giris"],
+}
+
+# Karışımlar: sınıf -> ağırlık (yüzde)
+MIXES: Dict[str, Dict[str, int]] = {
+    "karma": {"liste_arama": 70, "detay_medya": 15, "olusturma": 10, "ice_dis_aktarma": 5},
+    "giris_firtinasi": {"liste_arama": 60, "detay_medya": 10, "olusturma": 5, "giris": 25},
+    "aktarma_yogun": {"liste_arama": 60, "detay_medya": 10, "olusturma": 10, "ice_dis_aktarma": 20},
+}
+
+
+class VirtualUser:
+    def __init__(self, index: int, seed: int, mix: Dict[str, int], ctx, think_time: float):
+        self.rng = random.Random(seed * 1000 + index)
+        self.classes = list(mix)
+        self.weights = [mix[name] for name in self.classes]
+        self.ctx = ctx
+        self.think_time = think_time
+
+    async def run(self, client, deadline: float, records: Dict[str, list]) -> None:
+        from benchmarks.scenarios import SCENARIOS
+
+        # Senaryolar rastgele seçimleri ctx.rng'den yapar; kullanıcı başına ayrı üreteç
+        ctx = self.ctx
+        while time.monotonic() < deadline:
+            endpoint_class = self.rng.choices(self.classes, self.weights)[0]
+            scenario = SCENARIOS[self.rng.choice(CLASSES[endpoint_class])]
+            ctx.rng = self.rng
+            started = time.perf_counter()
+            rejected = False
+            try:
+                response = await scenario(client, ctx)
+                rejected = response.status_code == 429
+                failed = response.status_code >= 400 and not rejected
+            except Exception:
+                failed = True
+            records[endpoint_class].append((time.perf_counter() - started, failed, rejected))
+            if self.think_time:
+                await asyncio.sleep(self.rng.expovariate(1 / self.think_time))
+
+
+async def run(args) -> dict:
+    import httpx
+    from benchmarks.scenarios import BenchContext, cleanup_created
+
+    mix = MIXES[args.mix]
+    app = None
+    if args.url:
+        # Sunucu aynı SECRET_KEY ve benchmark veritabanıyla başlatılmış olmalı
+        client = httpx.AsyncClient(base_url=args.url, timeout=None)
+    else:
+        app = await start_app()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load", timeout=None)
+
+    try:
+        ctx = await BenchContext.load(seed=args.seed)
+        records: Dict[str, list] = {name: [] for name in mix}
+        users = [VirtualUser(i, args.seed, mix, ctx, args.think_ms / 1000) for i in range(args.users)]
+
+        print(f"Karışım '{args.mix}': " + ", ".join(f"{k} %{v}" for k, v in mix.items()))
+        print(f"{args.users} sanal kullanıcı, {args.duration} sn...")
+        started = time.monotonic()
+        deadline = started + args.duration
+        async with client:
+            await asyncio.gather(*(user.run(client, deadline, records) for user in users))
+        wall = time.monotonic() - started
+
+        results: Dict[str, dict] = {}
+        for name, items in records.items():
+            latencies = [latency for latency, _, _ in items]
+            errors = sum(1 for _, failed, _ in items if failed)
+            results[name] = summarize(latencies, wall, errors)
+            results[name]["reddedilen"] = sum(1 for _, _, rejected in items if rejected)
+        all_items = [item for items in records.values() for item in items]
+        results["toplam"] = summarize(
+            [latency for latency, _, _ in all_items], wall, sum(1 for _, failed, _ in all_items if failed)
+        )
+        results["toplam"]["reddedilen"] = sum(1 for _, _, rejected in all_items if rejected)
+
+        print(f"\n{'sınıf':<18}{'adet':>7}{'hata':>6}{'red':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}{'istek/sn':>10}")
+        for name, stats in results.items():
+            print(
+                f"{name:<18}{stats['adet']:>7}{stats['hata']:>6}{stats['reddedilen']:>6}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+                f"{stats['p99_ms']:>10}{stats['max_ms']:>10}{stats['istek_per_sn']:>10}"
+            )
+
+        silinen = await cleanup_created()
+        if silinen:
+            print(f"Yük testi sırasında eklenen {silinen} rapor silindi")
+        return {"karisim": args.mix, "agirliklar": mix, "siniflar": results}
+    finally:
+        if app is not None:
+            await stop_app(app)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DEFAULT_DB_NAME)
+    parser.add_argument("--force", action="store_true")
+    parser.add_argument("--mix", choices=list(MIXES), default="karma")
+    parser.add_argument("--users", type=int, default=20, help="Eşzamanlı sanal kullanıcı sayısı")
+    parser.add_argument("--duration", type=float, default=60, help="Test süresi (saniye)")
+    parser.add_argument("--think-ms", type=float, default=0, help="İstekler arası ortalama bekleme (ms)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--url", help="Çalışan bir sunucuyu hedefle (varsayılan: süreç içi ASGI)")
+    parser.add_argument("--label")
+    args = parser.parse_args()
+    use_benchmark_database(args.db, args.force)
+
+    current = asyncio.run(run(args))
+    current["ayarlar"] = {
+        "users": args.users, "duration": args.duration, "think_ms": args.think_ms,
+        "seed": args.seed, "hedef": args.url or "asgi",
+    }
+    kind = f"load-{args.mix}"
+    previous = latest_results(kind)
+    path = save_results(kind, current, args.label)
+    print(f"\nSonuçlar: {path}")
+    if previous:
+        print(f"Karşılaştırma: {previous['etiket']} ({previous['zaman'][:19]})")
+        regressions = compare(current["siniflar"], previous["siniflar"], 20)
+        for line in regressions:
+            print(f"  ⚠️  {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Sorgu bütçesi (N+1) regresyon kontrolü
+
+Girdi boyutuyla orantılı sorgu yapmaya yatkın kod yollarını iki farklı girdi
+boyutunda çalıştırır ve query_counter ile Mongo komutlarını sayar. Bir kod
+yolu başarısız sayılır eğer:
+  - sorgu sayısı BUDGETS'taki sınırı aşarsa, veya
+  - büyük girdide küçük girdiden daha fazla sorgu yaparsa (N+1 belirtisi).
+
+Uygulama ASGI üzerinden bu süreçte çalıştırılır; seed_data ile doldurulmuş
+benchmark veritabanı gerekir. Eklenen kayıtlar çalıştırma sonunda silinir.
+Herhangi bir ihlalde 1 ile çıkar. Aynı BUDGETS, Mongo gerektirmeyen
+tests/test_query_budget.py tarafından da kullanılır.
+
+Kullanım:
+    cd backend
+    python -m benchmarks.seed_data --drop
+    python -m benchmarks.query_budget [--sizes 5 50] [--cases zip_export excel_import]
+"""
+import argparse
+import asyncio
+import io
+import uuid
+from typing import Awaitable, Callable, Dict, List
+
+from benchmarks.common import DEFAULT_DB_NAME, MEDIA_DIR, start_app, stop_app, use_benchmark_database
+
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Kod yolu -> girdi boyutundan bağımsız en fazla sorgu sayısı (getMore hariç).
+# Endpoint'lerde kimlik doğrulamanın users sorgusu ve proje önbelleği ıskası dahildir.
+BUDGETS: Dict[str, int] = {
+    "bulk_delete_raporlar": 5,   # users, medya find + delete, raporlar delete, sürüm
+    "zip_export": 3,             # users, raporlar, medya
+    "excel_import": 5,           # users, proje, son rapor no'lar, insert, sürüm
+    "makine_excel_import": 4,    # users, proje, kayıtlı plakalar, insert
+    "iskele_excel_import": 4,    # users, proje, insert, sürüm
+    "varsayilan_kategoriler": 2, # upsert'ler (tek bulk_write), sürüm
+    "baslangic_semasi": 1,       # şema güncelse yalnızca sürüm okuması
+}
+
+
+def _workbook(header: List[str], rows: List[list]) -> bytes:
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+async def bulk_delete_raporlar(client, ctx, size: int):
+    from database import db
+
+    ids = [f"qb-{uuid.uuid4()}" for _ in range(size)]
+    await db.raporlar.insert_many([
+        {"id": rapor_id, "rapor_no": rapor_id, "firma": "Benchmark Firma", "kategori": ctx.kategoriler[0]}
+        for rapor_id in ids
+    ])
+    await db.medya_dosyalari.insert_many([
+        {"id": str(uuid.uuid4()), "rapor_id": rapor_id, "dosya_yolu": str(MEDIA_DIR / "query-budget-yok")}
+        for rapor_id in ids
+    ])
+    return lambda: client.post("/api/raporlar/bulk-delete", json=ids, headers=ctx.headers)
+
+
+async def zip_export(client, ctx, size: int):
+    ids = ctx.medyali_rapor_ids or ctx.rapor_ids
+    secilen = ctx.rng.sample(ids, min(size, len(ids), 100))
+    return lambda: client.post("/api/raporlar/zip-export", json={"rapor_ids": secilen}, headers=ctx.headers)
+
+
+async def excel_import(client, ctx, size: int):
+    content = ctx.build_excel_import(size)
+    data = {"proje_id": ctx.proje_ids[0]}
+    return lambda: client.post(
+        "/api/excel/import", files={"file": ("rapor.xlsx", content, XLSX)}, data=data, headers=ctx.headers
+    )
+
+
+async def makine_excel_import(client, ctx, size: int):
+    run = uuid.uuid4().hex[:8]
+    content = _workbook(
+        ["Makine Türü", "Firma", "Plaka/Seri No"],
+        [["Forklift", "Benchmark Firma", f"QB{run}{i:05d}"] for i in range(size)]
+    )
+    data = {"proje_id": ctx.proje_ids[0]}
+    return lambda: client.post(
+        "/api/makineler/excel/import", files={"file": ("makine.xlsx", content, XLSX)}, data=data, headers=ctx.headers
+    )
+
+
+async def iskele_excel_import(client, ctx, size: int):
+    content = _workbook(
+        ["Bileşen Adı", "Malzeme Kodu", "Adet", "Firma"],
+        [["Dikme", f"QB-{i:05d}", 1, "Benchmark Firma"] for i in range(size)]
+    )
+    data = {"proje_id": ctx.proje_ids[0]}
+    return lambda: client.post(
+        "/api/iskele-bilesenleri/excel/import", files={"file": ("iskele.xlsx", content, XLSX)},
+        data=data, headers=ctx.headers
+    )
+
+
+async def varsayilan_kategoriler(client, ctx, size: int):
+    from database import db
+    from startup_coordinator import seed_default_kategoriler
+
+    # Girdi boyutu: eksik varsayılan kategori sayısı
+    silinecek = ctx.kategoriler[:size]
+    await db.kategoriler.delete_many({"isim": {"$in": silinecek}})
+    return seed_default_kategoriler
+
+
+async def baslangic_semasi(client, ctx, size: int):
+    from startup_coordinator import ensure_schema
+
+    # start_app şemayı zaten uyguladı; sonraki açılışlar veri boyutundan bağımsız olmalı
+    return ensure_schema
+
+
+Case = Callable[..., Awaitable[Callable[[], Awaitable]]]
+
+CASES: Dict[str, Case] = {
+    "bulk_delete_raporlar": bulk_delete_raporlar,
+    "zip_export": zip_export,
+    "excel_import": excel_import,
+    "makine_excel_import": makine_excel_import,
+    "iskele_excel_import": iskele_excel_import,
+    "varsayilan_kategoriler": varsayilan_kategoriler,
+    "baslangic_semasi": baslangic_semasi,
+}
+
+
+async def measure(client, ctx, name: str, size: int):
+    from query_counter import count_queries
+
+    call = await CASES[name](client, ctx, size)
+    with count_queries() as counter:
+        response = await call()
+    status = getattr(response, "status_code", 200)
+    if status >= 400:
+        raise SystemExit(f"{name} ({size}) HTTP {status}: {response.text[:300]}")
+    return counter
+
+
+async def cleanup() -> None:
+    from database import db
+    from benchmarks.scenarios import cleanup_created
+
+    await cleanup_created()
+    await db.makineler.delete_many({"firma": "Benchmark Firma"})
+    await db.iskele_bilesenleri.delete_many({"firma_adi": "Benchmark Firma"})
+
+
+async def run(args) -> List[str]:
+    import httpx
+    from benchmarks.scenarios import BenchContext
+
+    app = await start_app()
+    violations = []
+    try:
+        ctx = await BenchContext.load(seed=args.seed)
+        small, large = sorted(args.sizes)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://budget", timeout=None) as client:
+            print(f"{'kod yolu':<26}{f'n={small}':>8}{f'n={large}':>8}{'sınır':>8}")
+            for name in args.cases or CASES:
+                # Isınma: önbelleklerin ilk ıskası ölçüme karışmasın
+                await measure(client, ctx, name, 1)
+                counts = [await measure(client, ctx, name, size) for size in (small, large)]
+                budget = BUDGETS[name]
+                ok = counts[1].total <= budget and counts[1].total <= counts[0].total
+                print(f"{name:<26}{counts[0].total:>8}{counts[1].total:>8}{budget:>8}  {'✓' if ok else '✗'}")
+                if not ok:
+                    violations.append(f"{name}: n={small} -> {counts[0].total}, n={large} -> {counts[1].total} "
+                                      f"(sınır {budget}); {counts[1].summary()}")
+        await cleanup()
+    finally:
+        await stop_app(app)
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DEFAULT_DB_NAME)
+    parser.add_argument("--force", action="store_true")
+    parser.add_argument("--cases", nargs="*", choices=list(CASES))
+    parser.add_argument("--sizes", nargs=2, type=int, default=[5, 50], metavar=("KUCUK", "BUYUK"))
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    use_benchmark_database(args.db, args.force)
+
+    violations = asyncio.run(run(args))
+    if violations:
+        print("\n⚠️  Sorgu bütçesi aşıldı:")
+        for line in violations:
+            print(f"  - {line}")
+        raise SystemExit(1)
+    print("\nTüm kod yolları sorgu bütçesinde")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Okuma tercihi yönlendirme kontrolü
+
+Analitik endpoint'lerin (export'lar, ZIP, dashboard) okumalarının
+database.READ_PREFERENCES'taki tercihle, işlem okumalarının ise primary'den
+yapıldığını query_counter ile kaydedilen komutlar üzerinden doğrular. Kimlik
+doğrulama gibi ortak okumalar kontrol dışıdır; yalnızca her senaryonun
+KOLEKSIYONLAR listesine bakılır.
+
+Uygulama ASGI üzerinden bu süreçte çalıştırılır; seed_data ile doldurulmuş
+benchmark veritabanı gerekir. Yerel tek üyeli replica set ile denemek için:
+
+    mongod --replSet rs0 --dbpath /tmp/rs0
+    mongosh --eval 'rs.initiate()'
+    MONGO_URL=mongodb://localhost:27017/?replicaSet=rs0 python -m benchmarks.read_routing
+
+Tek üyede ikincil olmadığından secondaryPreferred okumalar da primary'ye
+gider; kontrol sunucuya giden okuma tercihine bakar. Herhangi bir ihlalde 1 ile
+çıkar.
+
+Kullanım:
+    cd backend
+    python -m benchmarks.seed_data --drop
+    python -m benchmarks.read_routing
+"""
+import argparse
+import asyncio
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.common import DEFAULT_DB_NAME, start_app, stop_app, use_benchmark_database
+
+# Senaryo -> (metot, yol, gövde üretici, endpoint sınıfı (None: primary), kontrol edilen koleksiyonlar)
+Scenario = Tuple[str, str, Optional[Callable], Optional[str], List[str]]
+
+SCENARIOS: Dict[str, Scenario] = {
+    "excel_export_all": ("GET", "/api/excel/export-all", None, "export", ["raporlar"]),
+    "iskele_export": ("GET", "/api/iskele-bilesenleri/excel/export", None, "export", ["iskele_bilesenleri"]),
+    "makine_export": ("GET", "/api/makineler/excel/export", None, "export", ["makineler"]),
+    "zip_export": (
+        "POST", "/api/raporlar/zip-export",
+        lambda ctx: {"rapor_ids": (ctx.medyali_rapor_ids or ctx.rapor_ids)[:20]},
+        "export", ["raporlar", "medya_dosyalari"]
+    ),
+    "dashboard": (
+        "GET", "/api/dashboard/stats", None,
+        "dashboard", ["raporlar", "iskele_bilesenleri", "degisiklik_surumleri"]
+    ),
+    # İşlem okumaları primary'de kalmalı
+    "rapor_listesi": ("GET", "/api/raporlar", None, None, ["raporlar"]),
+    "rapor_detay": ("GET", "/api/raporlar/{rapor_id}", None, None, ["raporlar"]),
+    "makine_listesi": ("GET", "/api/makineler", None, None, ["makineler"]),
+}
+
+
+def expected_mode(kind: Optional[str]) -> str:
+    from database import READ_PREFERENCES
+
+    return READ_PREFERENCES.get(kind, "primary") if kind else "primary"
+
+
+async def run(args) -> List[str]:
+    import httpx
+    from benchmarks.scenarios import BenchContext
+    from database import MAX_STALENESS_SECONDS, client
+    from query_counter import count_queries
+
+    app = await start_app()
+    violations = []
+    try:
+        ctx = await BenchContext.load(seed=args.seed)
+        print(f"Topoloji: {client.topology_description.topology_type_name}, "
+              f"maxStalenessSeconds={MAX_STALENESS_SECONDS}")
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://routing", timeout=None) as http:
+            print(f"{'senaryo':<20}{'beklenen':<22}görülen")
+            for name in args.scenarios or SCENARIOS:
+                method, path, body, kind, collections = SCENARIOS[name]
+                path = path.format(rapor_id=ctx.rapor_ids[0])
+                json_body = body(ctx) if body else None
+                with count_queries() as counter:
+                    response = await http.request(method, path, json=json_body, headers=ctx.headers)
+                if response.status_code >= 400:
+                    raise SystemExit(f"{name} HTTP {response.status_code}: {response.text[:300]}")
+
+                expected = expected_mode(kind)
+                seen = counter.by_read_preference()
+                observed = {c: sorted(seen.get(c, ())) for c in collections}
+                ok = all(modes == [expected] for modes in observed.values())
+                print(f"{name:<20}{expected:<22}{observed}  {'✓' if ok else '✗'}")
+                if not ok:
+                    violations.append(f"{name}: beklenen {expected}, görülen {observed}")
+    finally:
+        await stop_app(app)
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DEFAULT_DB_NAME)
+    parser.add_argument("--force", action="store_true")
+    parser.add_argument("--scenarios", nargs="*", choices=list(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    use_benchmark_database(args.db, args.force)
+
+    violations = asyncio.run(run(args))
+    if violations:
+        print("\n⚠️  Okuma tercihi yönlendirmesi hatalı:")
+        for line in violations:
+            print(f"  - {line}")
+        raise SystemExit(1)
+    print("\nTüm okumalar beklenen üyeye yönlendirildi")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Benchmark senaryoları
+
+Her senaryo httpx istemcisi ile ASGI uygulamasına tek bir istek gönderir.
+Rastgele seçimler (rapor, proje, arama terimi) BenchContext'in kendi seed'li
+rastgele üretecinden yapılır; aynı veri ve seed ile istek dizisi tekrarlanabilir.
+"""
+import io
+import random
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+from benchmarks.common import BENCH_PASSWORD, BENCH_USERS, auth_headers
+
+EXCEL_IMPORT_ROWS = 100
+EXCEL_EXPORT_SIZE = 500
+ZIP_EXPORT_SIZE = 20
+LIST_PAGE_SIZE = 50
+
+
+@dataclass
+class BenchContext:
+    rng: random.Random
+    headers: Dict[str, str]
+    rapor_ids: List[str]
+    medyali_rapor_ids: List[str]
+    proje_ids: List[str]
+    kategoriler: List[str]
+    sehirler: List[str]
+    arama_terimleri: List[str]
+    excel_import: bytes = b""
+
+    @classmethod
+    async def load(cls, seed: int = 7, sample_size: int = 5000) -> "BenchContext":
+        from database import db
+        from constants import SEHIRLER, KATEGORI_ALT_KATEGORI
+
+        rapor_sample = await db.raporlar.aggregate([
+            {"$sample": {"size": sample_size}},
+            {"$project": {"_id": 0, "id": 1, "ekipman_adi": 1, "seri_no": 1, "rapor_no": 1}}
+        ]).to_list(sample_size)
+        medyali = await db.medya_dosyalari.aggregate([
+            {"$sample": {"size": sample_size}},
+            {"$group": {"_id": "$rapor_id"}}
+        ]).to_list(sample_size)
+        projeler = await db.projeler.find({}, {"_id": 0, "id": 1}).to_list(None)
+        if not rapor_sample or not projeler:
+            raise SystemExit("Benchmark veritabanı boş; önce: python -m benchmarks.seed_data --drop")
+
+        rng = random.Random(seed)
+        terimler = []
+        for rapor in rapor_sample[:200]:
+            terimler.append(rapor["rapor_no"][-6:])
+            terimler.append(rapor["ekipman_adi"].split()[0])
+            terimler.append(rapor["seri_no"][:6])
+
+        ctx = cls(
+            rng=rng,
+            headers=auth_headers("admin"),
+            rapor_ids=[r["id"] for r in rapor_sample],
+            medyali_rapor_ids=[m["_id"] for m in medyali],
+            proje_ids=[p["id"] for p in projeler],
+            kategoriler=list(KATEGORI_ALT_KATEGORI.keys()),
+            sehirler=[s["isim"] for s in SEHIRLER],
+            arama_terimleri=terimler,
+        )
+        ctx.excel_import = ctx.build_excel_import(EXCEL_IMPORT_ROWS)
+        return ctx
+
+    def build_excel_import(self, rows: int) -> bytes:
+        from openpyxl import Workbook
+
+        wb = Workbook()
+        ws = wb.active
+        ws.append([
+            "Şehir", "Ekipman Adı", "Kategori", "Firma", "Lokasyon", "Marka/Model", "Seri No",
+            "Alt Kategori", "Periyot", "Geçerlilik Tarihi", "Uygunluk", "Açıklama"
+        ])
+        for i in range(rows):
+            ws.append([
+                self.rng.choice(self.sehirler), f"İçe Aktarılan Ekipman {i}", self.rng.choice(self.kategoriler),
+                "Benchmark Firma", "Depo", "Model X", f"IMP{i:06d}", None, "12 Aylık", "2026-01-01", "Uygun", None
+            ])
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        return buffer.getvalue()
+
+    def rapor_payload(self) -> dict:
+        return {
+            "proje_id": self.rng.choice(self.proje_ids),
+            "sehir": self.rng.choice(self.sehirler),
+            "ekipman_adi": f"Benchmark Ekipman {self.rng.randint(1, 10**6)}",
+            "kategori": self.rng.choice(self.kategoriler),
+            "firma": "Benchmark Firma",
+            "lokasyon": "Test Sahası",
+            "marka_model": "Model Y",
+            "seri_no": f"BN{self.rng.randint(0, 10**8):08d}",
+            "periyot": "6 Aylık",
+            "gecerlilik_tarihi": "2026-06-01",
+            "uygunluk": "Uygun",
+        }
+
+
+Scenario = Callable[[httpx.AsyncClient, BenchContext], Awaitable[httpx.Response]]
+
+
+async def raporlar_liste(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    skip = ctx.rng.randint(0, 20) * LIST_PAGE_SIZE
+    return await client.get("/api/raporlar", params={"limit": LIST_PAGE_SIZE, "skip": skip}, headers=ctx.headers)
+
+
+async def raporlar_arama(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    params = {"arama": ctx.rng.choice(ctx.arama_terimleri), "limit": LIST_PAGE_SIZE}
+    return await client.get("/api/raporlar", params=params, headers=ctx.headers)
+
+
+async def raporlar_filtre(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    params = {
+        "kategori": ctx.rng.choice(ctx.kategoriler),
+        "proje_id": ctx.rng.choice(ctx.proje_ids),
+        "limit": LIST_PAGE_SIZE,
+    }
+    return await client.get("/api/raporlar", params=params, headers=ctx.headers)
+
+
+async def rapor_detay(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    return await client.get(f"/api/raporlar/{ctx.rng.choice(ctx.rapor_ids)}", headers=ctx.headers)
+
+
+async def rapor_dosyalari(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    ids = ctx.medyali_rapor_ids or ctx.rapor_ids
+    return await client.get(f"/api/dosyalar/{ctx.rng.choice(ids)}", headers=ctx.headers)
+
+
+async def dashboard(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    return await client.get("/api/dashboard/stats", headers=ctx.headers)
+
+
+async def rapor_olustur(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    return await client.post("/api/raporlar", json=ctx.rapor_payload(), headers=ctx.headers)
+
+
+async def giris(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    # bcrypt doğrulaması içerir; admin'in oturum token'ını değiştirmemek için inspector ile
+    body = {"email": BENCH_USERS["inspector"]["email"], "password": BENCH_PASSWORD}
+    return await client.post("/api/auth/login", json=body)
+
+
+async def excel_export(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    ids = ctx.rng.sample(ctx.rapor_ids, min(EXCEL_EXPORT_SIZE, len(ctx.rapor_ids)))
+    return await client.post("/api/excel/export", json={"rapor_ids": ids}, headers=ctx.headers)
+
+
+async def excel_import(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    files = {"file": ("benchmark.xlsx", ctx.excel_import,
+                      "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+    data = {"proje_id": ctx.rng.choice(ctx.proje_ids)}
+    return await client.post("/api/excel/import", files=files, data=data, headers=ctx.headers)
+
+
+async def zip_export(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    ids = ctx.medyali_rapor_ids or ctx.rapor_ids
+    secilen = ctx.rng.sample(ids, min(ZIP_EXPORT_SIZE, len(ids)))
+    return await client.post("/api/raporlar/zip-export", json={"rapor_ids": secilen}, headers=ctx.headers)
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "raporlar_liste": raporlar_liste,
+    "raporlar_arama": raporlar_arama,
+    "raporlar_filtre": raporlar_filtre,
+    "rapor_detay": rapor_detay,
+    "rapor_dosyalari": rapor_dosyalari,
+    "dashboard": dashboard,
+    "rapor_olustur": rapor_olustur,
+    "giris": giris,
+    "excel_export": excel_export,
+    "excel_import": excel_import,
+    "zip_export": zip_export,
+}
+
+# Ağır senaryolar için varsayılan istek sayısı düşürülür
+HEAVY_SCENARIOS = {"excel_export", "excel_import", "zip_export"}
+
+
+async def cleanup_created() -> int:
+    """Oluşturma/içe aktarma senaryolarının eklediği raporları siler (veri hacmi sabit kalsın)"""
+    from database import db
+    result = await db.raporlar.delete_many({"firma": "Benchmark Firma"})
+    return result.deleted_count
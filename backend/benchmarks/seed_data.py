@@ -0,0 +1,276 @@
+"""
+Benchmark veritabanı için gerçekçi veri üreticisi
+
+81 ilin tamamına dağılmış raporlar, projeler, iskele bileşenleri, makineler,
+operatörler ve medya kayıtları üretir. Üretim deterministiktir (--seed);
+aynı parametrelerle her çalıştırmada aynı veri oluşur, böylece farklı
+sürümlerin benchmark sonuçları karşılaştırılabilir.
+
+Medya kayıtları benchmarks/.data/media altındaki az sayıda küçük dosyayı
+paylaşır (ZIP dışa aktarımı gerçek dosya okur).
+
+Kullanım:
+    cd backend && python -m benchmarks.seed_data --drop
+    python -m benchmarks.seed_data --raporlar 1000000 --iskele 100000 --medya 200000 --drop
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+from benchmarks.common import (
+    BENCH_PASSWORD, BENCH_USERS, DEFAULT_DB_NAME, MEDIA_DIR, use_benchmark_database
+)
+
+FIRMALAR = [
+    "ABC Yapı A.Ş.", "Anadolu İnşaat", "Ege Makine Ltd.", "Karadeniz Enerji", "Marmara Lojistik",
+    "Toros Çimento", "Doğu Altyapı", "Akdeniz Otelcilik", "İç Anadolu Tarım", "Trakya Tekstil"
+]
+MARKALAR = ["Otis 2000", "Schindler 3300", "Kone MonoSpace", "Atlas Copco GA", "Bosch HD", "Hyundai HX", "CAT 320"]
+PERIYOTLAR = ["3 Aylık", "6 Aylık", "12 Aylık"]
+MAKINE_TURLERI = ["Ekskavatör", "Forklift", "Vinç", "Beton Pompası", "Kamyon", "Traktör", "Loder"]
+BILESEN_ADLARI = ["Dikme", "Yatay Bağlantı", "Çapraz", "Korkuluk", "Platform", "Ayar Vidası", "Taban Plakası"]
+MEDIA_FILE_COUNT = 20
+MEDIA_FILE_SIZE = 64 * 1024
+
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat()
+
+
+class Generator:
+    def __init__(self, seed: int):
+        from constants import SEHIRLER, KATEGORI_ALT_KATEGORI
+        self.rng = random.Random(seed)
+        self.sehirler = SEHIRLER
+        self.kategoriler = list(KATEGORI_ALT_KATEGORI.items())
+        self.now = datetime(2025, 6, 1, tzinfo=timezone.utc)
+        self.rapor_sayaclari: Dict[str, int] = {}
+        # Raporlar artan created_at ile üretilir; generate_rapor_no en son
+        # oluşturulan raporun numarasından devam ettiği için sıra tutarlı kalmalı
+        self.rapor_zamani = self.now - timedelta(days=3 * 365)
+        self.rapor_adimi = timedelta(seconds=1)
+
+    def uid(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def past(self, days: int = 3 * 365) -> datetime:
+        return self.now - timedelta(seconds=self.rng.randint(0, days * 86400))
+
+    def future_date(self) -> str:
+        return (self.now + timedelta(days=self.rng.randint(-120, 365))).strftime("%Y-%m-%d")
+
+    def proje(self, i: int) -> dict:
+        return {
+            "id": self.uid(),
+            "proje_adi": f"Proje {i:04d} - {self.rng.choice(self.sehirler)['isim']}",
+            "firma_adi": self.rng.choice(FIRMALAR),
+            "proje_kodu": f"PRJ{i:04d}",
+            "lokasyon": self.rng.choice(self.sehirler)["isim"],
+            "durum": "Aktif",
+            "created_at": _iso(self.past()),
+        }
+
+    def rapor(self, proje: dict, created_by: dict) -> dict:
+        sehir = self.rng.choice(self.sehirler)
+        kategori, alt_kategoriler = self.rng.choice(self.kategoriler)
+        self.rapor_zamani += self.rapor_adimi
+        created = self.rapor_zamani
+        prefix = f"PK{created.year}-{sehir['kod']}"
+        sayac = self.rapor_sayaclari.get(prefix, 0) + 1
+        self.rapor_sayaclari[prefix] = sayac
+        return {
+            "id": self.uid(),
+            "rapor_no": f"{prefix}{str(sayac).zfill(3)}",
+            "proje_id": proje["id"],
+            "proje_adi": proje["proje_adi"],
+            "sehir": sehir["isim"],
+            "sehir_kodu": sehir["kod"],
+            "ekipman_adi": f"{kategori} {self.rng.randint(1, 9999)}",
+            "kategori": kategori,
+            "alt_kategori": self.rng.choice(alt_kategoriler) if alt_kategoriler else None,
+            "firma": proje["firma_adi"],
+            "lokasyon": f"{sehir['isim']} Şantiye {self.rng.randint(1, 50)}",
+            "marka_model": self.rng.choice(MARKALAR),
+            "seri_no": f"SN{self.rng.randint(0, 10**8):08d}",
+            "periyot": self.rng.choice(PERIYOTLAR),
+            "gecerlilik_tarihi": self.future_date(),
+            "aciklama": "Periyodik kontrol yapılmıştır. " * self.rng.randint(1, 6),
+            "uygunluk": "Uygun" if self.rng.random() < 0.85 else "Uygun Değil",
+            "durum": "Aktif",
+            "created_by": created_by["id"],
+            "created_by_username": created_by["username"],
+            "created_at": _iso(created),
+            "updated_at": _iso(created),
+        }
+
+    def iskele(self, proje: dict, created_by: dict) -> dict:
+        created = self.past()
+        return {
+            "id": self.uid(),
+            "proje_id": proje["id"],
+            "proje_adi": proje["proje_adi"],
+            "bileşen_adi": self.rng.choice(BILESEN_ADLARI),
+            "malzeme_kodu": f"MK{self.rng.randint(0, 10**6):06d}",
+            "bileşen_adedi": self.rng.randint(1, 500),
+            "firma_adi": proje["firma_adi"],
+            "iskele_periyodu": "6 Aylık",
+            "gecerlilik_tarihi": self.future_date(),
+            "uygunluk": "Uygun" if self.rng.random() < 0.9 else "Uygun Değil",
+            "aciklama": None,
+            "gorseller": [],
+            "created_by": created_by["id"],
+            "created_by_username": created_by["username"],
+            "created_at": _iso(created),
+            "updated_at": _iso(created),
+        }
+
+    def makine(self, proje: dict) -> dict:
+        return {
+            "id": self.uid(),
+            "proje_id": proje["id"],
+            "proje_adi": proje["proje_adi"],
+            "makine_turu": self.rng.choice(MAKINE_TURLERI),
+            "firma": proje["firma_adi"],
+            "plaka_seri_no": f"{self.rng.randint(1, 81):02d} BNC {self.rng.randint(100, 9999)}",
+            "imalat_yili": str(self.rng.randint(2000, 2025)),
+            "periyodik_kontrol_tarihi": self.future_date(),
+            "durum": "Aktif",
+            "created_at": _iso(self.past()),
+        }
+
+    def operator(self, proje: dict) -> dict:
+        return {
+            "id": self.uid(),
+            "proje_id": proje["id"],
+            "proje_adi": proje["proje_adi"],
+            "ad_soyad": f"Operatör {self.rng.randint(1, 10**6)}",
+            "telefon": f"05{self.rng.randint(10**8, 10**9 - 1)}",
+            "makine_cinsi": self.rng.choice(MAKINE_TURLERI),
+            "belge_no": f"BLG{self.uid()[:8]}",
+            "son_gecerlilik": self.future_date(),
+            "durum": "Geçerli",
+            "created_at": _iso(self.past()),
+        }
+
+    def medya(self, rapor_id: str, media_files: List[str]) -> dict:
+        path = self.rng.choice(media_files)
+        return {
+            "id": self.uid(),
+            "rapor_id": rapor_id,
+            "dosya_adi": f"foto_{self.rng.randint(1, 9999)}.jpg",
+            "dosya_yolu": path,
+            "dosya_tipi": "image/jpeg",
+            "dosya_boyutu": MEDIA_FILE_SIZE,
+            "created_at": _iso(self.past()),
+        }
+
+
+def write_media_files(rng: random.Random) -> List[str]:
+    MEDIA_DIR.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(MEDIA_FILE_COUNT):
+        path = MEDIA_DIR / f"bench_{i:02d}.jpg"
+        if not path.exists():
+            path.write_bytes(bytes(rng.getrandbits(8) for _ in range(MEDIA_FILE_SIZE)))
+        paths.append(str(path))
+    return paths
+
+
+async def insert_batches(collection, count: int, make: Callable[[], dict], batch_size: int, label: str) -> None:
+    started = time.monotonic()
+    inserted = 0
+    while inserted < count:
+        size = min(batch_size, count - inserted)
+        await collection.insert_many([make() for _ in range(size)], ordered=False)
+        inserted += size
+        if inserted % (batch_size * 20) == 0 or inserted == count:
+            rate = inserted / max(time.monotonic() - started, 1e-6)
+            print(f"  {label}: {inserted}/{count} ({rate:.0f} kayıt/sn)")
+
+
+async def seed(args) -> None:
+    from database import db
+    from routers.auth import get_password_hash
+
+    gen = Generator(args.seed)
+    collections = ["users", "projeler", "raporlar", "iskele_bilesenleri", "makineler", "operatorler", "medya_dosyalari"]
+
+    if args.drop:
+        for name in collections + ["degisiklik_surumleri"]:
+            await db[name].drop()
+
+    password_hash = get_password_hash(BENCH_PASSWORD)
+    for user in BENCH_USERS.values():
+        await db.users.update_one(
+            {"id": user["id"]},
+            {"$set": {
+                **user,
+                "password": password_hash,
+                "email_verified": True,
+                "created_at": _iso(gen.now),
+            }},
+            upsert=True
+        )
+    kullanicilar = list(BENCH_USERS.values())
+
+    projeler = [gen.proje(i) for i in range(args.projeler)]
+    await db.projeler.insert_many(projeler)
+    print(f"  projeler: {len(projeler)}")
+
+    gen.rapor_adimi = timedelta(days=3 * 365) / max(args.raporlar, 1)
+    rapor_ids: List[str] = []
+
+    def make_rapor() -> dict:
+        rapor = gen.rapor(gen.rng.choice(projeler), gen.rng.choice(kullanicilar))
+        if len(rapor_ids) < args.medya:
+            rapor_ids.append(rapor["id"])
+        return rapor
+
+    await insert_batches(db.raporlar, args.raporlar, make_rapor, args.batch_size, "raporlar")
+    await insert_batches(
+        db.iskele_bilesenleri, args.iskele,
+        lambda: gen.iskele(gen.rng.choice(projeler), gen.rng.choice(kullanicilar)), args.batch_size, "iskele_bilesenleri"
+    )
+    await insert_batches(db.makineler, args.makineler, lambda: gen.makine(gen.rng.choice(projeler)), args.batch_size, "makineler")
+    await insert_batches(db.operatorler, args.operatorler, lambda: gen.operator(gen.rng.choice(projeler)), args.batch_size, "operatorler")
+
+    if args.medya and rapor_ids:
+        media_files = write_media_files(gen.rng)
+        await insert_batches(
+            db.medya_dosyalari, args.medya,
+            lambda: gen.medya(gen.rng.choice(rapor_ids), media_files), args.batch_size, "medya_dosyalari"
+        )
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--db", default=DEFAULT_DB_NAME, help="Benchmark veritabanı adı")
+    parser.add_argument("--force", action="store_true", help="Adında 'bench' geçmeyen veritabanına yazmaya izin ver")
+    parser.add_argument("--drop", action="store_true", help="Önce ilgili koleksiyonları temizle")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--raporlar", type=int, default=100_000)
+    parser.add_argument("--projeler", type=int, default=200)
+    parser.add_argument("--iskele", type=int, default=10_000)
+    parser.add_argument("--makineler", type=int, default=2_000)
+    parser.add_argument("--operatorler", type=int, default=2_000)
+    parser.add_argument("--medya", type=int, default=20_000)
+    parser.add_argument("--batch-size", type=int, default=5_000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    args = parser.parse_args()
+    use_benchmark_database(args.db, args.force)
+
+    started = time.monotonic()
+    print(f"🌱 '{args.db}' veritabanına veri üretiliyor (seed={args.seed})")
+    asyncio.run(seed(args))
+    print(f"✅ Tamamlandı: {time.monotonic() - started:.1f} sn")
+
+
+if __name__ == "__main__":
+    main()
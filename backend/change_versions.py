@@ -0,0 +1,46 @@
+"""
+Koleksiyon değişiklik sürümleri
+
+Her yazma işleminden sonra ilgili koleksiyonun sayacı artırılır. Sayaçlar
+Mongo'da tutulduğu için tüm worker'lar aynı değeri görür; ETag üretimi gibi
+"veri değişti mi?" sorularına sorgunun kendisini çalıştırmadan cevap verir.
+"""
+from typing import Callable, Dict, List
+
+from pymongo import UpdateOne
+
+from database import db
+
+VERSIONS_COLLECTION = "degisiklik_surumleri"
+
+# Aynı worker içindeki yazmalardan haberdar olmak isteyenler (ör. referans önbelleği)
+_bump_listeners: List[Callable[[str], None]] = []
+
+
+def on_bump(listener: Callable[[str], None]) -> None:
+    _bump_listeners.append(listener)
+
+
+async def bump_version(*collections: str) -> None:
+    """Verilen koleksiyonların sürüm sayacını artırır (yazma işleminden SONRA çağrılmalı)"""
+    if not collections:
+        return
+    await db[VERSIONS_COLLECTION].bulk_write(
+        [UpdateOne({"_id": name}, {"$inc": {"version": 1}}, upsert=True) for name in collections],
+        ordered=False
+    )
+    for name in collections:
+        for listener in _bump_listeners:
+            listener(name)
+
+
+async def get_versions(*collections: str, source=None) -> Dict[str, int]:
+    """
+    Koleksiyonların güncel sürümlerini tek sorguda döndürür. Veriyi ikincilden
+    okuyan endpoint'ler sürümleri de aynı `source` (read_db) üzerinden okur;
+    böylece ETag, yanıttaki veriden daha yeni bir sürümü göstermez.
+    """
+    source = db if source is None else source
+    docs = await source[VERSIONS_COLLECTION].find({"_id": {"$in": list(collections)}}).to_list(len(collections))
+    found = {doc["_id"]: doc.get("version", 0) for doc in docs}
+    return {name: found.get(name, 0) for name in collections}
@@ -123,3 +123,6 @@ KATEGORI_ALT_KATEGORI = {
         "Çelik İskele"
     ]
 }
+
+# Başlangıçta oluşturulan varsayılan proje; projesiz eski raporlar buna bağlanır
+DEFAULT_PROJE_ADI = "Çukurova Deprem Konutları Projesi"
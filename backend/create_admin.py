@@ -3,18 +3,11 @@ Script to verify and fix admin user in MongoDB
 """
 import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
-from passlib.context import CryptContext
 from datetime import datetime, timezone
 import uuid
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+# Şifre işlemleri uygulamayla aynı (ilk kullanımda yüklenen) bağlamdan yapılır
+from routers.auth import get_password_hash, verify_password
 
 async def fix_admin():
     # Connect to MongoDB
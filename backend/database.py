@@ -1,12 +1,160 @@
+"""
+MongoDB istemcisi ve bağlantı yapılandırması
+
+Havuz boyutları, zaman aşımları ve sıkıştırma ortam değişkenleriyle
+ayarlanır (MONGO_URL içindeki seçenekleri bu değerler ezer):
+
+    MONGO_MAX_POOL_SIZE                  (100)   worker başına en fazla bağlantı
+    MONGO_MIN_POOL_SIZE                  (0)     sıcak tutulan bağlantı sayısı
+    MONGO_MAX_IDLE_TIME_MS               (-)     boştaki bağlantının kapatılma süresi
+    MONGO_WAIT_QUEUE_TIMEOUT_MS          (-)     havuz doluyken bağlantı bekleme sınırı
+    MONGO_SERVER_SELECTION_TIMEOUT_MS    (5000)  veritabanı erişilemezken hata verme süresi
+    MONGO_CONNECT_TIMEOUT_MS             (10000)
+    MONGO_COMPRESSORS                    (zstd,snappy,zlib) kurulu olmayanlar atlanır
+
+Ağır endpoint'ler @with_time_limit("export") ile (veya time_limit bloğu içinde)
+çalışır; bu sırada çalışan tüm komutlar pymongo'nun istemci tarafı zaman
+aşımına (CSOT, sunucuya maxTimeMS olarak da iletilir) tabidir. Süreler
+TIME_LIMITS_MS'tedir.
+
+Okuma tercihi: işlem okumaları (kayıt, güncelleme, liste ekranları) `db`
+üzerinden primary'den yapılır. Analitik okumalar (export'lar, ZIP, dashboard)
+read_db(sınıf) ile READ_PREFERENCES'taki tercihe göre — varsayılan
+secondaryPreferred — ikincil üyelere gidebilir. İkincilin ne kadar geride
+kalabileceği MONGO_MAX_STALENESS_SECONDS (90; MongoDB'nin alt sınırı) ile
+sınırlanır, -1 sınırsızdır. Sınıf bazında ayar:
+
+    MONGO_EXPORT_READ_PREFERENCE         (secondaryPreferred)
+    MONGO_DASHBOARD_READ_PREFERENCE      (secondaryPreferred)
+
+Tek üyeli replica set'te (mongod --replSet rs0 + rs.initiate()) ikincil
+olmadığı için okumalar yine primary'ye gider; yönlendirme
+benchmarks/read_routing.py ile doğrulanabilir.
+"""
 from motor.motor_asyncio import AsyncIOMotorClient
+import functools
+import importlib.util
+import logging
 import os
 from dotenv import load_dotenv
 from pathlib import Path
 
+import pymongo
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+from mongo_monitoring import event_listeners
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+logger = logging.getLogger(__name__)
+
+# Sıkıştırıcı -> gereken Python paketi (zlib standart kütüphanede)
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": None}
+
+# Endpoint sınıfı -> bloktaki Mongo komutlarının toplam süre sınırı (ms)
+TIME_LIMITS_MS = {
+    "export": int(os.environ.get("MONGO_EXPORT_TIMEOUT_MS", "60000")),
+    "dashboard": int(os.environ.get("MONGO_DASHBOARD_TIMEOUT_MS", "10000")),
+    "ready": int(os.environ.get("MONGO_READY_TIMEOUT_MS", "2000")),
+}
+
+READ_PREFERENCE_MODES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+# Endpoint sınıfı -> okuma tercihi; listede olmayan sınıflar primary'den okur
+READ_PREFERENCES = {
+    "export": os.environ.get("MONGO_EXPORT_READ_PREFERENCE", "secondaryPreferred"),
+    "dashboard": os.environ.get("MONGO_DASHBOARD_READ_PREFERENCE", "secondaryPreferred"),
+}
+
+# MongoDB 90 saniyeden küçük maxStalenessSeconds'ı sunucu seçerken reddeder
+MIN_MAX_STALENESS_SECONDS = 90
+MAX_STALENESS_SECONDS = int(os.environ.get("MONGO_MAX_STALENESS_SECONDS", str(MIN_MAX_STALENESS_SECONDS)))
+if 0 <= MAX_STALENESS_SECONDS < MIN_MAX_STALENESS_SECONDS:
+    logger.warning(
+        f"MONGO_MAX_STALENESS_SECONDS={MAX_STALENESS_SECONDS} çok küçük, "
+        f"{MIN_MAX_STALENESS_SECONDS} kullanılıyor"
+    )
+    MAX_STALENESS_SECONDS = MIN_MAX_STALENESS_SECONDS
+
+
+def available_compressors(requested: str) -> list:
+    compressors = []
+    for name in (part.strip() for part in requested.split(",")):
+        if name not in COMPRESSOR_MODULES:
+            logger.warning(f"Bilinmeyen Mongo sıkıştırıcısı: {name}")
+            continue
+        module = COMPRESSOR_MODULES[name]
+        if module is None or importlib.util.find_spec(module) is not None:
+            compressors.append(name)
+    return compressors
+
+
+def client_options() -> dict:
+    options = {
+        "maxPoolSize": int(os.environ.get("MONGO_MAX_POOL_SIZE", "100")),
+        "minPoolSize": int(os.environ.get("MONGO_MIN_POOL_SIZE", "0")),
+        "serverSelectionTimeoutMS": int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+        "connectTimeoutMS": int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", "10000")),
+    }
+    for env_name, option in (("MONGO_MAX_IDLE_TIME_MS", "maxIdleTimeMS"),
+                             ("MONGO_WAIT_QUEUE_TIMEOUT_MS", "waitQueueTimeoutMS")):
+        if os.environ.get(env_name):
+            options[option] = int(os.environ[env_name])
+    compressors = available_compressors(os.environ.get("MONGO_COMPRESSORS", "zstd,snappy,zlib"))
+    if compressors:
+        options["compressors"] = compressors
+    return options
+
+
+def time_limit(kind: str):
+    """Bloktaki Mongo komutlarına TIME_LIMITS_MS[kind] kadar süre tanır"""
+    return pymongo.timeout(TIME_LIMITS_MS[kind] / 1000)
+
+
+def with_time_limit(kind: str):
+    """Endpoint'in tamamını time_limit(kind) içinde çalıştıran dekoratör"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with time_limit(kind):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def read_preference(kind: str):
+    mode = READ_PREFERENCES.get(kind, "primary")
+    if mode not in READ_PREFERENCE_MODES:
+        raise ValueError(f"Geçersiz okuma tercihi ({kind}): {mode}")
+    if mode == "primary":
+        return Primary()
+    return READ_PREFERENCE_MODES[mode](max_staleness=MAX_STALENESS_SECONDS)
+
+
+@functools.lru_cache(maxsize=None)
+def read_db(kind: str):
+    """Endpoint sınıfının okuma tercihiyle aynı veritabanı; yazmalar yine `db` ile yapılmalı"""
+    return client.get_database(db.name, read_preference=read_preference(kind))
+
+
+async def ping() -> None:
+    """Hazırlık kontrolü; veritabanı erişilemezse PyMongoError fırlatır"""
+    with time_limit("ready"):
+        await client.admin.command("ping")
+
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=event_listeners(), **client_options())
 db = client[os.environ['DB_NAME']]
+
+# Geçersiz okuma tercihi ilk istekte değil açılışta fark edilsin
+for _kind in READ_PREFERENCES:
+    read_preference(_kind)
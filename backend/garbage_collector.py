@@ -0,0 +1,376 @@
+"""
+Yetim veri ve medya çöp toplayıcısı
+
+Görevler:
+- disk_yetimleri     : UPLOAD_DIR'da olup medya_dosyalari kaydı olmayan dosyalar
+- eksik_dosyalar     : medya_dosyalari kaydı olup diskte dosyası olmayan satırlar
+- yetim_medya        : raporu silinmiş medya kayıtları (dosyalarıyla birlikte)
+- yetim_kayitlar     : projesi silinmiş raporlar, iskele bileşenleri, makineler, operatörler
+- eski_yuklemeler    : süresi geçmiş parçalı yükleme oturumları ve .partial dosyaları
+
+Her görev partiler hâlinde çalışır, partiler arasında bekler ve ilerlemesini
+gc_durumu koleksiyonuna yazar; yarıda kalan çalıştırma kaldığı yerden devam eder.
+Varsayılan mod dry-run'dır, sadece rapor üretir. Checkpoint'ler ortak olduğu
+için tüm worker/süreçlerde aynı anda tek çalıştırma olması "gc" kilidiyle
+sağlanır.
+
+Kullanım:
+    python garbage_collector.py                 # dry-run
+    python garbage_collector.py --apply         # gerçekten sil
+    python garbage_collector.py --tasks disk_yetimleri --batch-size 200 --pause 0.5
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from database import db
+from media_cleanup import delete_media_for_reports, schedule_unlink, unlink_worker, wait_for_unlinks
+from change_versions import bump_version
+from leases import Lease
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = Path(__file__).parent.parent / "uploads"
+PARTIAL_DIR = UPLOAD_DIR / ".partial"
+STATE_COLLECTION = "gc_durumu"
+UPLOAD_SESSIONS_COLLECTION = "yukleme_oturumlari"
+LEASE_NAME = "gc"
+
+# Yüklemesi devam eden dosyaların (henüz kaydı yazılmamış) silinmemesi için
+MIN_FILE_AGE_SECONDS = 3600
+
+# Bu süre boyunca parça gelmeyen yükleme oturumları bayat sayılır
+UPLOAD_SESSION_TTL_SECONDS = 24 * 3600
+
+# Projeye bağlı koleksiyonlar
+PROJE_BAGLI_KOLEKSIYONLAR = ["raporlar", "iskele_bilesenleri", "makineler", "operatorler"]
+
+MAX_BATCH_SIZE = 10000
+
+TASKS = ["disk_yetimleri", "eksik_dosyalar", "yetim_medya", "yetim_kayitlar", "eski_yuklemeler"]
+
+
+def _reclaimed_bytes(stats) -> int:
+    """Görev istatistiğindeki byte toplamı; yetim_kayitlar koleksiyon başına iç içe döner"""
+    if not isinstance(stats, dict):
+        return 0
+    if "bytes" in stats:
+        return stats["bytes"]
+    return sum(_reclaimed_bytes(item) for item in stats.values())
+
+
+class GarbageCollector:
+    def __init__(self, dry_run: bool = True, batch_size: int = 500, pause: float = 0.1):
+        # batch_size=0 ile Mongo partileri boş döner (hiçbir şey taranmadan "temiz" biter), disk taraması çöker
+        if not 1 <= batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f"batch_size 1 ile {MAX_BATCH_SIZE} arasında olmalı: {batch_size}")
+        if pause < 0:
+            raise ValueError("pause negatif olamaz")
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.pause = pause
+
+    # ---------- checkpoint ----------
+
+    def _key(self, task: str) -> str:
+        return f"{task}:{'dry' if self.dry_run else 'apply'}"
+
+    async def _load_checkpoint(self, task: str) -> dict:
+        state = await db[STATE_COLLECTION].find_one({"_id": self._key(task)})
+        return state or {"last": None, "stats": {}}
+
+    async def _save_checkpoint(self, task: str, last, stats: dict) -> None:
+        await db[STATE_COLLECTION].update_one(
+            {"_id": self._key(task)},
+            {"$set": {"last": last, "stats": stats, "updated_at": datetime.now(timezone.utc).isoformat()}},
+            upsert=True
+        )
+
+    async def _finish(self, task: str) -> None:
+        await db[STATE_COLLECTION].delete_one({"_id": self._key(task)})
+
+    async def _iter_batches(self, collection: str, query: dict, projection: dict, task: str, stats: dict):
+        """_id sırasına göre partiler; her partiden sonra checkpoint yazılır"""
+        state = await self._load_checkpoint(task)
+        last_id = state["last"]
+        stats.update(state.get("stats") or {})
+        while True:
+            batch_query = dict(query)
+            if last_id is not None:
+                batch_query["_id"] = {"$gt": last_id}
+            batch = await db[collection].find(batch_query, {**projection, "_id": 1}) \
+                .sort("_id", 1).limit(self.batch_size).to_list(self.batch_size)
+            if not batch:
+                break
+            yield batch
+            last_id = batch[-1]["_id"]
+            await self._save_checkpoint(task, last_id, stats)
+            await asyncio.sleep(self.pause)
+        await self._finish(task)
+
+    # ---------- görevler ----------
+
+    async def disk_yetimleri(self) -> dict:
+        task = "disk_yetimleri"
+        stats = {"taranan": 0, "yetim": 0, "silinen": 0, "bytes": 0}
+        state = await self._load_checkpoint(task)
+        stats.update(state.get("stats") or {})
+        last_name = state["last"]
+
+        def list_files() -> List[str]:
+            if not UPLOAD_DIR.exists():
+                return []
+            return sorted(entry.name for entry in os.scandir(UPLOAD_DIR) if entry.is_file())
+
+        names = await asyncio.to_thread(list_files)
+        if last_name is not None:
+            names = [name for name in names if name > last_name]
+
+        cutoff = time.time() - MIN_FILE_AGE_SECONDS
+        for start in range(0, len(names), self.batch_size):
+            batch = names[start:start + self.batch_size]
+            stems = [name.split(".")[0] for name in batch]
+            known = await db.medya_dosyalari.find(
+                {"id": {"$in": stems}}, {"_id": 0, "id": 1}
+            ).to_list(len(stems))
+            known_ids = {doc["id"] for doc in known}
+
+            def inspect(names_to_check: List[str]) -> List[tuple]:
+                orphans = []
+                for name in names_to_check:
+                    path = UPLOAD_DIR / name
+                    try:
+                        st = path.stat()
+                    except FileNotFoundError:
+                        continue
+                    if st.st_mtime < cutoff:
+                        orphans.append((str(path), st.st_size))
+                return orphans
+
+            candidates = [name for name in batch if name.split(".")[0] not in known_ids]
+            orphans = await asyncio.to_thread(inspect, candidates)
+
+            stats["taranan"] += len(batch)
+            stats["yetim"] += len(orphans)
+            stats["bytes"] += sum(size for _, size in orphans)
+            if not self.dry_run:
+                schedule_unlink(path for path, _ in orphans)
+                stats["silinen"] += len(orphans)
+
+            await self._save_checkpoint(task, batch[-1], stats)
+            await asyncio.sleep(self.pause)
+
+        await self._finish(task)
+        return stats
+
+    async def eksik_dosyalar(self) -> dict:
+        task = "eksik_dosyalar"
+        stats = {"taranan": 0, "yetim": 0, "silinen": 0}
+        async for batch in self._iter_batches(
+            "medya_dosyalari", {}, {"id": 1, "dosya_yolu": 1}, task, stats
+        ):
+            def missing(docs: List[dict]) -> List[dict]:
+                return [
+                    {"id": doc["id"], "dosya_yolu": doc.get("dosya_yolu", "")}
+                    for doc in docs if not Path(doc.get("dosya_yolu", "")).exists()
+                ]
+
+            eksikler = await asyncio.to_thread(missing, batch)
+            stats["taranan"] += len(batch)
+            stats["yetim"] += len(eksikler)
+            if eksikler and not self.dry_run:
+                # Kontrol edilen yol filtrede: arada yeniden sıkıştırılıp yolu değişen satır silinmez
+                result = await db.medya_dosyalari.delete_many({"$or": eksikler})
+                stats["silinen"] += result.deleted_count
+        return stats
+
+    async def yetim_medya(self) -> dict:
+        task = "yetim_medya"
+        stats = {"taranan": 0, "yetim": 0, "silinen": 0, "bytes": 0}
+        async for batch in self._iter_batches(
+            "medya_dosyalari", {}, {"id": 1, "rapor_id": 1, "dosya_yolu": 1, "dosya_boyutu": 1}, task, stats
+        ):
+            rapor_ids = list({doc.get("rapor_id") for doc in batch if doc.get("rapor_id")})
+            existing = await db.raporlar.find(
+                {"id": {"$in": rapor_ids}}, {"_id": 0, "id": 1}
+            ).to_list(len(rapor_ids))
+            existing_ids = {doc["id"] for doc in existing}
+            orphans = [doc for doc in batch if doc.get("rapor_id") not in existing_ids]
+
+            stats["taranan"] += len(batch)
+            stats["yetim"] += len(orphans)
+            stats["bytes"] += sum(doc.get("dosya_boyutu") or 0 for doc in orphans)
+            if orphans and not self.dry_run:
+                result = await db.medya_dosyalari.delete_many({"id": {"$in": [doc["id"] for doc in orphans]}})
+                schedule_unlink(doc.get("dosya_yolu") for doc in orphans)
+                stats["silinen"] += result.deleted_count
+        return stats
+
+    async def yetim_kayitlar(self) -> dict:
+        result: Dict[str, dict] = {}
+        for collection in PROJE_BAGLI_KOLEKSIYONLAR:
+            task = f"yetim_kayitlar.{collection}"
+            stats = {"taranan": 0, "yetim": 0, "silinen": 0, "bytes": 0}
+            deleted_any = False
+            # proje_id'si null/boş kayıtlar projesiz (ör. update ile proje_id: null) ve canlıdır, yetim değildir
+            async for batch in self._iter_batches(
+                collection, {"proje_id": {"$nin": [None, ""]}}, {"id": 1, "proje_id": 1}, task, stats
+            ):
+                proje_ids = list({doc["proje_id"] for doc in batch if doc.get("proje_id")})
+                existing = await db.projeler.find(
+                    {"id": {"$in": proje_ids}}, {"_id": 0, "id": 1}
+                ).to_list(len(proje_ids))
+                existing_ids = {doc["id"] for doc in existing}
+                orphan_ids = [
+                    doc["id"] for doc in batch
+                    if doc.get("proje_id") and doc["proje_id"] not in existing_ids and "id" in doc
+                ]
+
+                stats["taranan"] += len(batch)
+                stats["yetim"] += len(orphan_ids)
+                if orphan_ids and collection == "raporlar":
+                    # Yetim raporlarla birlikte silinecek medyanın boyutu geri kazanılan alana eklenir
+                    sizes = await db.medya_dosyalari.aggregate([
+                        {"$match": {"rapor_id": {"$in": orphan_ids}}},
+                        {"$group": {"_id": None, "bytes": {"$sum": "$dosya_boyutu"}}}
+                    ]).to_list(1)
+                    stats["bytes"] += sizes[0]["bytes"] if sizes else 0
+                if orphan_ids and not self.dry_run:
+                    if collection == "raporlar":
+                        await delete_media_for_reports(orphan_ids)
+                    deleted = await db[collection].delete_many({"id": {"$in": orphan_ids}})
+                    stats["silinen"] += deleted.deleted_count
+                    deleted_any = True
+            if deleted_any:
+                await bump_version(collection)
+            result[collection] = stats
+        return result
+
+    async def eski_yuklemeler(self) -> dict:
+        task = "eski_yuklemeler"
+        stats = {"taranan": 0, "yetim": 0, "silinen": 0, "bytes": 0}
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=UPLOAD_SESSION_TTL_SECONDS)).isoformat()
+        async for batch in self._iter_batches(
+            UPLOAD_SESSIONS_COLLECTION, {"updated_at": {"$lt": cutoff}}, {"id": 1, "offset": 1, "durum": 1}, task, stats
+        ):
+            stats["taranan"] += len(batch)
+            stats["yetim"] += len(batch)
+            # Tamamlanan oturumların dosyası medyaya taşınmıştır; yalnızca kayıt silinir
+            stats["bytes"] += sum(doc.get("offset") or 0 for doc in batch if not doc.get("durum"))
+            if not self.dry_run:
+                ids = [doc["id"] for doc in batch]
+                result = await db[UPLOAD_SESSIONS_COLLECTION].delete_many({"id": {"$in": ids}})
+                schedule_unlink(str(PARTIAL_DIR / f"{upload_id}.part") for upload_id in ids)
+                stats["silinen"] += result.deleted_count
+
+        # Oturum kaydı olmayan (ör. oturum yazılamadan çöken) .partial dosyaları
+        def list_partials() -> List[tuple]:
+            if not PARTIAL_DIR.exists():
+                return []
+            old = time.time() - UPLOAD_SESSION_TTL_SECONDS
+            return [
+                (entry.name, entry.stat().st_size) for entry in os.scandir(PARTIAL_DIR)
+                if entry.is_file() and entry.stat().st_mtime < old
+            ]
+
+        partials = await asyncio.to_thread(list_partials)
+        for start in range(0, len(partials), self.batch_size):
+            batch = partials[start:start + self.batch_size]
+            ids = [name.split(".")[0] for name, _ in batch]
+            known = await db[UPLOAD_SESSIONS_COLLECTION].find(
+                {"id": {"$in": ids}}, {"_id": 0, "id": 1}
+            ).to_list(len(ids))
+            known_ids = {doc["id"] for doc in known}
+            orphans = [(name, size) for name, size in batch if name.split(".")[0] not in known_ids]
+            stats["yetim"] += len(orphans)
+            stats["bytes"] += sum(size for _, size in orphans)
+            if not self.dry_run:
+                schedule_unlink(str(PARTIAL_DIR / name) for name, _ in orphans)
+                stats["silinen"] += len(orphans)
+            await asyncio.sleep(self.pause)
+        return stats
+
+    async def run(self, tasks: Optional[List[str]] = None) -> Optional[dict]:
+        """Görevleri çalıştırır; GC başka bir worker/süreçte çalışıyorsa None döner"""
+        for task in tasks or TASKS:
+            if task not in TASKS:
+                raise ValueError(f"Bilinmeyen görev: {task}")
+        lease = Lease(LEASE_NAME)
+        if not await lease.acquire():
+            logger.info("GC başka bir süreçte çalışıyor")
+            return None
+        try:
+            return await self._run(tasks)
+        finally:
+            await lease.release()
+
+    async def _run(self, tasks: Optional[List[str]]) -> dict:
+        started = time.monotonic()
+        report = {
+            "dry_run": self.dry_run,
+            "baslangic": datetime.now(timezone.utc).isoformat(),
+            "gorevler": {}
+        }
+        for task in tasks or TASKS:
+            logger.info(f"GC görevi başlıyor: {task} (dry_run={self.dry_run})")
+            report["gorevler"][task] = await getattr(self, task)()
+        report["sure_saniye"] = round(time.monotonic() - started, 2)
+        report["geri_kazanilan_bytes"] = sum(_reclaimed_bytes(stats) for stats in report["gorevler"].values())
+        await db[STATE_COLLECTION].update_one(
+            {"_id": "son_rapor"}, {"$set": {"rapor": report}}, upsert=True
+        )
+        return report
+
+
+def _batch_size(value: str) -> int:
+    size = int(value)
+    if not 1 <= size <= MAX_BATCH_SIZE:
+        raise argparse.ArgumentTypeError(f"1 ile {MAX_BATCH_SIZE} arasında olmalı")
+    return size
+
+
+def _non_negative(value: str) -> float:
+    number = float(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError("negatif olamaz")
+    return number
+
+
+async def running_elsewhere() -> bool:
+    """Süresi dolmamış bir GC kilidi var mı (başka worker/süreç çalıştırıyor)"""
+    holder = await Lease(LEASE_NAME).holder()
+    return bool(holder) and holder.get("expires_at", "") > datetime.now(timezone.utc).isoformat()
+
+
+async def _main():
+    parser = argparse.ArgumentParser(description="EKOS yetim veri/medya çöp toplayıcısı")
+    parser.add_argument("--apply", action="store_true", help="Yetimleri gerçekten sil (varsayılan: dry-run)")
+    parser.add_argument("--tasks", nargs="*", choices=TASKS, help="Çalıştırılacak görevler")
+    parser.add_argument("--batch-size", type=_batch_size, default=500)
+    parser.add_argument("--pause", type=_non_negative, default=0.1, help="Partiler arası bekleme (saniye)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    gc = GarbageCollector(dry_run=not args.apply, batch_size=args.batch_size, pause=args.pause)
+    worker = asyncio.create_task(unlink_worker())
+    report = await gc.run(args.tasks)
+    await wait_for_unlinks()
+    worker.cancel()
+    if report is None:
+        print("⏳ Çöp toplayıcı başka bir süreçte çalışıyor")
+        return
+
+    print(f"\n🧹 GC raporu ({'dry-run' if gc.dry_run else 'uygulandı'}):")
+    for task, stats in report["gorevler"].items():
+        print(f"  - {task}: {stats}")
+    print(f"  Geri kazanılan alan: {report['geri_kazanilan_bytes'] / (1024 * 1024):.1f} MB")
+    print(f"  Süre: {report['sure_saniye']} sn")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
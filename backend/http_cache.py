@@ -0,0 +1,232 @@
+"""
+HTTP önbellek yardımcıları (ETag / If-None-Match)
+
+Liste ve detay endpoint'leri için zayıf ETag'ler koleksiyon değişiklik
+sürümlerinden, isteğin yolu/parametrelerinden ve kullanıcının yetki
+kapsamından üretilir. Eşleşen isteklere sorgu çalıştırılmadan 304 döner.
+"""
+import hashlib
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import anyio
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+
+from change_versions import get_versions
+
+PRIVATE_REVALIDATE = "private, no-cache"
+PUBLIC_LONG = "public, max-age=86400"
+PUBLIC_REVALIDATE = "public, no-cache"
+PRIVATE_IMMUTABLE = "private, max-age=31536000, immutable"
+RANGE_CHUNK_SIZE = 64 * 1024
+
+
+def make_etag(*parts, weak: bool = True) -> str:
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest()
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def content_etag(body: bytes) -> str:
+    """İçerik özetinden güçlü ETag"""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match başlığını zayıf karşılaştırma ile kontrol eder"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == wanted:
+            return True
+    return False
+
+
+def etag_headers(etag: str, cache_control: str = PRIVATE_REVALIDATE) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+def not_modified(etag: str, cache_control: str = PRIVATE_REVALIDATE) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag, cache_control))
+
+
+def user_scope(current_user: Optional[dict]) -> Tuple:
+    """Yanıt içeriğini etkileyen kullanıcı bilgileri (rol ve firma kısıtı)"""
+    if not current_user:
+        return ()
+    return (current_user.get("role"), current_user.get("firma_adi"))
+
+
+async def conditional_get(
+    request: Request,
+    collections: Iterable[str],
+    current_user: Optional[dict] = None,
+    extra: Tuple = (),
+    source=None
+) -> Tuple[str, Optional[Response]]:
+    """
+    İstek için ETag üretir. İstemcideki sürüm güncelse hazır 304 yanıtını da döndürür:
+
+        etag, cached = await conditional_get(request, ["raporlar"], current_user)
+        if cached:
+            return cached
+
+    Okunan sürümler request.state.versions'a yazılır; aynı sürüme bağlı başka
+    anahtarlar (ör. single_flight) için tekrar sorgulanmaları gerekmez.
+    """
+    collections = tuple(collections)
+    versions = await get_versions(*collections, source=source)
+    request.state.versions = versions
+    query = tuple(sorted(request.query_params.multi_items()))
+    etag = make_etag(
+        request.url.path, query, user_scope(current_user),
+        tuple(versions[name] for name in collections), extra
+    )
+    if etag_matches(request, etag):
+        return etag, not_modified(etag)
+    return etag, None
+
+
+class PrecomputedResponse:
+    """Bir kez üretilip byte olarak saklanan yanıt gövdesi ve ETag'i"""
+
+    def __init__(
+        self,
+        body: bytes,
+        media_type: str,
+        headers: Optional[Dict[str, str]] = None,
+        cache_control: str = PUBLIC_LONG
+    ):
+        self.body = body
+        self.media_type = media_type
+        self.etag = content_etag(body)
+        self.headers = {**(headers or {}), **etag_headers(self.etag, cache_control)}
+
+    def respond(self, request: Request) -> Response:
+        if etag_matches(request, self.etag):
+            return Response(status_code=304, headers=self.headers)
+        return Response(content=self.body, media_type=self.media_type, headers=self.headers)
+
+
+def precompute_json(content: Any, cache_control: str = PUBLIC_LONG) -> PrecomputedResponse:
+    return PrecomputedResponse(orjson.dumps(content), "application/json", cache_control=cache_control)
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Tek aralıklı `bytes=` başlığını (start, end) olarak çözer (end dahil).
+    Başlık yoksa veya desteklenmiyorsa (çoklu aralık) None döner;
+    karşılanamayan aralıkta ValueError fırlatır.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec:
+        return None
+    start_s, _, end_s = spec.partition("-")
+    try:
+        if start_s == "":
+            # Son N byte
+            length = int(end_s)
+            if length <= 0:
+                raise ValueError("boş aralık")
+            return max(size - length, 0), size - 1
+        start = int(start_s)
+        end = int(end_s) if end_s else size - 1
+    except ValueError:
+        raise ValueError("geçersiz aralık")
+    if start >= size or start > end:
+        raise ValueError("karşılanamayan aralık")
+    return start, min(end, size - 1)
+
+
+def _validators_match(request: Request, etag: str, last_modified: datetime) -> bool:
+    """If-None-Match (öncelikli) veya If-Modified-Since ile istemci kopyası güncel mi"""
+    if request.headers.get("if-none-match"):
+        return etag_matches(request, etag)
+    since = request.headers.get("if-modified-since")
+    if since:
+        try:
+            return int(last_modified.timestamp()) <= int(parsedate_to_datetime(since).timestamp())
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _if_range_allows(request: Request, etag: str, last_modified_http: str) -> bool:
+    """If-Range başlığı varsa kaynak değişmemişse aralık gönderilebilir (güçlü karşılaştırma)"""
+    if_range = request.headers.get("if-range")
+    if not if_range:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == etag
+    return if_range == last_modified_http
+
+
+def file_response(
+    request: Request,
+    path: str,
+    size: int,
+    etag: str,
+    last_modified: datetime,
+    media_type: str,
+    headers: Optional[Dict[str, str]] = None,
+    cache_control: str = PRIVATE_IMMUTABLE
+) -> Response:
+    """
+    Güçlü doğrulayıcılı dosya yanıtı: 304, tam gövde (200) veya tek aralık (206).
+    """
+    last_modified_http = format_datetime(last_modified, usegmt=True)
+    base_headers = {
+        **(headers or {}),
+        "ETag": etag,
+        "Last-Modified": last_modified_http,
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+    }
+
+    if _validators_match(request, etag, last_modified):
+        return Response(status_code=304, headers=base_headers)
+
+    try:
+        byte_range = parse_range(request.headers.get("range"), size)
+    except ValueError:
+        return Response(status_code=416, headers={**base_headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None or not _if_range_allows(request, etag, last_modified_http):
+        return FileResponse(path, media_type=media_type, headers=base_headers)
+
+    start, end = byte_range
+    length = end - start + 1
+
+    async def stream():
+        async with await anyio.open_file(path, "rb") as f:
+            await f.seek(start)
+            remaining = length
+            while remaining > 0:
+                chunk = await f.read(min(RANGE_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    return StreamingResponse(
+        stream(),
+        status_code=206,
+        media_type=media_type,
+        headers={
+            **base_headers,
+            "Content-Range": f"bytes {start}-{end}/{size}",
+            "Content-Length": str(length),
+        }
+    )
@@ -0,0 +1,117 @@
+"""
+HTTP ve çalışma zamanı metrikleri
+
+MetricsMiddleware saf ASGI olarak yazılmıştır (BaseHTTPMiddleware'in her istekte
+açtığı ek task ve stream kopyası yoktur). Her istek için route şablonu,
+durum kodu, süre ve gönderilen gövde boyutu kaydedilir. Ayrıca:
+
+- event loop gecikmesi (monitor_event_loop_lag)
+- bloklayan işler için executor kuyruk derinlikleri (to_thread, Motor, görsel havuzu)
+
+GET /metrics bu kayıt defterini Prometheus metin formatında döndürür.
+Ek maliyet için: python -m benchmarks.bench_metrics
+"""
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+
+from metrics import registry, SIZE_BUCKETS
+from request_context import route_of
+
+LAG_INTERVAL_SECONDS = 0.5
+
+http_requests = registry.counter(
+    "ekos_http_requests_total", "Tamamlanan HTTP istekleri", ["method", "route", "status"]
+)
+http_duration = registry.histogram(
+    "ekos_http_request_duration_seconds", "HTTP istek süresi", ["method", "route"]
+)
+http_response_size = registry.histogram(
+    "ekos_http_response_size_bytes", "Gönderilen yanıt gövdesi boyutu", ["method", "route"],
+    buckets=SIZE_BUCKETS
+)
+http_in_flight = registry.gauge(
+    "ekos_http_requests_in_flight", "İşlenmekte olan HTTP istekleri"
+)
+event_loop_lag = registry.gauge(
+    "ekos_event_loop_lag_seconds", "Son ölçülen event loop gecikmesi"
+)
+event_loop_lag_histogram = registry.histogram(
+    "ekos_event_loop_lag_distribution_seconds", "Event loop gecikmesi dağılımı"
+)
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _executor_queue_depths() -> Dict[Tuple[str, ...], float]:
+    depths: Dict[Tuple[str, ...], float] = {}
+    default = getattr(_loop, "_default_executor", None) if _loop else None
+    if default is not None:
+        depths[("to_thread",)] = default._work_queue.qsize()
+    try:
+        from motor.frameworks.asyncio import _EXECUTOR as motor_executor
+        depths[("motor",)] = motor_executor._work_queue.qsize()
+    except (ImportError, AttributeError):
+        pass
+    from image_processing import _executor as image_executor
+    if image_executor is not None:
+        depths[("image",)] = len(getattr(image_executor, "_pending_work_items", {}))
+    return depths
+
+
+executor_queue_depth = registry.gauge(
+    "ekos_executor_queue_depth", "Executor'da sırada bekleyen bloklayan işler", ["executor"],
+    callback=_executor_queue_depths
+)
+
+
+class MetricsMiddleware:
+    """İstek sayısı, süre, yanıt boyutu ve eşzamanlı istek metriklerini toplar"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            http_in_flight.dec()
+            method = scope["method"]
+            route = route_of(scope)
+            http_requests.inc(method=method, route=route, status=status)
+            http_duration.observe(duration, method=method, route=route)
+            http_response_size.observe(size, method=method, route=route)
+
+
+async def monitor_event_loop_lag(interval: float = LAG_INTERVAL_SECONDS) -> None:
+    """Uykudan ne kadar geç uyanıldığını ölçerek event loop gecikmesini kaydeder"""
+    global _loop
+    _loop = asyncio.get_running_loop()
+    while True:
+        start = _loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, _loop.time() - start - interval)
+        event_loop_lag.set(lag)
+        event_loop_lag_histogram.observe(lag)
+
+
+def render_metrics() -> str:
+    return registry.render()
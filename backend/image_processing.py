@@ -0,0 +1,257 @@
+"""
+Yüklenen fotoğrafların sunucu tarafında yeniden sıkıştırılması
+
+Telefon fotoğrafları genelde 5-10 MB JPEG olarak gelir. IMAGE_RECOMPRESS=1
+olduğunda yükleme isteği dosyayı olduğu gibi kaydedip hemen döner; ardından
+arka planda, ayrı bir süreç havuzunda:
+
+- EXIF yönü uygulanır ve tüm EXIF/metadata atılır
+- en uzun kenar IMAGE_MAX_DIMENSION pikselle sınırlanır
+- IMAGE_FORMAT (jpeg/webp) ve IMAGE_QUALITY ile yeniden kodlanır
+
+Sonuç orijinalden küçükse medya kaydı yeni dosyaya çevrilir. Küçülmediyse
+konum (GPS) ve cihaz bilgisi sunulmasın diye orijinalin metadata'sız bir
+kopyası yazılır: JPEG'de APP1 (EXIF/XMP), IPTC, yorum ve MPF segmentleri, PNG'de
+eXIf/metin/zaman chunk'ları yeniden kodlamadan atılır (renk profili korunur).
+EXIF yönü 1 değilse kayıpsız atma görüntüyü döndürmüş olur; bu durumda yönü
+uygulanmış yeniden kodlanmış dosya, büyük olsa da kullanılır. Orijinal dosya
+sadece IMAGE_KEEP_ORIGINAL=1 ise saklanır (kayıtta `orijinal_yolu`).
+
+Değişim aynı /dosyalar/{id}/indir adresinin arkasında olur; kayda
+`orijinal_boyutu` ve `updated_at` yazılır. may_be_replaced() true olan
+dosyalar tarayıcıda immutable olarak önbelleğe alınmaz.
+
+Ayarlar (ortam değişkenleri):
+    IMAGE_RECOMPRESS       0/1   (varsayılan 0)
+    IMAGE_MAX_DIMENSION    2560
+    IMAGE_FORMAT           jpeg | webp
+    IMAGE_QUALITY          82
+    IMAGE_KEEP_ORIGINAL    0/1   (varsayılan 0)
+    IMAGE_WORKERS          2
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Set
+
+from database import db
+from media_cleanup import schedule_unlink
+
+logger = logging.getLogger(__name__)
+
+RECOMPRESS_ENABLED = os.environ.get("IMAGE_RECOMPRESS", "0") == "1"
+MAX_DIMENSION = int(os.environ.get("IMAGE_MAX_DIMENSION", "2560"))
+OUTPUT_FORMAT = os.environ.get("IMAGE_FORMAT", "jpeg").lower()
+QUALITY = int(os.environ.get("IMAGE_QUALITY", "82"))
+KEEP_ORIGINAL = os.environ.get("IMAGE_KEEP_ORIGINAL", "0") == "1"
+WORKERS = int(os.environ.get("IMAGE_WORKERS", "2"))
+
+RECOMPRESSIBLE_TYPES = {"image/jpeg", "image/jpg", "image/png"}
+
+_FORMATS = {
+    "jpeg": ("JPEG", "jpg", "image/jpeg"),
+    "webp": ("WEBP", "webp", "image/webp"),
+}
+
+_executor: Optional[ProcessPoolExecutor] = None
+_pending: Set[asyncio.Task] = set()
+
+
+# Atılacak JPEG segmentleri: APP1 (EXIF/XMP), APP3-APP13 (IPTC vb.), APP15, COM.
+# APP0 (JFIF), APP2'deki ICC profili ve APP14 (Adobe renk dönüşümü) korunur.
+_JPEG_DROP_MARKERS = {0xE1, 0xFE, 0xEF} | set(range(0xE3, 0xEE))
+# Korunan PNG chunk'ları; eXIf, tEXt/zTXt/iTXt, tIME ve bilinmeyenler atılır
+_PNG_KEEP_CHUNKS = {
+    b"IHDR", b"PLTE", b"IDAT", b"IEND", b"tRNS", b"gAMA", b"cHRM", b"sRGB", b"iCCP", b"sBIT", b"bKGD", b"pHYs"
+}
+
+
+def _strip_jpeg(data: bytes) -> bytes:
+    if data[:2] != b"\xff\xd8":
+        raise ValueError("JPEG değil")
+    out = bytearray(data[:2])
+    pos = 2
+    while pos < len(data):
+        if data[pos] != 0xFF:
+            raise ValueError("Bozuk JPEG segmenti")
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1
+            continue
+        if marker == 0xD9:
+            # EOI sonrası ekler (MPF ikincil görselleri, üretici blokları) atılır
+            out += b"\xff\xd9"
+            break
+        length = int.from_bytes(data[pos + 2:pos + 4], "big")
+        segment = data[pos:pos + 2 + length]
+        keep = marker not in _JPEG_DROP_MARKERS
+        if marker == 0xE2:
+            keep = segment[4:16] == b"ICC_PROFILE\x00"
+        if keep:
+            out += segment
+        pos += 2 + length
+        if marker == 0xDA:
+            # Sıkıştırılmış veri: sonraki gerçek işarete kadar (FF00 ve RST hariç) kopyalanır
+            start = pos
+            while pos < len(data) - 1:
+                if data[pos] == 0xFF and data[pos + 1] != 0x00 and not 0xD0 <= data[pos + 1] <= 0xD7:
+                    break
+                pos += 1
+            out += data[start:pos]
+    return bytes(out)
+
+
+def _strip_png(data: bytes) -> bytes:
+    if data[:8] != b"\x89PNG\r\n\x1a\n":
+        raise ValueError("PNG değil")
+    out = bytearray(data[:8])
+    pos = 8
+    while pos < len(data):
+        length = int.from_bytes(data[pos:pos + 4], "big")
+        chunk_type = data[pos + 4:pos + 8]
+        end = pos + 12 + length
+        if chunk_type in _PNG_KEEP_CHUNKS:
+            out += data[pos:end]
+        pos = end
+        if chunk_type == b"IEND":
+            break
+    return bytes(out)
+
+
+def _file_result(path: str) -> tuple:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return path, os.path.getsize(path), digest.hexdigest()
+
+
+def _recompress(src: str, dst: str, stripped: str, fmt: str, quality: int, max_dimension: int) -> Optional[tuple]:
+    """
+    Süreç havuzunda çalışır; (yol, boyut, sha256) döner. Yol yeniden kodlanmış
+    `dst` ya da metadata'sı atılmış `stripped` kopyadır. Küçülmeyen ve zaten
+    metadata'sı olmayan dosyada None döner.
+    """
+    from PIL import Image, ImageOps
+
+    pil_format = _FORMATS[fmt][0]
+    with Image.open(src) as image:
+        source_format = image.format
+        orientation = image.getexif().get(0x0112, 1)
+        image = ImageOps.exif_transpose(image)
+        if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+            if image.mode in ("RGBA", "LA", "P"):
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            else:
+                image = image.convert("RGB")
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+        # exif/icc parametreleri verilmediği için metadata yazılmaz
+        save_args = {"quality": quality, "optimize": True}
+        if pil_format == "JPEG":
+            save_args["progressive"] = True
+        else:
+            save_args["method"] = 4
+        image.save(dst, pil_format, **save_args)
+
+    if os.path.getsize(dst) < os.path.getsize(src) or orientation not in (None, 1):
+        # Yön uygulanmalıysa kayıpsız atma görüntüyü döndürür; yeniden kodlanan dosya kullanılır
+        return _file_result(dst)
+    os.unlink(dst)
+
+    with open(src, "rb") as f:
+        data = f.read()
+    clean = _strip_jpeg(data) if source_format == "JPEG" else _strip_png(data)
+    if len(clean) == len(data):
+        return None
+    with open(stripped, "wb") as f:
+        f.write(clean)
+    return _file_result(stripped)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=WORKERS)
+    return _executor
+
+
+def should_recompress(dosya_tipi: str) -> bool:
+    return RECOMPRESS_ENABLED and dosya_tipi in RECOMPRESSIBLE_TYPES
+
+
+def may_be_replaced(medya: dict) -> bool:
+    """Dosya içeriği yeniden sıkıştırma ile henüz değişebilir mi (değiştiyse orijinal_boyutu yazılmıştır)"""
+    return should_recompress(medya.get("dosya_tipi", "")) and "orijinal_boyutu" not in medya
+
+
+async def _process(medya: dict) -> None:
+    pil_format, ext, media_type = _FORMATS[OUTPUT_FORMAT]
+    src = Path(medya["dosya_yolu"])
+    dst = src.with_name(f"{medya['id']}.min.{ext}")
+    stripped = src.with_name(f"{medya['id']}.temiz{src.suffix}")
+
+    loop = asyncio.get_running_loop()
+    try:
+        result = await loop.run_in_executor(
+            _get_executor(), _recompress, str(src), str(dst), str(stripped), OUTPUT_FORMAT, QUALITY, MAX_DIMENSION
+        )
+    except Exception as e:
+        logger.warning(f"Görsel yeniden sıkıştırılamadı ({medya['id']}): {e}")
+        schedule_unlink([str(dst), str(stripped)])
+        return
+    if result is None:
+        # Küçülmedi ve atılacak metadata yok; dosya artık değişmeyecek (bkz. may_be_replaced)
+        await db.medya_dosyalari.update_one(
+            {"id": medya["id"], "dosya_yolu": str(src)}, {"$set": {"orijinal_boyutu": medya["dosya_boyutu"]}}
+        )
+        return
+
+    path, size, icerik_hash = result
+    update = {
+        "dosya_yolu": path,
+        "dosya_boyutu": size,
+        "icerik_hash": icerik_hash,
+        "orijinal_boyutu": medya["dosya_boyutu"],
+        "updated_at": datetime.now(timezone.utc).isoformat()
+    }
+    if path == str(dst):
+        stem = medya["dosya_adi"].rsplit(".", 1)[0]
+        update["dosya_adi"] = f"{stem}.{ext}"
+        update["dosya_tipi"] = media_type
+    if KEEP_ORIGINAL:
+        update["orijinal_yolu"] = str(src)
+
+    result = await db.medya_dosyalari.update_one(
+        {"id": medya["id"], "dosya_yolu": str(src)}, {"$set": update}
+    )
+    if result.matched_count == 0:
+        # Kayıt bu arada silindi; yeni dosya yetim kalmasın
+        schedule_unlink([path])
+    elif not KEEP_ORIGINAL:
+        schedule_unlink([str(src)])
+
+
+def schedule_recompression(medya: dict) -> None:
+    """Kaydı yazılmış bir görseli arka planda yeniden sıkıştırmak üzere sıraya al"""
+    if not should_recompress(medya.get("dosya_tipi", "")):
+        return
+    task = asyncio.create_task(_process(medya))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+
+async def shutdown_image_pool() -> None:
+    """Bekleyen işleri bitirip süreç havuzunu kapat"""
+    global _executor
+    if _pending:
+        await asyncio.gather(*_pending, return_exceptions=True)
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
@@ -0,0 +1,88 @@
+"""
+Mongo tabanlı kiralık kilit (lease)
+
+Birden fazla worker/süreç arasında bir işin tek seferde tek sahip tarafından
+yürütülmesini sağlar. Kilit, kilitler koleksiyonunda _id'si iş adı olan bir
+dökümandır; süresi (expires_at) dolmuş ya da aynı sahibe ait kilit tek bir
+koşullu upsert ile alınır. Başka bir sahibin geçerli kilidi varsa upsert
+benzersiz _id çakışmasına düşer ve alma başarısız olur.
+
+Kilit tutulduğu sürece arka planda yenilenir; sahibi çökerse süre dolunca
+başka bir worker devralabilir.
+
+    lease = Lease("baslangic")
+    if await lease.acquire():
+        try:
+            ...
+        finally:
+            await lease.release()
+"""
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+LEASES_COLLECTION = "kilitler"
+DEFAULT_LEASE_SECONDS = 60
+
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class Lease:
+    def __init__(self, name: str, ttl_seconds: float = DEFAULT_LEASE_SECONDS, owner: Optional[str] = None):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.owner = owner or default_owner()
+        self._renewer: Optional[asyncio.Task] = None
+
+    async def _claim(self) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await db[LEASES_COLLECTION].update_one(
+                {"_id": self.name, "$or": [{"expires_at": {"$lt": now.isoformat()}}, {"owner": self.owner}]},
+                {"$set": {
+                    "owner": self.owner,
+                    "expires_at": (now + timedelta(seconds=self.ttl_seconds)).isoformat(),
+                }},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def _renew_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.ttl_seconds / 3)
+            try:
+                if not await self._claim():
+                    logger.warning(f"'{self.name}' kilidi başka bir sahibe geçti")
+                    return
+            except Exception as e:
+                logger.warning(f"'{self.name}' kilidi yenilenemedi: {e}")
+
+    async def acquire(self) -> bool:
+        """Kilidi almayı bir kez dener; alınırsa süresi arka planda uzatılır"""
+        if not await self._claim():
+            return False
+        self._renewer = asyncio.create_task(self._renew_loop())
+        return True
+
+    async def release(self) -> None:
+        if self._renewer:
+            self._renewer.cancel()
+            self._renewer = None
+        await db[LEASES_COLLECTION].delete_one({"_id": self.name, "owner": self.owner})
+
+    async def holder(self) -> Optional[dict]:
+        return await db[LEASES_COLLECTION].find_one({"_id": self.name})
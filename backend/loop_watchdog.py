@@ -0,0 +1,147 @@
+"""
+Event loop bloklanma dedektörü
+
+Async handler'lar içinde doğrudan çağrılan senkron işler (bcrypt,
+load_workbook, wb.save, zipfile, shutil.copy2, dosya yazma...) event loop'u
+durdurur ve o sırada gelen tüm istekleri bekletir.
+
+Loop içinde çalışan bir kalp atışı görevi her HEARTBEAT_INTERVAL'da zaman
+damgası bırakır. Ayrı bir watchdog thread'i bu damga eşikten (LOOP_BLOCK_THRESHOLD_MS)
+eski kaldığında loop thread'inin o anki stack'ini alır, stack'teki
+RequestContextMiddleware çerçevesinden route'u bulur ve loglar. Bloklanma
+bittiğinde toplam süre route etiketiyle metriklere yazılır; son kayıtlar
+/api/bakim/loop-bloklari altından görülebilir.
+
+LOOP_BLOCK_DETECTOR:
+    off    : kapalı (varsayılan)
+    on     : watchdog thread'i (üretimde açık tutulabilir)
+    debug  : watchdog + asyncio debug modu (slow_callback_duration = eşik)
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+
+from metrics import registry
+from request_context import BACKGROUND, RequestContextMiddleware, route_of
+
+logger = logging.getLogger("loop.watchdog")
+
+MODE = os.environ.get("LOOP_BLOCK_DETECTOR", "off").lower()
+THRESHOLD_SECONDS = float(os.environ.get("LOOP_BLOCK_THRESHOLD_MS", "100")) / 1000
+HEARTBEAT_INTERVAL = min(0.05, THRESHOLD_SECONDS / 4)
+STACK_LIMIT = 30
+BLOCK_LOG_SIZE = 100
+
+loop_blocks = registry.counter(
+    "ekos_event_loop_blocks_total", "Eşikten uzun event loop bloklanmaları", ["route"]
+)
+loop_block_duration = registry.histogram(
+    "ekos_event_loop_block_duration_seconds", "Event loop bloklanma süresi", ["route"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+block_log: Deque[Dict[str, Any]] = deque(maxlen=BLOCK_LOG_SIZE)
+
+_MIDDLEWARE_CODE = RequestContextMiddleware.__call__.__code__
+
+
+def _route_from_frame(frame) -> str:
+    """Bloklayan çerçeveden dışa doğru yürüyüp isteğin scope'unu bulur"""
+    while frame is not None:
+        if frame.f_code is _MIDDLEWARE_CODE:
+            return route_of(frame.f_locals.get("scope"))
+        frame = frame.f_back
+    return BACKGROUND
+
+
+class LoopBlockDetector:
+    def __init__(self, threshold: float = THRESHOLD_SECONDS, interval: float = HEARTBEAT_INTERVAL):
+        self.threshold = threshold
+        self.interval = interval
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Raporlanmış ama henüz bitmemiş bloklanma
+        self._current: Optional[Dict[str, Any]] = None
+
+    async def run(self) -> None:
+        """Loop içinde kalp atışı; watchdog thread'ini de başlatır"""
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        try:
+            while True:
+                self._last_beat = time.monotonic()
+                await asyncio.sleep(self.interval)
+        finally:
+            self._stop.set()
+
+    def _watch(self) -> None:
+        check_every = max(self.threshold / 2, 0.01)
+        while not self._stop.wait(check_every):
+            beat = self._last_beat
+            blocked_for = time.monotonic() - beat - self.interval
+            if self._current is not None:
+                if beat != self._current["beat"]:
+                    self._finish(beat)
+                continue
+            if blocked_for >= self.threshold:
+                self._capture(beat, blocked_for)
+
+    def _capture(self, beat: float, blocked_for: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        stack = traceback.format_list(traceback.extract_stack(frame)[-STACK_LIMIT:])
+        route = _route_from_frame(frame)
+        self._current = {
+            "beat": beat,
+            "entry": {
+                "zaman": datetime.now(timezone.utc).isoformat(),
+                "route": route,
+                "sure_ms": None,
+                "stack": "".join(stack)
+            }
+        }
+        logger.warning(
+            f"Event loop {blocked_for * 1000:.0f} ms'dir bloklu (route={route}):\n{''.join(stack)}"
+        )
+
+    def _finish(self, resumed_beat: float) -> None:
+        entry = self._current["entry"]
+        duration = max(resumed_beat - self._current["beat"] - self.interval, 0.0)
+        entry["sure_ms"] = round(duration * 1000, 1)
+        loop_blocks.inc(route=entry["route"])
+        loop_block_duration.observe(duration, route=entry["route"])
+        block_log.append(entry)
+        logger.warning(f"Event loop bloklanması bitti: {entry['sure_ms']} ms (route={entry['route']})")
+        self._current = None
+
+
+detector = LoopBlockDetector()
+
+
+def is_enabled() -> bool:
+    return MODE in ("on", "debug")
+
+
+async def run_loop_watchdog() -> None:
+    if MODE == "debug":
+        loop = asyncio.get_running_loop()
+        loop.set_debug(True)
+        loop.slow_callback_duration = THRESHOLD_SECONDS
+    await detector.run()
+
+
+def recent_blocks(limit: int = 50) -> List[Dict[str, Any]]:
+    return list(block_log)[-limit:][::-1]
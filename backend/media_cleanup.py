@@ -0,0 +1,84 @@
+"""
+Rapor silme işlemlerinde medya temizliği
+
+Medya kayıtları tek bir $in sorgusu ile bulunup tek delete_many ile silinir.
+Diskteki dosyaların silinmesi arka plandaki bir worker'a bırakılır; böylece
+API çağrısı ekli dosya sayısından bağımsız olarak hemen döner. Silinemeyen
+dosyalar birkaç kez yeniden denenir, yine de kalanları çöp toplayıcı bulur.
+"""
+import asyncio
+import logging
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+RETRY_DELAY_SECONDS = 2.0
+
+_queue: Optional["asyncio.Queue[tuple[str, int]]"] = None
+
+
+def _get_queue() -> "asyncio.Queue[tuple[str, int]]":
+    global _queue
+    if _queue is None:
+        _queue = asyncio.Queue()
+    return _queue
+
+
+def schedule_unlink(paths: Iterable[str]) -> None:
+    """Dosyaları arka planda silinmek üzere kuyruğa ekler"""
+    queue = _get_queue()
+    for path in paths:
+        if path:
+            queue.put_nowait((path, 0))
+
+
+async def wait_for_unlinks() -> None:
+    """Kuyruktaki tüm silme işlemleri, bekleyen yeniden denemeler dahil, bitene kadar bekler (CLI betikleri için)"""
+    await _get_queue().join()
+
+
+def _unlink(path: str) -> None:
+    Path(path).unlink(missing_ok=True)
+
+
+def _requeue(queue: "asyncio.Queue[tuple[str, int]]", item: tuple) -> None:
+    # Önce yeniden eklenir, sonra eski öğe bitirilir; join() arada dönmez
+    queue.put_nowait(item)
+    queue.task_done()
+
+
+async def unlink_worker() -> None:
+    """Kuyruktaki dosyaları event loop'u bloklamadan siler"""
+    queue = _get_queue()
+    loop = asyncio.get_running_loop()
+    while True:
+        path, attempt = await queue.get()
+        try:
+            await asyncio.to_thread(_unlink, path)
+        except OSError as e:
+            if attempt + 1 < MAX_ATTEMPTS:
+                # Öğe yeniden kuyruğa girene kadar bitmiş sayılmaz; wait_for_unlinks() denemeleri de bekler
+                delay = RETRY_DELAY_SECONDS * (2 ** attempt)
+                loop.call_later(delay, _requeue, queue, (path, attempt + 1))
+                continue
+            logger.warning(f"Dosya silinemedi ({MAX_ATTEMPTS} deneme): {path} - {e}")
+        queue.task_done()
+
+
+async def delete_media_for_reports(rapor_ids: List[str]) -> int:
+    """Raporlara ait medya kayıtlarını toplu siler, dosyaları kuyruğa atar"""
+    if not rapor_ids:
+        return 0
+    query = {"rapor_id": {"$in": rapor_ids}}
+    dosyalar = await db.medya_dosyalari.find(
+        query, {"_id": 0, "dosya_yolu": 1, "orijinal_yolu": 1}
+    ).to_list(None)
+    result = await db.medya_dosyalari.delete_many(query)
+    schedule_unlink(
+        path for dosya in dosyalar for path in (dosya.get("dosya_yolu"), dosya.get("orijinal_yolu"))
+    )
+    return result.deleted_count
@@ -0,0 +1,42 @@
+"""
+Veri migrasyonları
+
+Kullanım:
+    python -m migrations --status
+    python -m migrations                    # dry-run
+    python -m migrations --apply [--only 0002_raporlar_varsayilan_proje]
+
+MIGRATIONS_AUTO=1 (varsayılan) iken bekleyen migrasyonlar uygulama açılışında
+arka planda, canlı trafikle birlikte uygulanır. `auto = False` olan veri
+düzeltmeleri (ör. 0001) hiçbir zaman otomatik çalışmaz; --only ile istenir.
+"""
+import logging
+import os
+
+from migrations.base import Migration, MigrationRunner, APPLIED_COLLECTION, STATE_COLLECTION
+from migrations.m0001_proje_firma_adi import ProjeFirmaAdi
+from migrations.m0002_raporlar_varsayilan_proje import RaporlarVarsayilanProje
+
+# Uygulama sırası; yayınlanmış bir migrasyonun id'si değiştirilmemeli
+MIGRATIONS = [
+    ProjeFirmaAdi(),
+    RaporlarVarsayilanProje(),
+]
+
+MIGRATIONS_AUTO = os.environ.get("MIGRATIONS_AUTO", "1") == "1"
+
+logger = logging.getLogger("migrations")
+
+
+async def run_pending_migrations() -> None:
+    """Bekleyen migrasyonları uygular; kilit başka worker'daysa o worker yapar"""
+    try:
+        await MigrationRunner(MIGRATIONS, dry_run=False).run()
+    except Exception as e:
+        logger.exception(f"Migrasyon çalıştırması başarısız: {e}")
+
+
+__all__ = [
+    "Migration", "MigrationRunner", "MIGRATIONS", "MIGRATIONS_AUTO", "APPLIED_COLLECTION",
+    "STATE_COLLECTION", "run_pending_migrations"
+]
@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+import logging
+
+from migrations import MIGRATIONS, MigrationRunner
+from migrations.base import MAX_BATCH_SIZE
+
+
+def _batch_size(value: str) -> int:
+    size = int(value)
+    if not 1 <= size <= MAX_BATCH_SIZE:
+        raise argparse.ArgumentTypeError(f"1 ile {MAX_BATCH_SIZE} arasında olmalı")
+    return size
+
+
+def _non_negative(value: str) -> float:
+    number = float(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError("negatif olamaz")
+    return number
+
+
+def _print_progress(migration_id: str, stats: dict) -> None:
+    toplam = stats.get("toplam") or 0
+    yuzde = stats["taranan"] / toplam * 100 if toplam else 100.0
+    print(f"  {migration_id}: {stats['taranan']}/{toplam} (%{yuzde:.0f}), değişen {stats['degisen']}", flush=True)
+
+
+async def _main():
+    parser = argparse.ArgumentParser(prog="python -m migrations", description="EKOS veri migrasyonları")
+    parser.add_argument("--apply", action="store_true", help="Migrasyonları uygula (varsayılan: dry-run)")
+    parser.add_argument("--status", action="store_true", help="Sadece migrasyon durumlarını listele")
+    parser.add_argument("--only", nargs="*", choices=[m.id for m in MIGRATIONS])
+    parser.add_argument("--batch-size", type=_batch_size, default=500)
+    parser.add_argument("--pause", type=_non_negative, default=0.1, help="Partiler arası sabit bekleme (saniye)")
+    parser.add_argument("--throttle", type=_non_negative, default=1.0,
+                        help="Parti süresinin bu katı kadar ek bekleme (0: kapalı)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    runner = MigrationRunner(
+        MIGRATIONS, dry_run=not args.apply, batch_size=args.batch_size,
+        pause=args.pause, throttle=args.throttle, progress=_print_progress
+    )
+
+    if args.status:
+        for item in await runner.status():
+            print(f"  [{item['durum']:<9}] {item['id']} - {item['aciklama']}")
+        return
+
+    report = await runner.run(args.only)
+    if report is None:
+        print("⏳ Migrasyonlar başka bir süreçte çalışıyor")
+        return
+    if not report:
+        print("✅ Bekleyen migrasyon yok")
+        return
+    print(f"\n📦 Migrasyon raporu ({'dry-run' if runner.dry_run else 'uygulandı'}):")
+    for migration_id, stats in report.items():
+        print(f"  - {migration_id}: {stats}")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,212 @@
+"""
+Sürümlü, partili veri migrasyonu altyapısı
+
+Her migrasyon bir koleksiyonda `query` ile eşleşen (henüz taşınmamış)
+dökümanları _id sırasıyla batch_size'lık partiler hâlinde işler:
+
+- Her parti tek bulk_write ile yazılır; filtre _id'ye ek olarak `query`'yi de
+  içerir, arada canlı trafikle değişmiş döküman tekrar ezilmez.
+- Partiler arasında `pause` kadar, ayrıca partinin süresi × `throttle` kadar
+  beklenir (throttle=1 ≈ %50 görev döngüsü); canlı trafik kilitlenmez.
+- Son işlenen _id ve sayaçlar migrasyon_durumu koleksiyonuna yazılır;
+  yarıda kalan çalıştırma kaldığı yerden devam eder.
+- Tamamlanan migrasyonlar migrasyonlar koleksiyonuna kaydedilir ve bir daha
+  çalıştırılmaz. Dry-run veriye dokunmaz (checkpoint'i ayrı tutulur),
+  yalnızca kaç dökümanın değişeceğini raporlar.
+- Aynı anda tek çalıştırıcı olması "migrasyonlar" kilidiyle sağlanır.
+
+Yeni migrasyon: migrations/ altında mNNNN_ad.py dosyasına Migration alt
+sınıfı yazıp migrations/__init__.py'daki MIGRATIONS listesine eklenir.
+Veriyi tahmine dayalı değerlerle dolduran düzeltmeler `auto = False`
+tanımlar; bunlar açılışta veya --only verilmeden çalışmaz, yalnızca adıyla
+istendiğinde uygulanır.
+"""
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from database import db
+from change_versions import bump_version
+from leases import Lease
+
+logger = logging.getLogger("migrations")
+
+APPLIED_COLLECTION = "migrasyonlar"
+STATE_COLLECTION = "migrasyon_durumu"
+LEASE_NAME = "migrasyonlar"
+MAX_BATCH_SIZE = 10000
+
+
+class Migration(ABC):
+    """Alt sınıflar id, aciklama, collection, query ve update_for'u tanımlar"""
+
+    id: str = ""
+    aciklama: str = ""
+    collection: str = ""
+    # Taşınması gereken dökümanlar; taşınanlar artık eşleşmemeli (idempotent)
+    query: dict = {}
+    projection: Optional[dict] = None
+    # Uygulandıktan sonra sürümü artırılacak koleksiyonlar (referans önbellekleri için)
+    bump_collections: tuple = ()
+    # False ise yalnızca --only ile adı verildiğinde çalışır (otomatik uygulanmaz)
+    auto: bool = True
+
+    async def prepare(self) -> None:
+        """Çalıştırmadan önce bir kez çağrılır (ör. referans id'lerini bulmak için)"""
+
+    @abstractmethod
+    def update_for(self, doc: dict) -> Optional[dict]:
+        """Döküman için güncelleme ifadesi ($set, ...); None ise dokunulmaz"""
+
+
+class MigrationRunner:
+    def __init__(
+        self,
+        migrations: List[Migration],
+        dry_run: bool = True,
+        batch_size: int = 500,
+        pause: float = 0.1,
+        throttle: float = 1.0,
+        progress: Optional[Callable[[str, dict], None]] = None,
+    ):
+        # batch_size=0 ile limit(0) boş döner; migrasyon hiçbir şeye dokunmadan "uygulandı" sayılırdı
+        if not 1 <= batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f"batch_size 1 ile {MAX_BATCH_SIZE} arasında olmalı: {batch_size}")
+        if pause < 0 or throttle < 0:
+            raise ValueError("pause ve throttle negatif olamaz")
+        self.migrations = migrations
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.pause = pause
+        self.throttle = throttle
+        self.progress = progress
+
+    # ---------- durum ----------
+
+    def _key(self, migration: Migration) -> str:
+        return f"{migration.id}:{'dry' if self.dry_run else 'apply'}"
+
+    async def applied(self) -> Dict[str, dict]:
+        docs = await db[APPLIED_COLLECTION].find({}).to_list(None)
+        return {doc["_id"]: doc for doc in docs}
+
+    async def pending(self, only: Optional[List[str]] = None) -> List[Migration]:
+        applied = await self.applied()
+        return [
+            m for m in self.migrations
+            if m.id not in applied and (m.id in only if only else m.auto)
+        ]
+
+    async def status(self) -> List[dict]:
+        applied = await self.applied()
+        states = {doc["_id"]: doc for doc in await db[STATE_COLLECTION].find({}).to_list(None)}
+        result = []
+        for m in self.migrations:
+            item = {"id": m.id, "aciklama": m.aciklama, "koleksiyon": m.collection}
+            if m.id in applied:
+                item["durum"] = "uygulandi"
+                item["applied_at"] = applied[m.id].get("applied_at")
+                item["stats"] = applied[m.id].get("stats")
+            else:
+                state = states.get(f"{m.id}:apply")
+                item["durum"] = "yarida" if state else ("bekliyor" if m.auto else "elle")
+                if state:
+                    item["stats"] = state.get("stats")
+                    item["updated_at"] = state.get("updated_at")
+            result.append(item)
+        return result
+
+    # ---------- çalıştırma ----------
+
+    async def run_one(self, migration: Migration) -> dict:
+        key = self._key(migration)
+        state = await db[STATE_COLLECTION].find_one({"_id": key}) or {}
+        last_id = state.get("last")
+        stats = {"taranan": 0, "degisen": 0, **(state.get("stats") or {})}
+        started = time.monotonic()
+
+        await migration.prepare()
+        remaining_query = dict(migration.query)
+        if last_id is not None:
+            remaining_query["_id"] = {"$gt": last_id}
+        stats["toplam"] = stats["taranan"] + await db[migration.collection].count_documents(remaining_query)
+        logger.info(
+            f"Migrasyon {migration.id} başlıyor (dry_run={self.dry_run}, "
+            f"{stats['toplam'] - stats['taranan']} döküman kaldı)"
+        )
+
+        projection = {**migration.projection, "_id": 1} if migration.projection else None
+        while True:
+            batch_query = dict(migration.query)
+            if last_id is not None:
+                batch_query["_id"] = {"$gt": last_id}
+            batch_started = time.monotonic()
+            batch = await db[migration.collection].find(batch_query, projection) \
+                .sort("_id", 1).limit(self.batch_size).to_list(self.batch_size)
+            if not batch:
+                break
+
+            operations = []
+            for doc in batch:
+                update = migration.update_for(doc)
+                if update:
+                    operations.append(UpdateOne({**migration.query, "_id": doc["_id"]}, update))
+            if operations and not self.dry_run:
+                result = await db[migration.collection].bulk_write(operations, ordered=False)
+                stats["degisen"] += result.modified_count
+            else:
+                stats["degisen"] += len(operations)
+            stats["taranan"] += len(batch)
+            last_id = batch[-1]["_id"]
+
+            await db[STATE_COLLECTION].update_one(
+                {"_id": key},
+                {"$set": {"last": last_id, "stats": stats, "updated_at": datetime.now(timezone.utc).isoformat()}},
+                upsert=True
+            )
+            if self.progress:
+                self.progress(migration.id, stats)
+            await asyncio.sleep(self.pause + (time.monotonic() - batch_started) * self.throttle)
+
+        stats["sure_sn"] = round(time.monotonic() - started, 2)
+        await db[STATE_COLLECTION].delete_one({"_id": key})
+        if not self.dry_run:
+            await db[APPLIED_COLLECTION].update_one(
+                {"_id": migration.id},
+                {"$set": {
+                    "aciklama": migration.aciklama,
+                    "applied_at": datetime.now(timezone.utc).isoformat(),
+                    "stats": stats,
+                }},
+                upsert=True
+            )
+            if stats["degisen"] and migration.bump_collections:
+                await bump_version(*migration.bump_collections)
+        logger.info(f"Migrasyon {migration.id} bitti: {stats}")
+        return stats
+
+    async def run(self, only: Optional[List[str]] = None) -> Optional[Dict[str, dict]]:
+        """
+        Bekleyen migrasyonları sırayla çalıştırır. Kilit başka bir çalıştırıcıdaysa
+        None döner; ilk hatada durur (sonraki migrasyonlar öncekine bağlı olabilir).
+        """
+        pending = await self.pending(only)
+        if not pending:
+            return {}
+        lease = Lease(LEASE_NAME)
+        if not await lease.acquire():
+            logger.info("Migrasyonlar başka bir süreçte çalışıyor")
+            return None
+        try:
+            report = {}
+            # Kilit alınana kadar başka bir süreç bazılarını uygulamış olabilir
+            for migration in await self.pending(only):
+                report[migration.id] = await self.run_one(migration)
+            return report
+        finally:
+            await lease.release()
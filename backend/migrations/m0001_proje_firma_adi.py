@@ -0,0 +1,23 @@
+"""
+Firma adı olmayan projelere varsayılan firma adı (eski update_projects.py)
+
+Yer tutucu bir değer yazdığı için otomatik çalışmaz; gerektiğinde elle:
+
+    python -m migrations --apply --only 0001_proje_firma_adi
+"""
+from constants import DEFAULT_PROJE_ADI
+from migrations.base import Migration
+
+
+class ProjeFirmaAdi(Migration):
+    id = "0001_proje_firma_adi"
+    aciklama = "firma_adi alanı olmayan veya boş projelere (varsayılan proje hariç) 'ABC Firma' yazılır"
+    collection = "projeler"
+    # None eşleşmesi alanın hiç olmadığı dökümanları da kapsar
+    query = {"firma_adi": {"$in": [None, ""]}, "proje_adi": {"$ne": DEFAULT_PROJE_ADI}}
+    projection = {"_id": 1}
+    bump_collections = ("projeler",)
+    auto = False
+
+    def update_for(self, doc: dict) -> dict:
+        return {"$set": {"firma_adi": "ABC Firma"}}
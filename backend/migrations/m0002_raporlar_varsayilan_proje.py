@@ -0,0 +1,34 @@
+"""
+Projesiz eski raporları varsayılan projeye bağlar (eskiden startup_db'deydi)
+"""
+from typing import Optional
+
+from database import db
+from constants import DEFAULT_PROJE_ADI
+from migrations.base import Migration
+
+
+class RaporlarVarsayilanProje(Migration):
+    id = "0002_raporlar_varsayilan_proje"
+    aciklama = "proje_id alanı olmayan raporlar varsayılan projeye (Adana) bağlanır"
+    collection = "raporlar"
+    query = {"proje_id": {"$exists": False}}
+    projection = {"_id": 1}
+    bump_collections = ("raporlar",)
+
+    def __init__(self):
+        self.proje_id: Optional[str] = None
+
+    async def prepare(self) -> None:
+        proje = await db.projeler.find_one({"proje_adi": DEFAULT_PROJE_ADI}, {"_id": 0, "id": 1})
+        if not proje:
+            raise RuntimeError(f"Varsayılan proje bulunamadı: {DEFAULT_PROJE_ADI}")
+        self.proje_id = proje["id"]
+
+    def update_for(self, doc: dict) -> dict:
+        return {"$set": {
+            "proje_id": self.proje_id,
+            "proje_adi": DEFAULT_PROJE_ADI,
+            "sehir": "Adana",
+            "sehir_kodu": "ADA"
+        }}
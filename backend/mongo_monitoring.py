@@ -0,0 +1,342 @@
+"""
+Mongo komut izleme ve yavaş sorgu kaydı
+
+pymongo'nun CommandListener arayüzü ile her veri komutu (find, aggregate,
+update, ...) için süre, koleksiyon, çağıran route ve dönen döküman sayısı
+histogramlara yazılır. MONGO_SLOW_QUERY_MS eşiğini aşan komutlar filtre
+şekli (değerler "?" ile maskelenmiş) ile loglanır ve son kayıtlar
+/api/bakim/yavas-sorgular altından görülebilir.
+
+MONGO_SLOW_QUERY_EXPLAIN=1 olduğunda yavaş komutlar arka planda
+explain("executionStats") ile tekrar planlanır; taranan döküman/anahtar sayısı
+ve kazanan plan (ör. COLLSCAN) kayda eklenir. Aynı şekil için explain en fazla
+EXPLAIN_INTERVAL_SECONDS'ta bir çalıştırılır.
+
+Bağlantı havuzu dinleyicisi açık/kullanımdaki bağlantı sayılarını ve
+bağlantı bekleme süresini aynı kayıt defterine yazar.
+
+Dinleyiciler database.py'da istemci oluşturulurken kaydedilir.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+
+from pymongo import monitoring
+
+from metrics import registry, COUNT_BUCKETS
+from request_context import current_route, profiled_commands, query_counters
+
+logger = logging.getLogger("mongo.slow")
+
+MONITORING_ENABLED = os.environ.get("MONGO_COMMAND_MONITORING", "1") == "1"
+SLOW_QUERY_MS = float(os.environ.get("MONGO_SLOW_QUERY_MS", "100"))
+EXPLAIN_ENABLED = os.environ.get("MONGO_SLOW_QUERY_EXPLAIN", "0") == "1"
+EXPLAIN_INTERVAL_SECONDS = 60
+SLOW_LOG_SIZE = 200
+
+MONITORED_COMMANDS = {
+    "find", "getMore", "aggregate", "count", "distinct", "insert", "update",
+    "delete", "findAndModify", "createIndexes", "bulkWrite"
+}
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+
+# Sürücünün eklediği, explain'e geri gönderilmemesi gereken alanlar
+_DRIVER_FIELDS = {"lsid", "txnNumber", "signature", "$db", "$clusterTime", "$readPreference", "cursor"}
+
+command_duration = registry.histogram(
+    "ekos_mongo_command_duration_seconds", "Mongo komut süresi",
+    ["command", "collection", "route"]
+)
+command_documents_returned = registry.histogram(
+    "ekos_mongo_documents_returned", "Komut başına dönen/etkilenen döküman sayısı",
+    ["command", "collection", "route"], buckets=COUNT_BUCKETS
+)
+command_documents_examined = registry.histogram(
+    "ekos_mongo_documents_examined", "Yavaş komutların explain ile ölçülen taranan döküman sayısı",
+    ["command", "collection", "route"], buckets=COUNT_BUCKETS
+)
+command_failures = registry.counter(
+    "ekos_mongo_command_failures_total", "Hata ile sonuçlanan Mongo komutları",
+    ["command", "collection", "route"]
+)
+slow_commands = registry.counter(
+    "ekos_mongo_slow_commands_total", "Eşiği aşan Mongo komutları",
+    ["command", "collection", "route"]
+)
+
+pool_connections = registry.gauge(
+    "ekos_mongo_pool_connections", "Havuzdaki açık bağlantılar", ["address"]
+)
+pool_checked_out = registry.gauge(
+    "ekos_mongo_pool_checked_out", "Kullanımda olan bağlantılar", ["address"]
+)
+pool_checkout_wait = registry.histogram(
+    "ekos_mongo_pool_checkout_wait_seconds", "Havuzdan bağlantı alma bekleme süresi", ["address"]
+)
+pool_checkout_failures = registry.counter(
+    "ekos_mongo_pool_checkout_failures_total", "Havuzdan bağlantı alınamayan durumlar", ["address", "reason"]
+)
+
+slow_log: Deque[Dict[str, Any]] = deque(maxlen=SLOW_LOG_SIZE)
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_explain_queue: Optional["asyncio.Queue[tuple]"] = None
+_last_explained: Dict[str, float] = {}
+
+
+def query_shape(value: Any) -> Any:
+    """Sorgu değerlerini maskeler, sadece alan/operatör yapısını bırakır"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value):
+            return [query_shape(item) for item in value]
+        return "[?]"
+    return "?"
+
+
+def command_shape(name: str, command: dict) -> Any:
+    if name in ("find", "count", "distinct"):
+        shape = {"filter": query_shape(command.get("filter") or command.get("query") or {})}
+        if command.get("sort"):
+            shape["sort"] = dict(command["sort"])
+        return shape
+    if name == "aggregate":
+        stages = []
+        for stage in command.get("pipeline", []):
+            for op, body in stage.items():
+                stages.append({op: query_shape(body)} if op == "$match" else op)
+        return stages
+    if name in ("update", "delete"):
+        statements = command.get("updates" if name == "update" else "deletes") or []
+        return {"q": query_shape(statements[0].get("q", {})) if statements else {}, "adet": len(statements)}
+    if name == "findAndModify":
+        return {"query": query_shape(command.get("query") or {})}
+    return None
+
+
+def _collection_of(name: str, command: dict) -> str:
+    if name == "getMore":
+        return str(command.get("collection", ""))
+    value = command.get(name)
+    return value if isinstance(value, str) else ""
+
+
+def _documents_returned(name: str, reply: dict) -> Optional[int]:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        batch = cursor.get("firstBatch", cursor.get("nextBatch"))
+        if batch is not None:
+            return len(batch)
+    if name == "distinct":
+        return len(reply.get("values", []))
+    if "n" in reply:
+        return reply["n"]
+    return None
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Komut başlangıcında etiketleri saklar, bitişinde metrikleri yazar"""
+
+    def __init__(self):
+        self._inflight: Dict[tuple, tuple] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        name = event.command_name
+        if name not in MONITORED_COMMANDS:
+            return
+        command = event.command
+        collection = _collection_of(name, command)
+        counters = query_counters.get()
+        if counters:
+            read_preference = command.get("$readPreference", {}).get("mode", "primary")
+            for counter in counters:
+                counter.record(name, collection, read_preference)
+        self._inflight[(event.connection_id, event.request_id)] = (
+            name, collection, current_route(), command, event.database_name,
+            profiled_commands.get()
+        )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        info = self._inflight.pop((event.connection_id, event.request_id), None)
+        if info is None:
+            return
+        name, collection, route, command, database_name, profile = info
+        duration = event.duration_micros / 1_000_000
+        command_duration.observe(duration, command=name, collection=collection, route=route)
+        returned = _documents_returned(name, event.reply)
+        if returned is not None:
+            command_documents_returned.observe(returned, command=name, collection=collection, route=route)
+        if profile is not None:
+            profile.append({
+                "komut": name,
+                "koleksiyon": collection,
+                "sure_ms": round(duration * 1000, 3),
+                "donen": returned,
+                "sekil": command_shape(name, command)
+            })
+        if duration * 1000 >= SLOW_QUERY_MS:
+            _record_slow(name, collection, route, command, database_name, duration, returned)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        info = self._inflight.pop((event.connection_id, event.request_id), None)
+        if info is None:
+            return
+        name, collection, route = info[:3]
+        command_failures.inc(command=name, collection=collection, route=route)
+
+
+def _address(event) -> str:
+    host, port = event.address
+    return f"{host}:{port}"
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Bağlantı havuzu olaylarından göstergeleri günceller"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        address = _address(event)
+        pool_connections.set(0, address=address)
+        pool_checked_out.set(0, address=address)
+
+    def connection_created(self, event):
+        pool_connections.inc(address=_address(event))
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pool_connections.dec(address=_address(event))
+
+    def connection_check_out_started(self, event):
+        # Başlangıç ve sonuç olayları aynı thread'de yayınlanır
+        self._local.started = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        pool_checkout_failures.inc(address=_address(event), reason=str(event.reason))
+
+    def connection_checked_out(self, event):
+        address = _address(event)
+        pool_checked_out.inc(address=address)
+        started = getattr(self._local, "started", None)
+        if started is not None:
+            pool_checkout_wait.observe(time.perf_counter() - started, address=address)
+            self._local.started = None
+
+    def connection_checked_in(self, event):
+        pool_checked_out.dec(address=_address(event))
+
+
+def _record_slow(name: str, collection: str, route: str, command: dict, database_name: str,
+                 duration: float, returned: Optional[int]) -> None:
+    slow_commands.inc(command=name, collection=collection, route=route)
+    entry = {
+        "zaman": datetime.now(timezone.utc).isoformat(),
+        "komut": name,
+        "koleksiyon": collection,
+        "route": route,
+        "sure_ms": round(duration * 1000, 2),
+        "donen": returned,
+        "sekil": command_shape(name, command)
+    }
+    slow_log.append(entry)
+    logger.warning(
+        f"Yavaş Mongo komutu: {name} {collection} {entry['sure_ms']} ms "
+        f"route={route} donen={returned} sekil={entry['sekil']}"
+    )
+
+    if not EXPLAIN_ENABLED or name not in EXPLAINABLE_COMMANDS or _loop is None:
+        return
+    key = f"{name}:{collection}:{entry['sekil']}"
+    now = time.monotonic()
+    if now - _last_explained.get(key, 0) < EXPLAIN_INTERVAL_SECONDS:
+        return
+    _last_explained[key] = now
+    clean = {k: v for k, v in command.items() if k not in _DRIVER_FIELDS}
+    if name == "aggregate":
+        clean["cursor"] = {}
+    try:
+        _loop.call_soon_threadsafe(_enqueue_explain, (database_name, clean, entry))
+    except RuntimeError:
+        # Event loop kapanıyor
+        pass
+
+
+def _enqueue_explain(item: tuple) -> None:
+    try:
+        _explain_queue.put_nowait(item)
+    except asyncio.QueueFull:
+        pass
+
+
+def _summarize_explain(result: dict) -> dict:
+    stats = result.get("executionStats") or {}
+    planner = result.get("queryPlanner") or {}
+    if not stats and result.get("stages"):
+        # aggregate explain: ilk aşama $cursor içindedir
+        cursor_stage = result["stages"][0].get("$cursor", {})
+        stats = cursor_stage.get("executionStats") or {}
+        planner = cursor_stage.get("queryPlanner") or {}
+    plan = planner.get("winningPlan") or {}
+    stages = []
+    while plan:
+        stages.append(plan.get("stage"))
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return {
+        "taranan_dokuman": stats.get("totalDocsExamined"),
+        "taranan_anahtar": stats.get("totalKeysExamined"),
+        "plan": [stage for stage in stages if stage]
+    }
+
+
+async def explain_worker(client) -> None:
+    """Yavaş komutların explain çıktısını arka planda toplar"""
+    global _loop, _explain_queue
+    _loop = asyncio.get_running_loop()
+    _explain_queue = asyncio.Queue(maxsize=100)
+    while True:
+        db_name, command, entry = await _explain_queue.get()
+        try:
+            result = await client[db_name].command(
+                {"explain": command, "verbosity": "executionStats"}
+            )
+            entry["explain"] = _summarize_explain(result)
+            examined = entry["explain"]["taranan_dokuman"]
+            if examined is not None:
+                command_documents_examined.observe(
+                    examined, command=entry["komut"], collection=entry["koleksiyon"], route=entry["route"]
+                )
+            logger.warning(
+                f"Explain: {entry['komut']} {entry['koleksiyon']} route={entry['route']} {entry['explain']}"
+            )
+        except Exception as e:
+            logger.info(f"Explain çalıştırılamadı ({entry['komut']} {entry['koleksiyon']}): {e}")
+
+
+def recent_slow_commands(limit: int = 50) -> List[Dict[str, Any]]:
+    return list(slow_log)[-limit:][::-1]
+
+
+command_listener = CommandMetricsListener()
+pool_listener = PoolMetricsListener()
+
+
+def event_listeners() -> list:
+    return [command_listener, pool_listener] if MONITORING_ENABLED else []
@@ -0,0 +1,86 @@
+"""
+Mongo sorgu sayacı (N+1 tespiti)
+
+count_queries() bloğu içinde — aynı asyncio görevi ve onun Motor executor
+thread'lerinde — çalışan her veri komutu mongo_monitoring dinleyicisi
+üzerinden sayılır. Amaç, bir endpoint'in yaptığı sorgu sayısının girdi
+boyutundan (seçilen rapor sayısı, Excel satır sayısı, kategori sayısı)
+bağımsız kaldığını doğrulamaktır:
+
+    with count_queries() as sayac:
+        await client.post("/api/raporlar/bulk-delete", json=ids, headers=headers)
+    sayac.assert_at_most(5, "bulk_delete_raporlar")
+
+getMore komutları toplamda sayılmaz: büyük bir sonucun parti parti
+okunması yeni bir sorgu değildir. MONGO_COMMAND_MONITORING=0 ile dinleyiciler
+kapatılmışsa sayaç boş kalır.
+
+Her komutun okuma tercihi de kaydedilir (by_read_preference); analitik
+okumaların ikincillere yönlendirildiği benchmarks/read_routing.py ile
+doğrulanır. pymongo secondaryPreferred'i yalnızca maxStalenessSeconds veya
+etiket varsa komuta yazar; bu yüzden sınırsız gecikmede "primary" görünür.
+
+Endpoint bazında sınırlar benchmarks/query_budget.py'da tanımlıdır;
+tests/test_query_budget.py aynı sınırları bellek içi veritabanıyla her test
+çalıştırmasında, benchmarks.query_budget ise seed'li gerçek veritabanında
+kontrol eder.
+"""
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Set, Tuple
+
+from request_context import query_counters
+
+# Sorgu sayılmayan komutlar (imleç devamı)
+UNCOUNTED_COMMANDS = {"getMore"}
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Bir kod yolu izin verilenden fazla Mongo komutu çalıştırdı"""
+
+
+class QueryCount:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.commands: List[Tuple[str, str, str]] = []
+
+    def record(self, command: str, collection: str, read_preference: str = "primary") -> None:
+        # Motor executor thread'lerinden çağrılır
+        with self._lock:
+            self.commands.append((command, collection, read_preference))
+
+    @property
+    def total(self) -> int:
+        return sum(1 for command, _, _ in self.commands if command not in UNCOUNTED_COMMANDS)
+
+    def by_command(self) -> Counter:
+        """'find raporlar' -> adet"""
+        return Counter(f"{command} {collection}".strip() for command, collection, _ in self.commands)
+
+    def by_read_preference(self) -> Dict[str, Set[str]]:
+        """koleksiyon -> okunduğu tercihler (getMore komutu tercih taşımaz, atlanır)"""
+        result: Dict[str, Set[str]] = {}
+        for command, collection, read_preference in self.commands:
+            if command not in UNCOUNTED_COMMANDS:
+                result.setdefault(collection, set()).add(read_preference)
+        return result
+
+    def summary(self) -> str:
+        return ", ".join(f"{key}={count}" for key, count in sorted(self.by_command().items()))
+
+    def assert_at_most(self, limit: int, label: str = "") -> None:
+        if self.total > limit:
+            raise QueryBudgetExceeded(
+                f"{label or 'Kod yolu'} {self.total} sorgu çalıştırdı (sınır {limit}): {self.summary()}"
+            )
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCount]:
+    counter = QueryCount()
+    token = query_counters.set(query_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        query_counters.reset(token)
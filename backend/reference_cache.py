@@ -0,0 +1,153 @@
+"""
+Referans koleksiyonları için süreç içi okuma önbelleği
+
+projeler, kategoriler, kalibrasyon_cihazlari ve iskele_bilesen_adlari küçük ve
+nadiren değişen koleksiyonlardır. İlk okumada belleğe alınır, sonraki
+okumalar (liste ve id ile erişim) bellekten karşılanır.
+
+Geçersiz kılma:
+- Aynı worker'daki yazmalar bump_version() üzerinden önbelleği anında düşürür.
+- Diğer worker'lardaki yazmalar degisiklik_surumleri sayaçlarını periyodik
+  okuyan izleyici (watch_versions) ile en geç REFERENCE_CACHE_POLL_SECONDS
+  içinde fark edilir.
+
+Koleksiyonun tamamı yerine ondan türetilen tek bir değer (ör. hazır bir
+yanıt) için VersionedValue aynı geçersiz kılma düzeniyle çalışır; okumalarda
+Mongo'ya gidilmez, yalnızca sürüm değişince loader tekrar çağrılır.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from database import db
+from change_versions import get_versions, on_bump
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = float(os.environ.get("REFERENCE_CACHE_POLL_SECONDS", "2"))
+MAX_DOCS = 1000
+
+
+class ReferenceCache:
+    """Tek bir koleksiyonun bellekteki kopyası"""
+
+    def __init__(self, collection: str):
+        self.collection = collection
+        self._docs: Optional[List[dict]] = None
+        self._by_id: Dict[str, dict] = {}
+        self._version: Optional[int] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._version
+
+    def invalidate(self) -> None:
+        self._docs = None
+        self._by_id = {}
+        self._version = None
+
+    async def _ensure_loaded(self) -> List[dict]:
+        docs = self._docs
+        if docs is not None:
+            return docs
+        async with self._lock:
+            if self._docs is None:
+                # Sürüm dökümanlardan ÖNCE okunur; arada yazma olursa izleyici tekrar yükletir
+                version = (await get_versions(self.collection))[self.collection]
+                docs = await db[self.collection].find({}, {"_id": 0}).to_list(MAX_DOCS)
+                self._by_id = {doc["id"]: doc for doc in docs if "id" in doc}
+                self._version = version
+                self._docs = docs
+            return self._docs
+
+    async def all(self) -> List[dict]:
+        """Tüm dökümanların kopyası (çağıran taraf güvenle değiştirebilir)"""
+        return [dict(doc) for doc in await self._ensure_loaded()]
+
+    async def get(self, doc_id: str) -> Optional[dict]:
+        await self._ensure_loaded()
+        doc = self._by_id.get(doc_id)
+        if doc is not None:
+            return dict(doc)
+        # Başka worker'da yeni eklenmiş olabilir; izleyici fark edene kadar DB'ye bak
+        return await db[self.collection].find_one({"id": doc_id}, {"_id": 0})
+
+
+class VersionedValue:
+    """Bir koleksiyonun sürümüne bağlı, loader ile üretilip bellekte tutulan değer"""
+
+    def __init__(self, collection: str, loader: Callable[[], Awaitable[Any]]):
+        self.collection = collection
+        self._loader = loader
+        self._value: Any = None
+        self._version: Optional[int] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._version
+
+    def invalidate(self) -> None:
+        self._value = None
+        self._version = None
+
+    async def get(self) -> Any:
+        value = self._value
+        if value is not None:
+            return value
+        async with self._lock:
+            if self._value is None:
+                version = (await get_versions(self.collection))[self.collection]
+                self._value = await self._loader()
+                self._version = version
+            return self._value
+
+
+projeler_cache = ReferenceCache("projeler")
+kategoriler_cache = ReferenceCache("kategoriler")
+kalibrasyon_cache = ReferenceCache("kalibrasyon_cihazlari")
+bilesen_adlari_cache = ReferenceCache("iskele_bilesen_adlari")
+
+REFERENCE_CACHES: Dict[str, ReferenceCache] = {
+    cache.collection: cache
+    for cache in (projeler_cache, kategoriler_cache, kalibrasyon_cache, bilesen_adlari_cache)
+}
+
+VERSIONED_VALUES: List[VersionedValue] = []
+
+
+def versioned_value(collection: str, loader: Callable[[], Awaitable[Any]]) -> VersionedValue:
+    """İzleyiciye kayıtlı bir VersionedValue oluşturur (modül yüklenirken çağrılmalı)"""
+    value = VersionedValue(collection, loader)
+    VERSIONED_VALUES.append(value)
+    return value
+
+
+def _watched() -> List:
+    return [*REFERENCE_CACHES.values(), *VERSIONED_VALUES]
+
+
+def _invalidate_on_bump(collection: str) -> None:
+    for cache in _watched():
+        if cache.collection == collection:
+            cache.invalidate()
+
+
+on_bump(_invalidate_on_bump)
+
+
+async def watch_versions() -> None:
+    """Diğer worker'ların yazmalarını sürüm sayaçlarından takip eder"""
+    while True:
+        await asyncio.sleep(POLL_INTERVAL)
+        caches = _watched()
+        try:
+            versions = await get_versions(*{cache.collection for cache in caches})
+        except Exception as e:
+            logger.warning(f"Referans önbelleği sürüm kontrolü başarısız: {e}")
+            continue
+        for cache in caches:
+            if cache.version is not None and versions[cache.collection] != cache.version:
+                cache.invalidate()
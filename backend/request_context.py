@@ -0,0 +1,53 @@
+"""
+İstek bağlamı
+
+Her HTTP isteğinin ASGI scope'u bir ContextVar'a konur. Motor işlemleri
+executor thread'lerinde context kopyasıyla çalıştığı için pymongo dinleyicileri
+ve diğer izleme kodu hangi endpoint'ten çağrıldıklarını buradan öğrenir.
+
+Etiket olarak ham URL yerine route şablonu ("/api/raporlar/{rapor_id}")
+kullanılır; böylece metrik serisi sayısı endpoint sayısıyla sınırlı kalır.
+"""
+from contextvars import ContextVar
+from typing import List, Optional
+
+BACKGROUND = "background"
+UNMATCHED = "unmatched"
+
+_current_scope: ContextVar[Optional[dict]] = ContextVar("current_scope", default=None)
+
+# Profillenen istekte Mongo komutlarının toplandığı liste (request_profiler)
+profiled_commands: ContextVar[Optional[List[dict]]] = ContextVar("profiled_commands", default=None)
+
+# Aktif sorgu sayaçları (query_counter.count_queries); iç içe kullanım için tuple
+query_counters: ContextVar[tuple] = ContextVar("query_counters", default=())
+
+
+def route_of(scope: Optional[dict]) -> str:
+    if scope is None:
+        return BACKGROUND
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path or UNMATCHED
+
+
+def current_route() -> str:
+    """Aktif isteğin route şablonu; istek dışında 'background'"""
+    return route_of(_current_scope.get())
+
+
+class RequestContextMiddleware:
+    """Scope'u ContextVar'a yerleştiren saf ASGI middleware"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_scope.reset(token)
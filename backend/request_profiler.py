@@ -0,0 +1,200 @@
+"""
+İsteğe bağlı (on-demand) istek profilleyici
+
+Admin kullanıcı bir isteğe `X-Profile: 1` başlığı veya `?_profile=1`
+parametresi eklediğinde, o tek istek süresince ayrı bir thread event loop
+thread'inin stack'ini PROFILER_INTERVAL_MS aralıklarla örnekler. Stack'inde
+bu isteğin çerçevesi olmayan örnekler (I/O bekleme, başka görevler)
+"(bekleme)" olarak sayılır; böylece rapor duvar saati süresinin tamamını gösterir.
+
+Aynı istekte çalışan Mongo komutları (süre, koleksiyon, filtre şekli)
+mongo_monitoring dinleyicisi üzerinden toplanır. Sonuç profil_raporlari
+koleksiyonuna yazılır ve kimliği `X-Profil-Id` yanıt başlığında döner:
+
+    GET /api/bakim/profiller/{id}             -> özet + Mongo komutları
+    GET /api/bakim/profiller/{id}/flamegraph  -> folded stack (speedscope / flamegraph.pl)
+
+Başlık/parametre yoksa maliyet tek bir bayt araması kadardır; parametre adı
+geçiyorsa sorgu dizesi ayrıştırılıp `_profile` anahtarı birebir karşılaştırılır.
+Token admin'e ait değilse istek profillenmeden normal şekilde işlenir.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional, Set
+from urllib.parse import parse_qsl
+
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from database import db
+from request_context import profiled_commands, route_of
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY = "_profile"
+PROFILE_VALUES = ("1", "true")
+REPORTS_COLLECTION = "profil_raporlari"
+SAMPLE_INTERVAL = float(os.environ.get("PROFILER_INTERVAL_MS", "1")) / 1000
+MAX_SAMPLES = 60000
+IDLE_FRAME = "(bekleme)"
+
+_pending_saves: Set[asyncio.Task] = set()
+
+
+def _frame_name(code) -> str:
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Loop thread'ini örnekler; sadece hedef çerçevenin altındaki stack'leri sayar"""
+
+    def __init__(self, thread_id: int, root_frame, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.root_frame = root_frame
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        total = 0
+        while not self._stop.wait(self.interval) and total < MAX_SAMPLES:
+            frame = sys._current_frames().get(self.thread_id)
+            stack: List[str] = []
+            while frame is not None and frame is not self.root_frame:
+                stack.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            if frame is None:
+                self.samples[IDLE_FRAME] += 1
+            else:
+                self.samples[";".join(reversed(stack)) or IDLE_FRAME] += 1
+            total += 1
+
+    def folded(self, root: str) -> str:
+        """flamegraph.pl / speedscope'un okuduğu 'a;b;c adet' formatı"""
+        lines = []
+        for stack, count in self.samples.most_common():
+            lines.append(f"{root};{stack} {count}")
+        return "\n".join(lines)
+
+
+def _profile_requested(scope) -> bool:
+    query_string = scope.get("query_string", b"")
+    # Parametre adı hiç geçmiyorsa ayrıştırma maliyetine girilmez
+    if PROFILE_QUERY.encode() in query_string:
+        for key, value in parse_qsl(query_string.decode("latin-1")):
+            if key == PROFILE_QUERY and value in PROFILE_VALUES:
+                return True
+    for name, value in scope.get("headers", ()):
+        if name == PROFILE_HEADER:
+            return value.decode("latin-1") in PROFILE_VALUES
+    return False
+
+
+async def _admin_user(scope) -> Optional[dict]:
+    # routers paketi bakim üzerinden bu modülü içe aktardığı için burada yüklenir
+    from routers.auth import get_current_user
+
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                user = await get_current_user(HTTPAuthorizationCredentials(scheme=scheme, credentials=token))
+            except HTTPException:
+                return None
+            return user if user.get("role") == "admin" else None
+    return None
+
+
+class ProfilerMiddleware:
+    """Sadece işaretli admin isteklerini profiller, diğerlerini olduğu gibi geçirir"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+        user = await _admin_user(scope)
+        if user is None:
+            await self.app(scope, receive, send)
+            return
+        await self._profile(scope, receive, send, user)
+
+    async def _profile(self, scope, receive, send, user: dict):
+        profil_id = str(uuid.uuid4())
+        status = 500
+        commands: List[dict] = []
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profil-id", profil_id.encode())
+                ]
+            await send(message)
+
+        token = profiled_commands.set(commands)
+        sampler = StackSampler(threading.get_ident(), sys._getframe())
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            duration = time.perf_counter() - started
+            profiled_commands.reset(token)
+            route = route_of(scope)
+            rapor = {
+                "id": profil_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "route": route,
+                "status": status,
+                "sure_ms": round(duration * 1000, 2),
+                "ornek_sayisi": sum(sampler.samples.values()),
+                "ornek_araligi_ms": sampler.interval * 1000,
+                "mongo_komut_sayisi": len(commands),
+                "mongo_sure_ms": round(sum(c["sure_ms"] for c in commands), 2),
+                "mongo_komutlari": commands,
+                "folded": sampler.folded(f"{scope['method']} {route}"),
+                "created_by": user["id"],
+                "created_at": datetime.now(timezone.utc).isoformat()
+            }
+            # Rapor yazımı yanıtı geciktirmesin
+            task = asyncio.create_task(_save_report(rapor))
+            _pending_saves.add(task)
+            task.add_done_callback(_pending_saves.discard)
+
+
+async def _save_report(rapor: dict) -> None:
+    try:
+        await db[REPORTS_COLLECTION].insert_one(rapor)
+        logger.info(
+            f"Profil kaydedildi: {rapor['id']} {rapor['method']} {rapor['route']} "
+            f"{rapor['sure_ms']} ms, {rapor['mongo_komut_sayisi']} Mongo komutu"
+        )
+    except Exception as e:
+        logger.warning(f"Profil raporu kaydedilemedi: {e}")
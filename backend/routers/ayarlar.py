@@ -1,11 +1,14 @@
 """
 Ayarlar (Settings) Router - Kullanıcı sözleşmesi ve diğer ayarlar
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
 from typing import Optional
 from database import db
 from routers.auth import get_current_user
+from change_versions import bump_version
+from http_cache import precompute_json, PUBLIC_REVALIDATE
+from reference_cache import versioned_value
 
 router = APIRouter(prefix="/api/ayarlar", tags=["Ayarlar"])
 
@@ -49,13 +52,20 @@ Bu sözleşme önceden haber vermeksizin güncellenebilir. Güncel sözleşme he
 *Bu sözleşmeyi kabul ederek yukarıdaki şartları okuduğunuzu ve kabul ettiğinizi beyan etmiş olursunuz.*
 """
 
+async def _load_agreement_response():
+    settings = await db.ayarlar.find_one({"key": "user_agreement"})
+    content = settings.get("content", DEFAULT_AGREEMENT) if settings else DEFAULT_AGREEMENT
+    # İçerik değişebildiği için istemci her seferinde ETag ile doğrular
+    return precompute_json({"content": content}, cache_control=PUBLIC_REVALIDATE)
+
+# Sözleşme yanıtı bellekte tutulur; "ayarlar" sürümü değişince (bu worker'da bump,
+# diğerlerinde watch_versions) yeniden yüklenir
+_agreement_response = versioned_value("ayarlar", _load_agreement_response)
+
 @router.get("/kullanici-sozlesmesi")
-async def get_user_agreement():
+async def get_user_agreement(request: Request):
     """Kullanıcı sözleşmesini getir - herkes erişebilir"""
-    settings = await db.ayarlar.find_one({"key": "user_agreement"})
-    if settings:
-        return {"content": settings.get("content", DEFAULT_AGREEMENT)}
-    return {"content": DEFAULT_AGREEMENT}
+    return (await _agreement_response.get()).respond(request)
 
 @router.put("/kullanici-sozlesmesi")
 async def update_user_agreement(
@@ -78,5 +88,6 @@ async def update_user_agreement(
         }},
         upsert=True
     )
+    await bump_version("ayarlar")
     
     return {"message": "Kullanıcı sözleşmesi güncellendi", "content": agreement.content}
@@ -0,0 +1,189 @@
+"""
+Bakım (Maintenance) Router - Çöp toplayıcı gibi admin işlemleri
+"""
+import asyncio
+import logging
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+from routers.auth import get_current_user
+from database import db
+from garbage_collector import (
+    GarbageCollector, STATE_COLLECTION, TASKS, MAX_BATCH_SIZE as GC_MAX_BATCH_SIZE, running_elsewhere
+)
+from mongo_monitoring import recent_slow_commands, SLOW_QUERY_MS, EXPLAIN_ENABLED
+import loop_watchdog
+from request_profiler import REPORTS_COLLECTION
+from migrations import MIGRATIONS, MigrationRunner
+from migrations.base import MAX_BATCH_SIZE
+
+router = APIRouter(prefix="/bakim", tags=["Bakım"])
+logger = logging.getLogger(__name__)
+
+class GcRequest(BaseModel):
+    dry_run: bool = True
+    tasks: Optional[List[str]] = None
+    batch_size: int = Field(500, ge=1, le=GC_MAX_BATCH_SIZE)
+    pause: float = Field(0.1, ge=0)
+
+class MigrasyonRequest(BaseModel):
+    dry_run: bool = True
+    only: Optional[List[str]] = None
+    batch_size: int = Field(500, ge=1, le=MAX_BATCH_SIZE)
+    pause: float = Field(0.1, ge=0)
+    throttle: float = Field(1.0, ge=0)
+
+# Worker başına tek GC / migrasyon çalıştırması (worker'lar arasında kilitlerle)
+_gc_task: Optional[asyncio.Task] = None
+_migration_task: Optional[asyncio.Task] = None
+
+def _require_admin(current_user: dict):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Bu işlem için yetkiniz yok")
+
+async def _run_gc(gc: GarbageCollector, tasks: Optional[List[str]]):
+    try:
+        if await gc.run(tasks) is None:
+            logger.info("GC başka bir worker'da çalışıyor")
+    except Exception as e:
+        logger.exception(f"GC çalıştırması başarısız: {e}")
+
+@router.post("/gc", status_code=202)
+async def start_gc(request: GcRequest, current_user: dict = Depends(get_current_user)):
+    """Çöp toplayıcıyı arka planda başlat (varsayılan: dry-run)"""
+    global _gc_task
+    _require_admin(current_user)
+    
+    if request.tasks:
+        unknown = [t for t in request.tasks if t not in TASKS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Bilinmeyen görev(ler): {', '.join(unknown)}")
+    
+    if (_gc_task and not _gc_task.done()) or await running_elsewhere():
+        raise HTTPException(status_code=409, detail="Çöp toplayıcı zaten çalışıyor")
+    
+    gc = GarbageCollector(dry_run=request.dry_run, batch_size=request.batch_size, pause=request.pause)
+    _gc_task = asyncio.create_task(_run_gc(gc, request.tasks))
+    return {"message": "Çöp toplayıcı başlatıldı", "dry_run": request.dry_run}
+
+@router.get("/gc")
+async def get_gc_status(current_user: dict = Depends(get_current_user)):
+    """Çalışma durumu, yarıda kalan görevler ve son rapor"""
+    _require_admin(current_user)
+    
+    states = await db[STATE_COLLECTION].find({}).to_list(100)
+    son_rapor = next((s.get("rapor") for s in states if s["_id"] == "son_rapor"), None)
+    devam_eden = [
+        {"gorev": s["_id"], "stats": s.get("stats"), "updated_at": s.get("updated_at")}
+        for s in states if s["_id"] != "son_rapor"
+    ]
+    return {
+        "calisiyor": bool(_gc_task and not _gc_task.done()) or await running_elsewhere(),
+        "devam_eden": devam_eden,
+        "son_rapor": son_rapor
+    }
+
+async def _run_migrations(runner: MigrationRunner, only: Optional[List[str]]):
+    try:
+        if await runner.run(only) is None:
+            logger.info("Migrasyonlar başka bir worker'da çalışıyor")
+    except Exception as e:
+        logger.exception(f"Migrasyon çalıştırması başarısız: {e}")
+
+@router.post("/migrasyonlar", status_code=202)
+async def start_migrations(request: MigrasyonRequest, current_user: dict = Depends(get_current_user)):
+    """Bekleyen veri migrasyonlarını arka planda başlat (varsayılan: dry-run)"""
+    global _migration_task
+    _require_admin(current_user)
+    
+    if request.only:
+        known = {m.id for m in MIGRATIONS}
+        unknown = [m for m in request.only if m not in known]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Bilinmeyen migrasyon(lar): {', '.join(unknown)}")
+    
+    if _migration_task and not _migration_task.done():
+        raise HTTPException(status_code=409, detail="Migrasyonlar zaten çalışıyor")
+    
+    runner = MigrationRunner(
+        MIGRATIONS, dry_run=request.dry_run, batch_size=request.batch_size,
+        pause=request.pause, throttle=request.throttle
+    )
+    _migration_task = asyncio.create_task(_run_migrations(runner, request.only))
+    return {"message": "Migrasyonlar başlatıldı", "dry_run": request.dry_run}
+
+@router.get("/migrasyonlar")
+async def get_migrations(current_user: dict = Depends(get_current_user)):
+    """Migrasyonların durumu: uygulandı / yarıda (ilerlemesiyle) / bekliyor / elle (yalnızca only ile)"""
+    _require_admin(current_user)
+    
+    return {
+        "calisiyor": bool(_migration_task and not _migration_task.done()),
+        "migrasyonlar": await MigrationRunner(MIGRATIONS).status()
+    }
+
+@router.get("/yavas-sorgular")
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=200),
+    current_user: dict = Depends(get_current_user)
+):
+    """Bu worker'da eşiği aşan son Mongo komutları (en yeni önce)"""
+    _require_admin(current_user)
+    
+    return {
+        "esik_ms": SLOW_QUERY_MS,
+        "explain": EXPLAIN_ENABLED,
+        "sorgular": recent_slow_commands(limit)
+    }
+
+@router.get("/loop-bloklari")
+async def get_loop_blocks(
+    limit: int = Query(50, ge=1, le=100),
+    current_user: dict = Depends(get_current_user)
+):
+    """Bu worker'da event loop'u eşikten uzun bloklayan son çağrılar ve stack'leri"""
+    _require_admin(current_user)
+    
+    return {
+        "mod": loop_watchdog.MODE,
+        "esik_ms": loop_watchdog.THRESHOLD_SECONDS * 1000,
+        "bloklar": loop_watchdog.recent_blocks(limit)
+    }
+
+@router.get("/profiller")
+async def get_profiles(
+    limit: int = Query(50, ge=1, le=200),
+    current_user: dict = Depends(get_current_user)
+):
+    """Kaydedilmiş istek profilleri (en yeni önce, stack verisi olmadan)"""
+    _require_admin(current_user)
+    
+    return await db[REPORTS_COLLECTION].find(
+        {}, {"_id": 0, "folded": 0, "mongo_komutlari": 0}
+    ).sort("created_at", -1).to_list(limit)
+
+@router.get("/profiller/{profil_id}")
+async def get_profile(profil_id: str, current_user: dict = Depends(get_current_user)):
+    """Profil özeti ve istekte çalışan Mongo komutları"""
+    _require_admin(current_user)
+    
+    profil = await db[REPORTS_COLLECTION].find_one({"id": profil_id}, {"_id": 0, "folded": 0})
+    if not profil:
+        raise HTTPException(status_code=404, detail="Profil bulunamadı")
+    return profil
+
+@router.get("/profiller/{profil_id}/flamegraph")
+async def get_profile_flamegraph(profil_id: str, current_user: dict = Depends(get_current_user)):
+    """Folded stack çıktısı; speedscope.app veya flamegraph.pl ile açılabilir"""
+    _require_admin(current_user)
+    
+    profil = await db[REPORTS_COLLECTION].find_one({"id": profil_id}, {"_id": 0, "folded": 1})
+    if not profil:
+        raise HTTPException(status_code=404, detail="Profil bulunamadı")
+    return PlainTextResponse(
+        profil["folded"],
+        headers={"Content-Disposition": f'attachment; filename="profil-{profil_id}.folded"'}
+    )
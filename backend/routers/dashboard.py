@@ -1,37 +1,64 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from datetime import datetime, timezone, timedelta
+from typing import Optional
 
 from routers.auth import get_current_user
-from database import db
+from database import read_db, with_time_limit
+from http_cache import conditional_get, etag_headers
+from single_flight import SingleFlight, freeze
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
+dashboard_flight = SingleFlight("dashboard")
+
 @router.get("/stats")
-async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
+@with_time_limit("dashboard")
+async def get_dashboard_stats(request: Request, response: Response, current_user: dict = Depends(get_current_user)):
     if current_user.get("role") not in ["admin", "inspector"]:
         raise HTTPException(status_code=403, detail="Dashboard'a erişim yetkiniz yok")
     
+    # Aylık sayaç ve son kullanma pencereleri güne bağlı olduğu için tarih de ETag'e dahil
+    today = datetime.now(timezone.utc).date().isoformat()
+    # Sayımlar ikincil üyeden okunabilir; ETag'in sürümleri de aynı kaynaktan okunur
+    source = read_db("dashboard")
+    etag, cached = await conditional_get(
+        request, ["raporlar", "iskele_bilesenleri"], current_user, extra=(today,), source=source
+    )
+    if cached:
+        return cached
+    response.headers.update(etag_headers(etag))
+    
+    # Aynı anda açılan dashboard'lar aynı sayımları paylaşır; anahtar yetki kapsamı (viewer
+    # firması), gün ve koleksiyon sürümlerinden oluşur
+    firma = current_user.get("firma_adi") if current_user.get("role") == "viewer" else None
+    return await dashboard_flight.do(
+        (firma, today, freeze(request.state.versions)),
+        lambda: _dashboard_stats(source, firma)
+    )
+
+
+async def _dashboard_stats(source, firma: Optional[str]) -> dict:
+    """Dashboard sayımları; sonuç yalnızca yetki kapsamına (viewer firması) bağlıdır"""
     base_query = {}
-    user_firma = current_user.get("firma_adi")
-    if user_firma and current_user.get("role") == "viewer":
-        base_query["firma"] = user_firma
+    if firma:
+        base_query["firma"] = firma
     
-    total_raporlar = await db.raporlar.count_documents(base_query)
+    total_raporlar = await source.raporlar.count_documents(base_query)
     
     now = datetime.now(timezone.utc)
     start_of_month = datetime(now.year, now.month, 1, tzinfo=timezone.utc)
     monthly_query = {**base_query, "created_at": {"$gte": start_of_month.isoformat()}}
-    monthly_raporlar = await db.raporlar.count_documents(monthly_query)
+    monthly_raporlar = await source.raporlar.count_documents(monthly_query)
     
-    uygun_count = await db.raporlar.count_documents({**base_query, "uygunluk": "Uygun"})
-    uygun_degil_count = await db.raporlar.count_documents({**base_query, "uygunluk": "Uygun Değil"})
+    uygun_count = await source.raporlar.count_documents({**base_query, "uygunluk": "Uygun"})
+    uygun_degil_count = await source.raporlar.count_documents({**base_query, "uygunluk": "Uygun Değil"})
     
     now_date = now.date()
     thirty_days = (now + timedelta(days=30)).date()
     seven_days = (now + timedelta(days=7)).date()
     
     date_query = {**base_query, "gecerlilik_tarihi": {"$nin": [None, ""]}}
-    raporlar_with_dates = await db.raporlar.find(
+    raporlar_with_dates = await source.raporlar.find(
         date_query, 
         {"gecerlilik_tarihi": 1, "_id": 0}
     ).limit(5000).to_list(5000)
@@ -70,19 +97,19 @@ async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
         {"$project": {"kategori": "$_id", "count": 1, "_id": 0}}
     ])
     
-    kategori_dagilim = await db.raporlar.aggregate(pipeline).to_list(6)
+    kategori_dagilim = await source.raporlar.aggregate(pipeline).to_list(6)
     
     # İskele stats
     iskele_query = {}
-    if current_user.get("role") == "viewer" and current_user.get("firma_adi"):
-        iskele_query["firma_adi"] = current_user.get("firma_adi")
+    if firma:
+        iskele_query["firma_adi"] = firma
     
     total_pipeline = []
     if iskele_query:
         total_pipeline.append({"$match": iskele_query})
     total_pipeline.append({"$group": {"_id": None, "total": {"$sum": "$bileşen_adedi"}}})
     
-    total_result = await db.iskele_bilesenleri.aggregate(total_pipeline).to_list(1)
+    total_result = await source.iskele_bilesenleri.aggregate(total_pipeline).to_list(1)
     total_iskele = total_result[0]["total"] if total_result else 0
     
     # Uygun olanların bileşen adedi toplamı - case-insensitive regex
@@ -94,7 +121,7 @@ async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
         {"$group": {"_id": None, "total": {"$sum": "$bileşen_adedi"}}}
     ])
     
-    uygun_result = await db.iskele_bilesenleri.aggregate(uygun_pipeline).to_list(1)
+    uygun_result = await source.iskele_bilesenleri.aggregate(uygun_pipeline).to_list(1)
     iskele_uygun = uygun_result[0]["total"] if uygun_result else 0
     
     # Uygun olmayanların bileşen adedi toplamı - case-insensitive regex
@@ -106,7 +133,7 @@ async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
         {"$group": {"_id": None, "total": {"$sum": "$bileşen_adedi"}}}
     ])
     
-    uygun_degil_result = await db.iskele_bilesenleri.aggregate(uygun_degil_pipeline).to_list(1)
+    uygun_degil_result = await source.iskele_bilesenleri.aggregate(uygun_degil_pipeline).to_list(1)
     iskele_uygun_degil = uygun_degil_result[0]["total"] if uygun_degil_result else 0
     
     # Get ALL component distributions (no limit)
@@ -119,7 +146,7 @@ async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
         {"$project": {"bileşen_adi": "$_id", "count": 1, "_id": 0}}
     ])
     
-    bilesen_dagilim = await db.iskele_bilesenleri.aggregate(iskele_pipeline).to_list(100)
+    bilesen_dagilim = await source.iskele_bilesenleri.aggregate(iskele_pipeline).to_list(100)
     
     return {
         "total_raporlar": total_raporlar,
@@ -1,20 +1,23 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Request
 from fastapi.responses import StreamingResponse
+from functools import lru_cache
 from typing import List, Optional
 from datetime import datetime, timezone
 from pathlib import Path
 from pydantic import BaseModel
+import asyncio
 import io
 import uuid
 
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-
 from models import Rapor
 from routers.auth import get_current_user
-from database import db
-from utils import generate_rapor_no
+from database import db, read_db, with_time_limit
+from http_cache import PrecomputedResponse
+from admission import limit_concurrency
+from utils import get_sehir_kodu, last_rapor_numbers, insert_rows
 from constants import SEHIRLER
+from change_versions import bump_version
+from reference_cache import projeler_cache
 
 router = APIRouter(prefix="/excel", tags=["Excel"])
 
@@ -22,26 +25,29 @@ router = APIRouter(prefix="/excel", tags=["Excel"])
 class ExcelExportRequest(BaseModel):
     rapor_ids: List[str]
 
-@router.post("/export")
-async def export_excel_selected(request: ExcelExportRequest, current_user: dict = Depends(get_current_user)):
-    """Seçili raporları Excel'e aktar"""
-    if not request.rapor_ids:
-        raise HTTPException(status_code=400, detail="En az bir rapor seçilmelidir")
-    
-    raporlar = await db.raporlar.find({"id": {"$in": request.rapor_ids}}, {"_id": 0}).to_list(10000)
-    
-    if not raporlar:
-        raise HTTPException(status_code=404, detail="Seçilen raporlar bulunamadı")
+# (başlık, rapor alanı) sırası; son sütun her zaman oluşturma tarihidir
+SECILI_EXPORT_SUTUNLARI = [
+    ("Rapor No", "rapor_no"), ("Ekipman Adı", "ekipman_adi"), ("Kategori", "kategori"),
+    ("Firma", "firma"), ("Lokasyon", "lokasyon"), ("Marka/Model", "marka_model"),
+    ("Seri No", "seri_no"), ("Alt Kategori", "alt_kategori"), ("Periyot", "periyot"),
+    ("Geçerlilik Tarihi", "gecerlilik_tarihi"), ("Uygunluk", "uygunluk"), ("Proje", "proje_adi"),
+    ("Şehir", "sehir"), ("Açıklama", "aciklama"),
+]
+TUM_EXPORT_SUTUNLARI = [
+    sutun for sutun in SECILI_EXPORT_SUTUNLARI if sutun[1] not in ("proje_adi", "sehir")
+]
+
+def _build_raporlar_workbook(raporlar: List[dict], sutunlar: List[tuple]) -> io.BytesIO:
+    """Raporlar sayfasını oluşturup kaydeder; 10.000 satıra kadar CPU işi olduğu için thread'de çalışır"""
+    # openpyxl ağır bir modül; Excel özellikleri nadir kullanıldığı için ilk kullanımda yüklenir
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill, Alignment
     
     wb = Workbook()
     ws = wb.active
     ws.title = "Raporlar"
     
-    headers = [
-        "Rapor No", "Ekipman Adı", "Kategori", "Firma", "Lokasyon",
-        "Marka/Model", "Seri No", "Alt Kategori", "Periyot",
-        "Geçerlilik Tarihi", "Uygunluk", "Proje", "Şehir", "Açıklama", "Oluşturma Tarihi"
-    ]
+    headers = [baslik for baslik, _ in sutunlar] + ["Oluşturma Tarihi"]
     
     header_fill = PatternFill(start_color="1e40af", end_color="1e40af", fill_type="solid")
     header_font = Font(color="FFFFFF", bold=True)
@@ -53,24 +59,12 @@ async def export_excel_selected(request: ExcelExportRequest, current_user: dict
         cell.alignment = Alignment(horizontal="center", vertical="center")
     
     for row_idx, rapor in enumerate(raporlar, 2):
-        ws.cell(row=row_idx, column=1, value=rapor.get("rapor_no", ""))
-        ws.cell(row=row_idx, column=2, value=rapor.get("ekipman_adi", ""))
-        ws.cell(row=row_idx, column=3, value=rapor.get("kategori", ""))
-        ws.cell(row=row_idx, column=4, value=rapor.get("firma", ""))
-        ws.cell(row=row_idx, column=5, value=rapor.get("lokasyon", ""))
-        ws.cell(row=row_idx, column=6, value=rapor.get("marka_model", ""))
-        ws.cell(row=row_idx, column=7, value=rapor.get("seri_no", ""))
-        ws.cell(row=row_idx, column=8, value=rapor.get("alt_kategori", ""))
-        ws.cell(row=row_idx, column=9, value=rapor.get("periyot", ""))
-        ws.cell(row=row_idx, column=10, value=rapor.get("gecerlilik_tarihi", ""))
-        ws.cell(row=row_idx, column=11, value=rapor.get("uygunluk", ""))
-        ws.cell(row=row_idx, column=12, value=rapor.get("proje_adi", ""))
-        ws.cell(row=row_idx, column=13, value=rapor.get("sehir", ""))
-        ws.cell(row=row_idx, column=14, value=rapor.get("aciklama", ""))
+        for col, (_, alan) in enumerate(sutunlar, 1):
+            ws.cell(row=row_idx, column=col, value=rapor.get(alan, ""))
         created_at = rapor.get("created_at", "")
         if isinstance(created_at, str):
             created_at = datetime.fromisoformat(created_at)
-        ws.cell(row=row_idx, column=15, value=created_at.strftime("%Y-%m-%d %H:%M") if created_at else "")
+        ws.cell(row=row_idx, column=len(headers), value=created_at.strftime("%Y-%m-%d %H:%M") if created_at else "")
     
     for col in ws.columns:
         max_length = 0
@@ -87,6 +81,23 @@ async def export_excel_selected(request: ExcelExportRequest, current_user: dict
     excel_file = io.BytesIO()
     wb.save(excel_file)
     excel_file.seek(0)
+    return excel_file
+
+@router.post("/export")
+@limit_concurrency("excel_export")
+@with_time_limit("export")
+async def export_excel_selected(request: ExcelExportRequest, current_user: dict = Depends(get_current_user)):
+    """Seçili raporları Excel'e aktar"""
+    if not request.rapor_ids:
+        raise HTTPException(status_code=400, detail="En az bir rapor seçilmelidir")
+    
+    raporlar = await db.raporlar.find({"id": {"$in": request.rapor_ids}}, {"_id": 0}).to_list(10000)
+    
+    if not raporlar:
+        raise HTTPException(status_code=404, detail="Seçilen raporlar bulunamadı")
+    
+    # Workbook oluşturma ve kaydetme event loop'u bloklamasın
+    excel_file = await asyncio.to_thread(_build_raporlar_workbook, raporlar, SECILI_EXPORT_SUTUNLARI)
     
     return StreamingResponse(
         excel_file,
@@ -95,62 +106,13 @@ async def export_excel_selected(request: ExcelExportRequest, current_user: dict
     )
 
 @router.get("/export-all")
+@limit_concurrency("excel_export")
+@with_time_limit("export")
 async def export_excel(current_user: dict = Depends(get_current_user)):
     """Tüm raporları Excel'e aktar"""
-    raporlar = await db.raporlar.find({}, {"_id": 0}).to_list(10000)
-    
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Raporlar"
-    
-    headers = [
-        "Rapor No", "Ekipman Adı", "Kategori", "Firma", "Lokasyon",
-        "Marka/Model", "Seri No", "Alt Kategori", "Periyot",
-        "Geçerlilik Tarihi", "Uygunluk", "Açıklama", "Oluşturma Tarihi"
-    ]
-    
-    header_fill = PatternFill(start_color="1e40af", end_color="1e40af", fill_type="solid")
-    header_font = Font(color="FFFFFF", bold=True)
-    
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-    
-    for row_idx, rapor in enumerate(raporlar, 2):
-        ws.cell(row=row_idx, column=1, value=rapor.get("rapor_no", ""))
-        ws.cell(row=row_idx, column=2, value=rapor.get("ekipman_adi", ""))
-        ws.cell(row=row_idx, column=3, value=rapor.get("kategori", ""))
-        ws.cell(row=row_idx, column=4, value=rapor.get("firma", ""))
-        ws.cell(row=row_idx, column=5, value=rapor.get("lokasyon", ""))
-        ws.cell(row=row_idx, column=6, value=rapor.get("marka_model", ""))
-        ws.cell(row=row_idx, column=7, value=rapor.get("seri_no", ""))
-        ws.cell(row=row_idx, column=8, value=rapor.get("alt_kategori", ""))
-        ws.cell(row=row_idx, column=9, value=rapor.get("periyot", ""))
-        ws.cell(row=row_idx, column=10, value=rapor.get("gecerlilik_tarihi", ""))
-        ws.cell(row=row_idx, column=11, value=rapor.get("uygunluk", ""))
-        ws.cell(row=row_idx, column=12, value=rapor.get("aciklama", ""))
-        created_at = rapor.get("created_at", "")
-        if isinstance(created_at, str):
-            created_at = datetime.fromisoformat(created_at)
-        ws.cell(row=row_idx, column=13, value=created_at.strftime("%Y-%m-%d %H:%M") if created_at else "")
+    raporlar = await read_db("export").raporlar.find({}, {"_id": 0}).to_list(10000)
     
-    for col in ws.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(cell.value)
-            except (TypeError, AttributeError):
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column].width = adjusted_width
-    
-    excel_file = io.BytesIO()
-    wb.save(excel_file)
-    excel_file.seek(0)
+    excel_file = await asyncio.to_thread(_build_raporlar_workbook, raporlar, TUM_EXPORT_SUTUNLARI)
     
     return StreamingResponse(
         excel_file,
@@ -158,8 +120,12 @@ async def export_excel(current_user: dict = Depends(get_current_user)):
         headers={"Content-Disposition": "attachment; filename=raporlar.xlsx"}
     )
 
-@router.get("/template")
-async def download_template():
+@lru_cache(maxsize=1)
+def _build_rapor_template() -> PrecomputedResponse:
+    """Şablon sabit olduğu için workbook sadece ilk istekte üretilir"""
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill, Alignment
+    
     wb = Workbook()
     ws = wb.active
     ws.title = "Rapor Şablonu"
@@ -206,15 +172,112 @@ async def download_template():
     
     excel_file = io.BytesIO()
     wb.save(excel_file)
-    excel_file.seek(0)
     
-    return StreamingResponse(
-        excel_file,
+    return PrecomputedResponse(
+        excel_file.getvalue(),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": "attachment; filename=rapor_sablonu.xlsx"}
     )
 
+@router.get("/template")
+async def download_template(request: Request):
+    return _build_rapor_template().respond(request)
+
+def _parse_rapor_rows(content: bytes, proje_id: str, proje_adi: str, current_user: dict):
+    """Excel satırlarını rapor dökümanlarına çevirir; load_workbook ve satır işleme CPU işi olduğu için thread'de çalışır"""
+    from openpyxl import load_workbook
+    wb = load_workbook(io.BytesIO(content))
+    ws = wb.active
+    
+    errors = []
+    rapor_listesi = []
+    satirlar = []
+    
+    for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), 2):
+        if not any(row):
+            continue
+        
+        try:
+            def get_cell(index):
+                return row[index] if index < len(row) and row[index] is not None else None
+            
+            sehir = str(get_cell(0)) if get_cell(0) else None
+            ekipman_adi = str(get_cell(1)) if get_cell(1) else ""
+            kategori = str(get_cell(2)) if get_cell(2) else ""
+            firma = str(get_cell(3)) if get_cell(3) else ""
+            lokasyon = str(get_cell(4)) if get_cell(4) else None
+            marka_model = str(get_cell(5)) if get_cell(5) else None
+            seri_no = str(get_cell(6)) if get_cell(6) else None
+            alt_kategori = str(get_cell(7)) if get_cell(7) else None
+            periyot = str(get_cell(8)) if get_cell(8) else None
+            gecerlilik_tarihi = str(get_cell(9)) if get_cell(9) else None
+            uygunluk = str(get_cell(10)) if get_cell(10) else None
+            aciklama = str(get_cell(11)) if get_cell(11) else None
+            
+            if not ekipman_adi or not kategori or not firma:
+                errors.append(f"Satır {row_idx}: Zorunlu alanlar eksik (Ekipman Adı, Kategori, Firma)")
+                continue
+            
+            if not sehir:
+                errors.append(f"Satır {row_idx}: Şehir alanı zorunludur")
+                continue
+            
+            def turkish_lower(text):
+                text = text.strip()
+                text = text.replace('İ', 'i').replace('I', 'ı')
+                return text.lower()
+            
+            def normalize_turkish(text):
+                turkish_map = str.maketrans('ıİiIğĞüÜşŞöÖçÇ', 'iiiigguussoocc')
+                return turkish_lower(text).translate(turkish_map)
+            
+            sehir_normalized = normalize_turkish(sehir)
+            
+            sehir_obj = None
+            for s in SEHIRLER:
+                if normalize_turkish(s["isim"]) == sehir_normalized:
+                    sehir_obj = s
+                    sehir = s["isim"]
+                    break
+            
+            if not sehir_obj:
+                errors.append(f"Satır {row_idx}: Geçersiz şehir - '{sehir}'")
+                continue
+            
+            rapor_data = {
+                "id": str(uuid.uuid4()),
+                "proje_id": proje_id,
+                "proje_adi": proje_adi,
+                "sehir": sehir,
+                "sehir_kodu": sehir_obj["kod"],
+                "ekipman_adi": ekipman_adi,
+                "kategori": kategori,
+                "alt_kategori": alt_kategori,
+                "firma": firma,
+                "lokasyon": lokasyon,
+                "marka_model": marka_model,
+                "seri_no": seri_no,
+                "periyot": periyot,
+                "gecerlilik_tarihi": gecerlilik_tarihi,
+                "uygunluk": uygunluk,
+                "aciklama": aciklama,
+                "durum": "Aktif",
+                "created_by": current_user["id"],
+                "created_by_username": current_user.get("username", current_user.get("email", "")),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            }
+            
+            rapor_listesi.append(rapor_data)
+            satirlar.append(row_idx)
+            
+        except Exception as e:
+            errors.append(f"Satır {row_idx}: {str(e)}")
+    
+    return rapor_listesi, satirlar, errors
+
 @router.post("/import")
+@limit_concurrency("excel_import")
 async def import_excel(
     file: UploadFile = File(...),
     proje_id: str = Form(...),
@@ -226,105 +289,30 @@ async def import_excel(
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="Sadece Excel dosyaları yüklenebilir")
     
-    proje = await db.projeler.find_one({"id": proje_id}, {"_id": 0})
+    proje = await projeler_cache.get(proje_id)
     if not proje:
         raise HTTPException(status_code=404, detail="Proje bulunamadı")
     
     proje_adi = proje.get("proje_adi", "")
     
     content = await file.read()
-    excel_file = io.BytesIO(content)
     
     try:
-        wb = load_workbook(excel_file)
-        ws = wb.active
+        rapor_listesi, satirlar, errors = await asyncio.to_thread(
+            _parse_rapor_rows, content, proje_id, proje_adi, current_user
+        )
         
-        imported_count = 0
-        errors = []
+        # Rapor numaraları şehir başına tek sorguyla alınan son numaradan sırayla verilir
+        sayaclar = await last_rapor_numbers(rapor["sehir"] for rapor in rapor_listesi)
+        yil = datetime.now(timezone.utc).strftime("%Y")
+        for rapor_data in rapor_listesi:
+            prefix = f"PK{yil}-{get_sehir_kodu(rapor_data['sehir'])}"
+            sayaclar[prefix] = sayaclar.get(prefix, 0) + 1
+            rapor_data["rapor_no"] = f"{prefix}{str(sayaclar[prefix]).zfill(3)}"
         
-        for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), 2):
-            if not any(row):
-                continue
-            
-            try:
-                def get_cell(index):
-                    return row[index] if index < len(row) and row[index] is not None else None
-                
-                sehir = str(get_cell(0)) if get_cell(0) else None
-                ekipman_adi = str(get_cell(1)) if get_cell(1) else ""
-                kategori = str(get_cell(2)) if get_cell(2) else ""
-                firma = str(get_cell(3)) if get_cell(3) else ""
-                lokasyon = str(get_cell(4)) if get_cell(4) else None
-                marka_model = str(get_cell(5)) if get_cell(5) else None
-                seri_no = str(get_cell(6)) if get_cell(6) else None
-                alt_kategori = str(get_cell(7)) if get_cell(7) else None
-                periyot = str(get_cell(8)) if get_cell(8) else None
-                gecerlilik_tarihi = str(get_cell(9)) if get_cell(9) else None
-                uygunluk = str(get_cell(10)) if get_cell(10) else None
-                aciklama = str(get_cell(11)) if get_cell(11) else None
-                
-                if not ekipman_adi or not kategori or not firma:
-                    errors.append(f"Satır {row_idx}: Zorunlu alanlar eksik (Ekipman Adı, Kategori, Firma)")
-                    continue
-                
-                if not sehir:
-                    errors.append(f"Satır {row_idx}: Şehir alanı zorunludur")
-                    continue
-                
-                def turkish_lower(text):
-                    text = text.strip()
-                    text = text.replace('İ', 'i').replace('I', 'ı')
-                    return text.lower()
-                
-                def normalize_turkish(text):
-                    turkish_map = str.maketrans('ıİiIğĞüÜşŞöÖçÇ', 'iiiigguussoocc')
-                    return turkish_lower(text).translate(turkish_map)
-                
-                sehir_normalized = normalize_turkish(sehir)
-                
-                sehir_obj = None
-                for s in SEHIRLER:
-                    if normalize_turkish(s["isim"]) == sehir_normalized:
-                        sehir_obj = s
-                        sehir = s["isim"]
-                        break
-                
-                if not sehir_obj:
-                    errors.append(f"Satır {row_idx}: Geçersiz şehir - '{sehir}'")
-                    continue
-                
-                rapor_no = await generate_rapor_no(sehir)
-                
-                rapor_data = {
-                    "id": str(uuid.uuid4()),
-                    "rapor_no": rapor_no,
-                    "proje_id": proje_id,
-                    "proje_adi": proje_adi,
-                    "sehir": sehir,
-                    "sehir_kodu": sehir_obj["kod"],
-                    "ekipman_adi": ekipman_adi,
-                    "kategori": kategori,
-                    "alt_kategori": alt_kategori,
-                    "firma": firma,
-                    "lokasyon": lokasyon,
-                    "marka_model": marka_model,
-                    "seri_no": seri_no,
-                    "periyot": periyot,
-                    "gecerlilik_tarihi": gecerlilik_tarihi,
-                    "uygunluk": uygunluk,
-                    "aciklama": aciklama,
-                    "durum": "Aktif",
-                    "created_by": current_user["id"],
-                    "created_by_username": current_user.get("username", current_user.get("email", "")),
-                    "created_at": datetime.now(timezone.utc).isoformat(),
-                    "updated_at": datetime.now(timezone.utc).isoformat()
-                }
-                
-                await db.raporlar.insert_one(rapor_data)
-                imported_count += 1
-                
-            except Exception as e:
-                errors.append(f"Satır {row_idx}: {str(e)}")
+        imported_count = await insert_rows(db.raporlar, rapor_listesi, satirlar, errors)
+        if imported_count:
+            await bump_version("raporlar")
         
         return {
             "message": f"{imported_count} rapor başarıyla içe aktarıldı",
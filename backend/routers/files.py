@@ -1,12 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Request
+from pydantic import BaseModel
 from typing import List
 from pathlib import Path
 from datetime import datetime, timezone
+import asyncio
+import hashlib
 import uuid
 
 from routers.auth import get_current_user
 from database import db
+from media_cleanup import schedule_unlink
+from http_cache import file_response, PRIVATE_IMMUTABLE, PRIVATE_REVALIDATE
+from image_processing import schedule_recompression, may_be_replaced
 
 router = APIRouter(tags=["Files"])
 
@@ -14,6 +19,23 @@ ROOT_DIR = Path(__file__).parent.parent
 UPLOAD_DIR = ROOT_DIR.parent / "uploads"
 UPLOAD_DIR.mkdir(exist_ok=True)
 
+MAX_FILE_SIZE = 4 * 1024 * 1024 * 1024
+ALLOWED_TYPES = ["image/jpeg", "image/jpg", "image/png", "application/pdf"]
+
+# Tek istekte sorgulanabilecek en fazla rapor sayısı (rapor listesi sayfa boyutu)
+TOPLU_DOSYA_LIMIT = 500
+
+class TopluDosyaRequest(BaseModel):
+    rapor_ids: List[str]
+    sadece_sayi: bool = False
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
 @router.post("/upload/{rapor_id}")
 async def upload_file(
     rapor_id: str,
@@ -24,11 +46,10 @@ async def upload_file(
         raise HTTPException(status_code=403, detail="Dosya yükleme yetkiniz yok")
     
     content = await file.read()
-    if len(content) > 4 * 1024 * 1024 * 1024:
+    if len(content) > MAX_FILE_SIZE:
         raise HTTPException(status_code=400, detail="Dosya boyutu 4GB'dan büyük olamaz")
     
-    allowed_types = ["image/jpeg", "image/jpg", "image/png", "application/pdf"]
-    if file.content_type not in allowed_types:
+    if file.content_type not in ALLOWED_TYPES:
         raise HTTPException(status_code=400, detail="Sadece JPG, PNG ve PDF formatları desteklenir")
     
     rapor = await db.raporlar.find_one({"id": rapor_id})
@@ -43,6 +64,8 @@ async def upload_file(
     with open(file_path, "wb") as f:
         f.write(content)
     
+    icerik_hash = await asyncio.to_thread(lambda: hashlib.sha256(content).hexdigest())
+    
     medya = {
         "id": file_id,
         "rapor_id": rapor_id,
@@ -50,10 +73,12 @@ async def upload_file(
         "dosya_yolu": str(file_path),
         "dosya_tipi": file.content_type,
         "dosya_boyutu": len(content),
+        "icerik_hash": icerik_hash,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
     await db.medya_dosyalari.insert_one(medya)
+    schedule_recompression(medya)
     
     return {"message": "Dosya yüklendi", "file_id": file_id}
 
@@ -65,8 +90,32 @@ async def get_dosyalar(rapor_id: str, current_user: dict = Depends(get_current_u
             dosya['created_at'] = datetime.fromisoformat(dosya['created_at'])
     return dosyalar
 
+@router.post("/dosyalar/toplu")
+async def get_dosyalar_toplu(request: TopluDosyaRequest, current_user: dict = Depends(get_current_user)):
+    """Birden fazla raporun dosyalarını (veya sadece dosya sayılarını) rapor bazında gruplu döndürür"""
+    rapor_ids = list(dict.fromkeys(request.rapor_ids))
+    if len(rapor_ids) > TOPLU_DOSYA_LIMIT:
+        raise HTTPException(status_code=400, detail=f"En fazla {TOPLU_DOSYA_LIMIT} rapor sorgulanabilir")
+    
+    query = {"rapor_id": {"$in": rapor_ids}}
+    
+    if request.sadece_sayi:
+        sayilar = {rapor_id: 0 for rapor_id in rapor_ids}
+        pipeline = [
+            {"$match": query},
+            {"$group": {"_id": "$rapor_id", "count": {"$sum": 1}}}
+        ]
+        async for row in db.medya_dosyalari.aggregate(pipeline):
+            sayilar[row["_id"]] = row["count"]
+        return sayilar
+    
+    gruplu = {rapor_id: [] for rapor_id in rapor_ids}
+    async for dosya in db.medya_dosyalari.find(query, {"_id": 0}).sort("created_at", 1):
+        gruplu[dosya["rapor_id"]].append(dosya)
+    return gruplu
+
 @router.get("/dosyalar/{dosya_id}/indir")
-async def download_dosya(dosya_id: str, current_user: dict = Depends(get_current_user)):
+async def download_dosya(dosya_id: str, request: Request, current_user: dict = Depends(get_current_user)):
     dosya = await db.medya_dosyalari.find_one({"id": dosya_id}, {"_id": 0})
     if not dosya:
         raise HTTPException(status_code=404, detail="Dosya bulunamadı")
@@ -89,14 +138,31 @@ async def download_dosya(dosya_id: str, current_user: dict = Depends(get_current
     
     media_type = media_type_map.get(file_ext, dosya.get("dosya_tipi", "application/octet-stream"))
     
-    return FileResponse(
+    # ETag içerik özetinden gelir; yeniden sıkıştırma özeti de günceller
+    icerik_hash = dosya.get("icerik_hash")
+    if not icerik_hash:
+        # Eski kayıtlar için bir kez hesaplanıp saklanır
+        icerik_hash = await asyncio.to_thread(_file_sha256, str(dosya_path))
+        await db.medya_dosyalari.update_one({"id": dosya_id}, {"$set": {"icerik_hash": icerik_hash}})
+    
+    stat = await asyncio.to_thread(dosya_path.stat)
+    # Yeniden sıkıştırma içeriği aynı URL'de değiştirir ve updated_at yazar
+    modified_at = dosya.get("updated_at") or dosya.get("created_at")
+    if isinstance(modified_at, str):
+        modified_at = datetime.fromisoformat(modified_at)
+    last_modified = modified_at or datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+    # Henüz sıkıştırılmamış görseller değişebilir; tarayıcı ETag ile doğrulamalı
+    cache_control = PRIVATE_REVALIDATE if may_be_replaced(dosya) else PRIVATE_IMMUTABLE
+    
+    return file_response(
+        request,
         path=str(dosya_path),
-        filename=dosya["dosya_adi"],
+        size=stat.st_size,
+        etag=f'"{icerik_hash[:32]}"',
+        last_modified=last_modified,
         media_type=media_type,
-        headers={
-            "Content-Disposition": f'inline; filename="{dosya["dosya_adi"]}"',
-            "Cache-Control": "public, max-age=3600"
-        }
+        headers={"Content-Disposition": f'inline; filename="{dosya["dosya_adi"]}"'},
+        cache_control=cache_control
     )
 
 @router.delete("/dosyalar/{dosya_id}")
@@ -108,9 +174,6 @@ async def delete_dosya(dosya_id: str, current_user: dict = Depends(get_current_u
     if not dosya:
         raise HTTPException(status_code=404, detail="Dosya bulunamadı")
     
-    dosya_path = Path(dosya["dosya_yolu"])
-    if dosya_path.exists():
-        dosya_path.unlink()
-    
     await db.medya_dosyalari.delete_one({"id": dosya_id})
+    schedule_unlink([dosya["dosya_yolu"], dosya.get("orijinal_yolu")])
     return {"message": "Dosya silindi"}
@@ -1,25 +1,36 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Request
 from fastapi.responses import StreamingResponse
+from functools import lru_cache
 from typing import List, Optional
 from datetime import datetime, timezone
+import asyncio
 import io
 import uuid
 
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-
 from models import IskeleBileseni, IskeleBileseniCreate
 from routers.auth import get_current_user
-from database import db
+from database import db, read_db, with_time_limit
+from http_cache import PrecomputedResponse
+from admission import limit_concurrency
+from serialization import FieldSelector
+from change_versions import bump_version
+from reference_cache import projeler_cache, bilesen_adlari_cache
+from utils import insert_rows
 
 router = APIRouter(tags=["Iskele"])
 
+iskele_fields = FieldSelector(IskeleBileseni, views={
+    "summary": [
+        "id", "proje_id", "proje_adi", "bileşen_adi", "malzeme_kodu", "bileşen_adedi",
+        "firma_adi", "gecerlilik_tarihi", "uygunluk", "created_at"
+    ]
+})
+
 # ==================== İSKELE BİLEŞEN ADLARI ====================
 
 @router.get("/iskele-bilesen-adlari")
 async def get_iskele_bilesen_adlari(current_user: dict = Depends(get_current_user)):
-    bilesen_adlari = await db.iskele_bilesen_adlari.find({}, {"_id": 0}).to_list(1000)
-    return bilesen_adlari
+    return await bilesen_adlari_cache.all()
 
 @router.post("/iskele-bilesen-adlari")
 async def create_iskele_bilesen_adi(
@@ -43,6 +54,7 @@ async def create_iskele_bilesen_adi(
     }
     
     await db.iskele_bilesen_adlari.insert_one(bilesen_data)
+    await bump_version("iskele_bilesen_adlari")
     created = await db.iskele_bilesen_adlari.find_one({"id": bilesen_id}, {"_id": 0})
     return created
 
@@ -66,6 +78,7 @@ async def update_iskele_bilesen_adi(
     }
     
     await db.iskele_bilesen_adlari.update_one({"id": bilesen_id}, {"$set": update_data})
+    await bump_version("iskele_bilesen_adlari")
     updated = await db.iskele_bilesen_adlari.find_one({"id": bilesen_id}, {"_id": 0})
     return updated
 
@@ -80,6 +93,7 @@ async def delete_iskele_bilesen_adi(
     result = await db.iskele_bilesen_adlari.delete_one({"id": bilesen_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Bileşen adı bulunamadı")
+    await bump_version("iskele_bilesen_adlari")
     
     return {"message": "Bileşen adı silindi"}
 
@@ -88,13 +102,16 @@ async def delete_iskele_bilesen_adi(
 @router.get("/iskele-bilesenleri")
 async def get_iskele_bilesenleri(
     current_user: dict = Depends(get_current_user),
-    limit: int = 500
+    limit: int = 500,
+    view: Optional[str] = None,
+    fields: Optional[str] = None
 ):
+    secili_alanlar = iskele_fields.resolve(view, fields)
     query = {}
     if current_user.get("role") == "viewer" and current_user.get("firma_adi"):
         query["firma_adi"] = current_user.get("firma_adi")
     
-    bilesenleri = await db.iskele_bilesenleri.find(query, {"_id": 0}).to_list(limit)
+    bilesenleri = await db.iskele_bilesenleri.find(query, iskele_fields.projection(secili_alanlar)).to_list(limit)
     return bilesenleri
 
 @router.post("/iskele-bilesenleri")
@@ -105,7 +122,7 @@ async def create_iskele_bileseni(
     if current_user["role"] not in ["admin", "inspector"]:
         raise HTTPException(status_code=403, detail="İskele bileşeni ekleme yetkiniz yok")
     
-    proje = await db.projeler.find_one({"id": bilesen.proje_id}, {"_id": 0})
+    proje = await projeler_cache.get(bilesen.proje_id)
     if not proje:
         raise HTTPException(status_code=404, detail="Proje bulunamadı")
     
@@ -122,6 +139,7 @@ async def create_iskele_bileseni(
     }
     
     await db.iskele_bilesenleri.insert_one(bilesen_data)
+    await bump_version("iskele_bilesenleri")
     
     created = await db.iskele_bilesenleri.find_one({"id": bilesen_id}, {"_id": 0})
     return created
@@ -157,6 +175,7 @@ async def update_iskele_bileseni(
         {"id": bilesen_id},
         {"$set": update_data}
     )
+    await bump_version("iskele_bilesenleri")
     
     updated = await db.iskele_bilesenleri.find_one({"id": bilesen_id}, {"_id": 0})
     return updated
@@ -172,6 +191,7 @@ async def delete_iskele_bileseni(
     result = await db.iskele_bilesenleri.delete_one({"id": bilesen_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="İskele bileşeni bulunamadı")
+    await bump_version("iskele_bilesenleri")
     
     return {"message": "İskele bileşeni silindi"}
 
@@ -187,17 +207,15 @@ async def bulk_delete_iskele_bilesenleri_route(
         raise HTTPException(status_code=400, detail="Silinecek bileşen ID'leri belirtilmedi")
     
     result = await db.iskele_bilesenleri.delete_many({"id": {"$in": bilesen_ids}})
+    await bump_version("iskele_bilesenleri")
     return {"message": f"{result.deleted_count} iskele bileşeni silindi", "deleted_count": result.deleted_count}
 
 # ==================== İSKELE EXCEL ====================
 
-@router.get("/iskele-bilesenleri/excel/export")
-async def export_iskele_excel(current_user: dict = Depends(get_current_user)):
-    query = {}
-    if current_user.get("role") == "viewer" and current_user.get("firma_adi"):
-        query["firma_adi"] = current_user.get("firma_adi")
-    
-    bilesenleri = await db.iskele_bilesenleri.find(query, {"_id": 0}).to_list(1000)
+def _build_iskele_workbook(bilesenleri: List[dict]) -> io.BytesIO:
+    """İskele bileşenleri sayfasını oluşturup kaydeder; CPU işi olduğu için thread'de çalışır"""
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill, Alignment
     
     wb = Workbook()
     ws = wb.active
@@ -234,6 +252,20 @@ async def export_iskele_excel(current_user: dict = Depends(get_current_user)):
     excel_file = io.BytesIO()
     wb.save(excel_file)
     excel_file.seek(0)
+    return excel_file
+
+@router.get("/iskele-bilesenleri/excel/export")
+@limit_concurrency("excel_export")
+@with_time_limit("export")
+async def export_iskele_excel(current_user: dict = Depends(get_current_user)):
+    query = {}
+    if current_user.get("role") == "viewer" and current_user.get("firma_adi"):
+        query["firma_adi"] = current_user.get("firma_adi")
+    
+    bilesenleri = await read_db("export").iskele_bilesenleri.find(query, {"_id": 0}).to_list(1000)
+    
+    # Workbook oluşturma ve kaydetme event loop'u bloklamasın
+    excel_file = await asyncio.to_thread(_build_iskele_workbook, bilesenleri)
     
     return StreamingResponse(
         excel_file,
@@ -241,8 +273,12 @@ async def export_iskele_excel(current_user: dict = Depends(get_current_user)):
         headers={"Content-Disposition": f"attachment; filename=iskele_bilesenleri_{datetime.now().strftime('%Y%m%d')}.xlsx"}
     )
 
-@router.get("/iskele-bilesenleri/excel/template")
-async def download_iskele_template():
+@lru_cache(maxsize=1)
+def _build_iskele_template() -> PrecomputedResponse:
+    """Şablon sabit olduğu için workbook sadece ilk istekte üretilir"""
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill, Alignment
+    
     wb = Workbook()
     ws = wb.active
     ws.title = "İskele Bileşenleri Şablonu"
@@ -277,15 +313,87 @@ async def download_iskele_template():
     
     excel_file = io.BytesIO()
     wb.save(excel_file)
-    excel_file.seek(0)
     
-    return StreamingResponse(
-        excel_file,
+    return PrecomputedResponse(
+        excel_file.getvalue(),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": "attachment; filename=iskele_bilesenleri_sablonu.xlsx"}
     )
 
+@router.get("/iskele-bilesenleri/excel/template")
+async def download_iskele_template(request: Request):
+    return _build_iskele_template().respond(request)
+
+def _parse_iskele_rows(content: bytes, proje_id: str, proje_adi: str, current_user: dict):
+    """Excel satırlarını bileşen dökümanlarına çevirir; load_workbook ve satır işleme CPU işi olduğu için thread'de çalışır"""
+    from openpyxl import load_workbook
+    wb = load_workbook(io.BytesIO(content))
+    ws = wb.active
+    
+    errors = []
+    bilesen_listesi = []
+    satirlar = []
+    
+    for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), 2):
+        if not any(row):
+            continue
+        
+        try:
+            def get_cell(index):
+                return row[index] if index < len(row) and row[index] is not None else None
+            
+            bilesen_adi = str(get_cell(0)) if get_cell(0) else ""
+            malzeme_kodu = str(get_cell(1)) if get_cell(1) else ""
+            bilesen_adedi_raw = get_cell(2)
+            firma_adi = str(get_cell(3)) if get_cell(3) else ""
+            gecerlilik_tarihi = str(get_cell(4)) if get_cell(4) else None
+            uygunluk = str(get_cell(5)) if get_cell(5) else "Uygun"
+            aciklama = str(get_cell(6)) if get_cell(6) else None
+            
+            if not bilesen_adi or not malzeme_kodu or not firma_adi:
+                errors.append(f"Satır {row_idx}: Zorunlu alanlar eksik")
+                continue
+            
+            try:
+                bilesen_adedi = int(bilesen_adedi_raw) if bilesen_adedi_raw else 1
+                if bilesen_adedi < 1:
+                    errors.append(f"Satır {row_idx}: Bileşen adedi en az 1 olmalıdır")
+                    continue
+            except (ValueError, TypeError):
+                errors.append(f"Satır {row_idx}: Bileşen adedi geçersiz")
+                continue
+            
+            bilesen_id = str(uuid.uuid4())
+            bilesen_data = {
+                "id": bilesen_id,
+                "proje_id": proje_id,
+                "proje_adi": proje_adi,
+                "bileşen_adi": bilesen_adi,
+                "malzeme_kodu": malzeme_kodu,
+                "bileşen_adedi": bilesen_adedi,
+                "firma_adi": firma_adi,
+                "iskele_periyodu": "6 Aylık",
+                "gecerlilik_tarihi": gecerlilik_tarihi,
+                "uygunluk": uygunluk,
+                "aciklama": aciklama,
+                "gorseller": [],
+                "created_by": current_user["id"],
+                "created_by_username": current_user.get("username", current_user.get("email", "")),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            }
+            
+            bilesen_listesi.append(bilesen_data)
+            satirlar.append(row_idx)
+            
+        except Exception as e:
+            errors.append(f"Satır {row_idx}: {str(e)}")
+            continue
+    
+    return bilesen_listesi, satirlar, errors
+
 @router.post("/iskele-bilesenleri/excel/import")
+@limit_concurrency("excel_import")
 async def import_iskele_excel(
     file: UploadFile = File(...),
     proje_id: str = Form(...),
@@ -297,77 +405,23 @@ async def import_iskele_excel(
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="Sadece Excel dosyaları yüklenebilir")
     
-    proje = await db.projeler.find_one({"id": proje_id}, {"_id": 0})
+    proje = await projeler_cache.get(proje_id)
     if not proje:
         raise HTTPException(status_code=404, detail="Proje bulunamadı")
     
     proje_adi = proje.get("proje_adi", "")
     
     content = await file.read()
-    excel_file = io.BytesIO(content)
     
     try:
-        wb = load_workbook(excel_file)
-        ws = wb.active
+        bilesen_listesi, satirlar, errors = await asyncio.to_thread(
+            _parse_iskele_rows, content, proje_id, proje_adi, current_user
+        )
         
-        imported_count = 0
-        errors = []
+        imported_count = await insert_rows(db.iskele_bilesenleri, bilesen_listesi, satirlar, errors)
         
-        for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), 2):
-            if not any(row):
-                continue
-            
-            try:
-                def get_cell(index):
-                    return row[index] if index < len(row) and row[index] is not None else None
-                
-                bilesen_adi = str(get_cell(0)) if get_cell(0) else ""
-                malzeme_kodu = str(get_cell(1)) if get_cell(1) else ""
-                bilesen_adedi_raw = get_cell(2)
-                firma_adi = str(get_cell(3)) if get_cell(3) else ""
-                gecerlilik_tarihi = str(get_cell(4)) if get_cell(4) else None
-                uygunluk = str(get_cell(5)) if get_cell(5) else "Uygun"
-                aciklama = str(get_cell(6)) if get_cell(6) else None
-                
-                if not bilesen_adi or not malzeme_kodu or not firma_adi:
-                    errors.append(f"Satır {row_idx}: Zorunlu alanlar eksik")
-                    continue
-                
-                try:
-                    bilesen_adedi = int(bilesen_adedi_raw) if bilesen_adedi_raw else 1
-                    if bilesen_adedi < 1:
-                        errors.append(f"Satır {row_idx}: Bileşen adedi en az 1 olmalıdır")
-                        continue
-                except (ValueError, TypeError):
-                    errors.append(f"Satır {row_idx}: Bileşen adedi geçersiz")
-                    continue
-                
-                bilesen_id = str(uuid.uuid4())
-                bilesen_data = {
-                    "id": bilesen_id,
-                    "proje_id": proje_id,
-                    "proje_adi": proje_adi,
-                    "bileşen_adi": bilesen_adi,
-                    "malzeme_kodu": malzeme_kodu,
-                    "bileşen_adedi": bilesen_adedi,
-                    "firma_adi": firma_adi,
-                    "iskele_periyodu": "6 Aylık",
-                    "gecerlilik_tarihi": gecerlilik_tarihi,
-                    "uygunluk": uygunluk,
-                    "aciklama": aciklama,
-                    "gorseller": [],
-                    "created_by": current_user["id"],
-                    "created_by_username": current_user.get("username", current_user.get("email", "")),
-                    "created_at": datetime.now(timezone.utc).isoformat(),
-                    "updated_at": datetime.now(timezone.utc).isoformat()
-                }
-                
-                await db.iskele_bilesenleri.insert_one(bilesen_data)
-                imported_count += 1
-                
-            except Exception as e:
-                errors.append(f"Satır {row_idx}: {str(e)}")
-                continue
+        if imported_count:
+            await bump_version("iskele_bilesenleri")
         
         return {
             "message": f"{imported_count} iskele bileşeni başarıyla içe aktarıldı",
@@ -5,17 +5,19 @@ from datetime import datetime, timezone
 from models.kalibrasyon import KalibrasyonCihazi, KalibrasyonCihaziCreate
 from routers.auth import get_current_user
 from database import db
+from serialization import LeanSerializer
+from change_versions import bump_version
+from reference_cache import kalibrasyon_cache
 
 router = APIRouter(prefix="/kalibrasyon", tags=["Kalibrasyon"])
 
+kalibrasyon_serializer = LeanSerializer(KalibrasyonCihazi)
+
 @router.get("", response_model=List[KalibrasyonCihazi])
 async def get_kalibrasyon_cihazlari(current_user: dict = Depends(get_current_user)):
     """Tüm kalibrasyon cihazlarını listele"""
-    cihazlar = await db.kalibrasyon_cihazlari.find({}, {"_id": 0}).to_list(1000)
-    for cihaz in cihazlar:
-        if isinstance(cihaz.get('created_at'), str):
-            cihaz['created_at'] = datetime.fromisoformat(cihaz['created_at'])
-    return cihazlar
+    cihazlar = await kalibrasyon_cache.all()
+    return kalibrasyon_serializer.response(cihazlar)
 
 @router.post("", response_model=KalibrasyonCihazi)
 async def create_kalibrasyon_cihazi(
@@ -37,6 +39,7 @@ async def create_kalibrasyon_cihazi(
     doc = cihaz.model_dump()
     doc['created_at'] = doc['created_at'].isoformat()
     await db.kalibrasyon_cihazlari.insert_one(doc)
+    await bump_version("kalibrasyon_cihazlari")
     
     return cihaz
 
@@ -62,6 +65,7 @@ async def update_kalibrasyon_cihazi(
             "kalibrasyon_tarihi": cihaz_data.kalibrasyon_tarihi
         }}
     )
+    await bump_version("kalibrasyon_cihazlari")
     
     updated = await db.kalibrasyon_cihazlari.find_one({"id": cihaz_id}, {"_id": 0})
     if isinstance(updated.get('created_at'), str):
@@ -77,5 +81,6 @@ async def delete_kalibrasyon_cihazi(cihaz_id: str, current_user: dict = Depends(
     result = await db.kalibrasyon_cihazlari.delete_one({"id": cihaz_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Cihaz bulunamadı")
+    await bump_version("kalibrasyon_cihazlari")
     
     return {"message": "Cihaz silindi"}
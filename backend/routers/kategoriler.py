@@ -1,19 +1,27 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from typing import List
 from datetime import datetime
 
 from models import Kategori, KategoriCreate
 from routers.auth import get_current_user
 from database import db
+from change_versions import bump_version
+from http_cache import conditional_get, etag_headers
+from reference_cache import kategoriler_cache
 
 router = APIRouter(prefix="/kategoriler", tags=["Kategoriler"])
 
 @router.get("", response_model=List[Kategori])
-async def get_kategoriler(current_user: dict = Depends(get_current_user)):
-    kategoriler = await db.kategoriler.find({}, {"_id": 0}).to_list(1000)
+async def get_kategoriler(request: Request, response: Response, current_user: dict = Depends(get_current_user)):
+    etag, cached = await conditional_get(request, ["kategoriler"], current_user)
+    if cached:
+        return cached
+    
+    kategoriler = await kategoriler_cache.all()
     for kat in kategoriler:
         if isinstance(kat['created_at'], str):
             kat['created_at'] = datetime.fromisoformat(kat['created_at'])
+    response.headers.update(etag_headers(etag))
     return kategoriler
 
 @router.post("", response_model=Kategori)
@@ -25,6 +33,7 @@ async def create_kategori(kategori_create: KategoriCreate, current_user: dict =
     doc = kategori.model_dump()
     doc['created_at'] = doc['created_at'].isoformat()
     await db.kategoriler.insert_one(doc)
+    await bump_version("kategoriler")
     return kategori
 
 @router.put("/{kategori_id}")
@@ -38,6 +47,7 @@ async def update_kategori(kategori_id: str, kategori_update: KategoriCreate, cur
     
     update_data = kategori_update.model_dump()
     await db.kategoriler.update_one({"id": kategori_id}, {"$set": update_data})
+    await bump_version("kategoriler")
     
     updated_kategori = await db.kategoriler.find_one({"id": kategori_id}, {"_id": 0})
     return updated_kategori
@@ -50,6 +60,7 @@ async def delete_kategori(kategori_id: str, current_user: dict = Depends(get_cur
     result = await db.kategoriler.delete_one({"id": kategori_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Kategori bulunamadı")
+    await bump_version("kategoriler")
     return {"message": "Kategori silindi"}
 
 @router.post("/bulk-delete")
@@ -58,4 +69,5 @@ async def bulk_delete_kategoriler(kategori_ids: List[str], current_user: dict =
         raise HTTPException(status_code=403, detail="Bu işlem için yetkiniz yok")
     
     result = await db.kategoriler.delete_many({"id": {"$in": kategori_ids}})
+    await bump_version("kategoriler")
     return {"message": f"{result.deleted_count} kategori silindi", "deleted_count": result.deleted_count}
@@ -1,29 +1,41 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Request
 from fastapi.responses import StreamingResponse
-from typing import List
+from functools import lru_cache
+from typing import List, Optional
 from datetime import datetime, timezone
+import asyncio
 import io
 import uuid
 
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-
 from models.makine import Makine, MakineCreate, MakineUpdate
 from routers.auth import get_current_user
-from database import db
+from database import db, read_db, with_time_limit
+from http_cache import PrecomputedResponse
+from admission import limit_concurrency
+from serialization import LeanSerializer, FieldSelector
+from reference_cache import projeler_cache
+from utils import insert_rows
 
 router = APIRouter(prefix="/makineler", tags=["Makineler"])
 
+makine_serializer = LeanSerializer(Makine)
+makine_fields = FieldSelector(Makine, views={
+    "summary": [
+        "id", "proje_id", "proje_adi", "makine_turu", "firma", "plaka_seri_no",
+        "periyodik_kontrol_tarihi", "sigorta_tarihi", "operator_adi", "durum", "created_at"
+    ]
+})
+
 @router.get("", response_model=List[Makine])
-async def get_makineler(current_user: dict = Depends(get_current_user)):
+async def get_makineler(
+    view: Optional[str] = None,
+    fields: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
     """Tüm makineleri listele"""
-    makineler = await db.makineler.find({}, {"_id": 0}).to_list(1000)
-    for makine in makineler:
-        if isinstance(makine.get('created_at'), str):
-            makine['created_at'] = datetime.fromisoformat(makine['created_at'])
-        if isinstance(makine.get('updated_at'), str):
-            makine['updated_at'] = datetime.fromisoformat(makine['updated_at'])
-    return makineler
+    secili_alanlar = makine_fields.resolve(view, fields)
+    makineler = await db.makineler.find({}, makine_fields.projection(secili_alanlar)).to_list(1000)
+    return makine_serializer.response(makineler, secili_alanlar)
 
 @router.get("/{makine_id}", response_model=Makine)
 async def get_makine(makine_id: str, current_user: dict = Depends(get_current_user)):
@@ -105,10 +117,10 @@ async def bulk_delete_makineler(makine_ids: List[str], current_user: dict = Depe
     return {"message": f"{result.deleted_count} makine silindi", "deleted_count": result.deleted_count}
 
 # Excel Endpoints
-@router.get("/excel/export")
-async def export_makineler_excel(current_user: dict = Depends(get_current_user)):
-    """Tüm makineleri Excel'e aktar"""
-    makineler = await db.makineler.find({}, {"_id": 0}).to_list(10000)
+def _build_makineler_workbook(makineler: List[dict]) -> io.BytesIO:
+    """Makineler sayfasını oluşturup kaydeder; 10.000 satıra kadar CPU işi olduğu için thread'de çalışır"""
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill, Alignment
     
     wb = Workbook()
     ws = wb.active
@@ -163,6 +175,17 @@ async def export_makineler_excel(current_user: dict = Depends(get_current_user))
     excel_file = io.BytesIO()
     wb.save(excel_file)
     excel_file.seek(0)
+    return excel_file
+
+@router.get("/excel/export")
+@limit_concurrency("excel_export")
+@with_time_limit("export")
+async def export_makineler_excel(current_user: dict = Depends(get_current_user)):
+    """Tüm makineleri Excel'e aktar"""
+    makineler = await read_db("export").makineler.find({}, {"_id": 0}).to_list(10000)
+    
+    # Workbook oluşturma ve kaydetme event loop'u bloklamasın
+    excel_file = await asyncio.to_thread(_build_makineler_workbook, makineler)
     
     return StreamingResponse(
         excel_file,
@@ -170,9 +193,12 @@ async def export_makineler_excel(current_user: dict = Depends(get_current_user))
         headers={"Content-Disposition": f"attachment; filename=makineler_{len(makineler)}_adet.xlsx"}
     )
 
-@router.get("/excel/template")
-async def download_makine_template():
-    """Makine Excel şablonunu indir"""
+@lru_cache(maxsize=1)
+def _build_makine_template() -> PrecomputedResponse:
+    """Şablon sabit olduğu için workbook sadece ilk istekte üretilir"""
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill, Alignment
+    
     wb = Workbook()
     ws = wb.active
     ws.title = "Makine Şablonu"
@@ -210,15 +236,89 @@ async def download_makine_template():
     
     excel_file = io.BytesIO()
     wb.save(excel_file)
-    excel_file.seek(0)
     
-    return StreamingResponse(
-        excel_file,
+    return PrecomputedResponse(
+        excel_file.getvalue(),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": "attachment; filename=makine_sablonu.xlsx"}
     )
 
+@router.get("/excel/template")
+async def download_makine_template(request: Request):
+    """Makine Excel şablonunu indir"""
+    return _build_makine_template().respond(request)
+
+def _parse_makine_rows(content: bytes, proje_id: str, proje_adi: str):
+    """Excel satırlarını makine dökümanlarına çevirir; load_workbook ve satır işleme CPU işi olduğu için thread'de çalışır"""
+    from openpyxl import load_workbook
+    wb = load_workbook(io.BytesIO(content))
+    ws = wb.active
+    
+    errors = []
+    makine_listesi = []
+    satirlar = []
+    
+    for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), 2):
+        if not any(row):
+            continue
+        
+        try:
+            def get_cell(index):
+                return row[index] if index < len(row) and row[index] is not None else None
+            
+            makine_turu = str(get_cell(0)) if get_cell(0) else ""
+            firma = str(get_cell(1)) if get_cell(1) else ""
+            plaka_seri_no = str(get_cell(2)) if get_cell(2) else ""
+            sasi_motor_no = str(get_cell(3)) if get_cell(3) else None
+            imalat_yili = str(get_cell(4)) if get_cell(4) else None
+            servis_bakim_tarihi = str(get_cell(5)) if get_cell(5) else None
+            sigorta_tarihi = str(get_cell(6)) if get_cell(6) else None
+            periyodik_kontrol_tarihi = str(get_cell(7)) if get_cell(7) else None
+            ruhsat_muayene_tarihi = str(get_cell(8)) if get_cell(8) else None
+            operator_adi = str(get_cell(9)) if get_cell(9) else None
+            operator_belge_tarihi = str(get_cell(10)) if get_cell(10) else None
+            belge_kurumu = str(get_cell(11)) if get_cell(11) else None
+            telefon = str(get_cell(12)) if get_cell(12) else None
+            durum = str(get_cell(13)) if get_cell(13) else "Aktif"
+            aciklama = str(get_cell(14)) if get_cell(14) else None
+            
+            if not makine_turu or not firma:
+                errors.append(f"Satır {row_idx}: Zorunlu alanlar eksik (Makine Türü, Firma)")
+                continue
+            
+            makine_data = {
+                "id": str(uuid.uuid4()),
+                "proje_id": proje_id,
+                "proje_adi": proje_adi,
+                "makine_turu": makine_turu,
+                "firma": firma,
+                "plaka_seri_no": plaka_seri_no,
+                "sasi_motor_no": sasi_motor_no,
+                "imalat_yili": imalat_yili,
+                "servis_bakim_tarihi": servis_bakim_tarihi,
+                "sigorta_tarihi": sigorta_tarihi,
+                "periyodik_kontrol_tarihi": periyodik_kontrol_tarihi,
+                "ruhsat_muayene_tarihi": ruhsat_muayene_tarihi,
+                "operator_adi": operator_adi,
+                "operator_belge_tarihi": operator_belge_tarihi,
+                "belge_kurumu": belge_kurumu,
+                "telefon": telefon,
+                "durum": durum,
+                "aciklama": aciklama,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            }
+            
+            makine_listesi.append(makine_data)
+            satirlar.append(row_idx)
+            
+        except Exception as e:
+            errors.append(f"Satır {row_idx}: {str(e)}")
+    
+    return makine_listesi, satirlar, errors
+
 @router.post("/excel/import")
+@limit_concurrency("excel_import")
 async def import_makineler_excel(
     file: UploadFile = File(...),
     proje_id: str = Form(...),
@@ -231,85 +331,38 @@ async def import_makineler_excel(
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="Sadece Excel dosyaları yüklenebilir")
     
-    proje = await db.projeler.find_one({"id": proje_id}, {"_id": 0})
+    proje = await projeler_cache.get(proje_id)
     if not proje:
         raise HTTPException(status_code=404, detail="Proje bulunamadı")
     
     proje_adi = proje.get("proje_adi", "")
     
     content = await file.read()
-    excel_file = io.BytesIO(content)
     
     try:
-        wb = load_workbook(excel_file)
-        ws = wb.active
+        makine_listesi, satirlar, errors = await asyncio.to_thread(
+            _parse_makine_rows, content, proje_id, proje_adi
+        )
         
-        imported_count = 0
-        errors = []
+        # Plaka kontrolü (eğer varsa) - kayıtlı plakalar tek sorguda alınır
+        plakalar = [makine["plaka_seri_no"] for makine in makine_listesi if makine["plaka_seri_no"]]
+        kayitli = set()
+        if plakalar:
+            kayitli = set(await db.makineler.distinct("plaka_seri_no", {"plaka_seri_no": {"$in": plakalar}}))
         
-        for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), 2):
-            if not any(row):
-                continue
-            
-            try:
-                def get_cell(index):
-                    return row[index] if index < len(row) and row[index] is not None else None
-                
-                makine_turu = str(get_cell(0)) if get_cell(0) else ""
-                firma = str(get_cell(1)) if get_cell(1) else ""
-                plaka_seri_no = str(get_cell(2)) if get_cell(2) else ""
-                sasi_motor_no = str(get_cell(3)) if get_cell(3) else None
-                imalat_yili = str(get_cell(4)) if get_cell(4) else None
-                servis_bakim_tarihi = str(get_cell(5)) if get_cell(5) else None
-                sigorta_tarihi = str(get_cell(6)) if get_cell(6) else None
-                periyodik_kontrol_tarihi = str(get_cell(7)) if get_cell(7) else None
-                ruhsat_muayene_tarihi = str(get_cell(8)) if get_cell(8) else None
-                operator_adi = str(get_cell(9)) if get_cell(9) else None
-                operator_belge_tarihi = str(get_cell(10)) if get_cell(10) else None
-                belge_kurumu = str(get_cell(11)) if get_cell(11) else None
-                telefon = str(get_cell(12)) if get_cell(12) else None
-                durum = str(get_cell(13)) if get_cell(13) else "Aktif"
-                aciklama = str(get_cell(14)) if get_cell(14) else None
-                
-                if not makine_turu or not firma:
-                    errors.append(f"Satır {row_idx}: Zorunlu alanlar eksik (Makine Türü, Firma)")
+        yeni_makineler = []
+        yeni_satirlar = []
+        for makine_data, row_idx in zip(makine_listesi, satirlar):
+            plaka_seri_no = makine_data["plaka_seri_no"]
+            if plaka_seri_no:
+                if plaka_seri_no in kayitli:
+                    errors.append(f"Satır {row_idx}: Bu plaka/seri numarası zaten kayıtlı - '{plaka_seri_no}'")
                     continue
-                
-                # Plaka kontrolü (eğer varsa)
-                if plaka_seri_no:
-                    existing = await db.makineler.find_one({"plaka_seri_no": plaka_seri_no})
-                    if existing:
-                        errors.append(f"Satır {row_idx}: Bu plaka/seri numarası zaten kayıtlı - '{plaka_seri_no}'")
-                        continue
-                
-                makine_data = {
-                    "id": str(uuid.uuid4()),
-                    "proje_id": proje_id,
-                    "proje_adi": proje_adi,
-                    "makine_turu": makine_turu,
-                    "firma": firma,
-                    "plaka_seri_no": plaka_seri_no,
-                    "sasi_motor_no": sasi_motor_no,
-                    "imalat_yili": imalat_yili,
-                    "servis_bakim_tarihi": servis_bakim_tarihi,
-                    "sigorta_tarihi": sigorta_tarihi,
-                    "periyodik_kontrol_tarihi": periyodik_kontrol_tarihi,
-                    "ruhsat_muayene_tarihi": ruhsat_muayene_tarihi,
-                    "operator_adi": operator_adi,
-                    "operator_belge_tarihi": operator_belge_tarihi,
-                    "belge_kurumu": belge_kurumu,
-                    "telefon": telefon,
-                    "durum": durum,
-                    "aciklama": aciklama,
-                    "created_at": datetime.now(timezone.utc).isoformat(),
-                    "updated_at": datetime.now(timezone.utc).isoformat()
-                }
-                
-                await db.makineler.insert_one(makine_data)
-                imported_count += 1
-                
-            except Exception as e:
-                errors.append(f"Satır {row_idx}: {str(e)}")
+                kayitli.add(plaka_seri_no)
+            yeni_makineler.append(makine_data)
+            yeni_satirlar.append(row_idx)
+        
+        imported_count = await insert_rows(db.makineler, yeni_makineler, yeni_satirlar, errors)
         
         return {
             "message": f"{imported_count} makine başarıyla içe aktarıldı",
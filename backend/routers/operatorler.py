@@ -1,23 +1,32 @@
 from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timezone
 
 from models.operator import Operator, OperatorCreate, OperatorUpdate
 from routers.auth import get_current_user
 from database import db
+from serialization import LeanSerializer, FieldSelector
 
 router = APIRouter(prefix="/operatorler", tags=["Operatorler"])
 
+operator_serializer = LeanSerializer(Operator)
+operator_fields = FieldSelector(Operator, views={
+    "summary": [
+        "id", "proje_id", "proje_adi", "ad_soyad", "telefon", "makine_cinsi",
+        "belge_no", "son_gecerlilik", "durum", "created_at"
+    ]
+})
+
 @router.get("", response_model=List[Operator])
-async def get_operatorler(current_user: dict = Depends(get_current_user)):
+async def get_operatorler(
+    view: Optional[str] = None,
+    fields: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
     """Tüm operatörleri listele"""
-    operatorler = await db.operatorler.find({}, {"_id": 0}).to_list(1000)
-    for operator in operatorler:
-        if isinstance(operator.get('created_at'), str):
-            operator['created_at'] = datetime.fromisoformat(operator['created_at'])
-        if isinstance(operator.get('updated_at'), str):
-            operator['updated_at'] = datetime.fromisoformat(operator['updated_at'])
-    return operatorler
+    secili_alanlar = operator_fields.resolve(view, fields)
+    operatorler = await db.operatorler.find({}, operator_fields.projection(secili_alanlar)).to_list(1000)
+    return operator_serializer.response(operatorler, secili_alanlar)
 
 @router.get("/{operator_id}", response_model=Operator)
 async def get_operator(operator_id: str, current_user: dict = Depends(get_current_user)):
@@ -1,29 +1,42 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from typing import List
 from datetime import datetime
 
 from models import Proje, ProjeCreate
 from routers.auth import get_current_user
 from database import db
+from change_versions import bump_version
+from http_cache import conditional_get, etag_headers
+from reference_cache import projeler_cache
 
 router = APIRouter(prefix="/projeler", tags=["Projeler"])
 
 @router.get("", response_model=List[Proje])
-async def get_projeler(current_user: dict = Depends(get_current_user)):
-    projeler = await db.projeler.find({}, {"_id": 0}).to_list(1000)
+async def get_projeler(request: Request, response: Response, current_user: dict = Depends(get_current_user)):
+    etag, cached = await conditional_get(request, ["projeler"], current_user)
+    if cached:
+        return cached
+    
+    projeler = await projeler_cache.all()
     for proje in projeler:
         if isinstance(proje['created_at'], str):
             proje['created_at'] = datetime.fromisoformat(proje['created_at'])
+    response.headers.update(etag_headers(etag))
     return projeler
 
 @router.get("/{proje_id}", response_model=Proje)
-async def get_proje(proje_id: str, current_user: dict = Depends(get_current_user)):
+async def get_proje(proje_id: str, request: Request, response: Response, current_user: dict = Depends(get_current_user)):
     """Tek bir projeyi ID ile getir"""
-    proje = await db.projeler.find_one({"id": proje_id}, {"_id": 0})
+    etag, cached = await conditional_get(request, ["projeler"], current_user)
+    if cached:
+        return cached
+    
+    proje = await projeler_cache.get(proje_id)
     if not proje:
         raise HTTPException(status_code=404, detail="Proje bulunamadı")
     if isinstance(proje['created_at'], str):
         proje['created_at'] = datetime.fromisoformat(proje['created_at'])
+    response.headers.update(etag_headers(etag))
     return proje
 
 @router.post("", response_model=Proje)
@@ -35,6 +48,7 @@ async def create_proje(proje_create: ProjeCreate, current_user: dict = Depends(g
     doc = proje.model_dump()
     doc['created_at'] = doc['created_at'].isoformat()
     await db.projeler.insert_one(doc)
+    await bump_version("projeler")
     return proje
 
 @router.put("/{proje_id}")
@@ -48,6 +62,7 @@ async def update_proje(proje_id: str, proje_update: ProjeCreate, current_user: d
     
     update_data = proje_update.model_dump()
     await db.projeler.update_one({"id": proje_id}, {"$set": update_data})
+    await bump_version("projeler")
     
     updated_proje = await db.projeler.find_one({"id": proje_id}, {"_id": 0})
     return updated_proje
@@ -60,6 +75,7 @@ async def delete_proje(proje_id: str, current_user: dict = Depends(get_current_u
     result = await db.projeler.delete_one({"id": proje_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Proje bulunamadı")
+    await bump_version("projeler")
     return {"message": "Proje silindi"}
 
 @router.post("/bulk-delete")
@@ -68,4 +84,5 @@ async def bulk_delete_projeler(proje_ids: List[str], current_user: dict = Depend
         raise HTTPException(status_code=403, detail="Bu işlem için yetkiniz yok")
     
     result = await db.projeler.delete_many({"id": {"$in": proje_ids}})
+    await bump_version("projeler")
     return {"message": f"{result.deleted_count} proje silindi", "deleted_count": result.deleted_count}
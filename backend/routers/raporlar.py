@@ -1,9 +1,10 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime, timezone
 from pathlib import Path
+import asyncio
 import io
 import os
 import zipfile
@@ -12,18 +13,39 @@ import tempfile
 
 from models import Rapor, RaporCreate, RaporUpdate
 from routers.auth import get_current_user
-from database import db
+from database import db, read_db, with_time_limit
 from utils import generate_rapor_no
 from constants import SEHIRLER
+from serialization import LeanSerializer, FieldSelector
+from change_versions import bump_version
+from http_cache import conditional_get, etag_headers
+from reference_cache import projeler_cache
+from media_cleanup import delete_media_for_reports
+from admission import limit_concurrency
+from single_flight import SingleFlight, freeze
 
 router = APIRouter(prefix="/raporlar", tags=["Raporlar"])
 
+# Aynı anda gelen aynı liste istekleri tek sorguyu paylaşır
+raporlar_flight = SingleFlight("raporlar")
+
+rapor_serializer = LeanSerializer(Rapor, overrides={"created_by_username": "Bilinmiyor"})
+rapor_fields = FieldSelector(Rapor, views={
+    # Raporlar / ProjeRaporlar tablo kartlarında gösterilen alanlar
+    "summary": [
+        "id", "rapor_no", "proje_id", "proje_adi", "sehir", "ekipman_adi", "kategori",
+        "firma", "lokasyon", "marka_model", "periyot", "gecerlilik_tarihi", "uygunluk",
+        "durum", "created_by_username", "created_at"
+    ]
+})
+
 # ZIP Export Request Model
 class ZipExportRequest(BaseModel):
     rapor_ids: List[str]
 
 @router.get("", response_model=List[Rapor])
 async def get_raporlar(
+    request: Request,
     arama: Optional[str] = None,
     kategori: Optional[str] = None,
     periyot: Optional[str] = None,
@@ -32,8 +54,16 @@ async def get_raporlar(
     proje_id: Optional[str] = None,
     limit: int = 500,
     skip: int = 0,
+    view: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
+    secili_alanlar = rapor_fields.resolve(view, fields)
+    
+    etag, cached = await conditional_get(request, ["raporlar"], current_user)
+    if cached:
+        return cached
+    
     query = {}
     
     # Proje filtresi - en öncelikli
@@ -72,20 +102,26 @@ async def get_raporlar(
     if uygunluk:
         query["uygunluk"] = uygunluk
     
-    raporlar = await db.raporlar.find(query, {"_id": 0}).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
-    
-    for rapor in raporlar:
-        if isinstance(rapor['created_at'], str):
-            rapor['created_at'] = datetime.fromisoformat(rapor['created_at'])
-        if isinstance(rapor['updated_at'], str):
-            rapor['updated_at'] = datetime.fromisoformat(rapor['updated_at'])
-        if 'created_by_username' not in rapor or not rapor['created_by_username']:
-            rapor['created_by_username'] = 'Bilinmiyor'
+    projection = rapor_fields.projection(secili_alanlar)
+    # Filtre yetki kapsamını (viewer firması) da içerdiği için anahtar olarak yeterlidir
+    raporlar = await raporlar_flight.do(
+        (freeze(query), freeze(projection), skip, limit, freeze(request.state.versions)),
+        lambda: db.raporlar.find(query, projection).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
+    )
     
-    return raporlar
+    return rapor_serializer.response(raporlar, secili_alanlar, headers=etag_headers(etag))
 
 @router.get("/{rapor_id}", response_model=Rapor)
-async def get_rapor(rapor_id: str, current_user: dict = Depends(get_current_user)):
+async def get_rapor(
+    rapor_id: str,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user)
+):
+    etag, cached = await conditional_get(request, ["raporlar"], current_user)
+    if cached:
+        return cached
+    
     rapor = await db.raporlar.find_one({"id": rapor_id}, {"_id": 0})
     if not rapor:
         raise HTTPException(status_code=404, detail="Rapor bulunamadı")
@@ -97,6 +133,7 @@ async def get_rapor(rapor_id: str, current_user: dict = Depends(get_current_user
     if 'created_by_username' not in rapor or not rapor['created_by_username']:
         rapor['created_by_username'] = 'Bilinmiyor'
     
+    response.headers.update(etag_headers(etag))
     return rapor
 
 @router.post("", response_model=Rapor)
@@ -104,7 +141,7 @@ async def create_rapor(rapor_create: RaporCreate, current_user: dict = Depends(g
     if current_user["role"] not in ["admin", "inspector"]:
         raise HTTPException(status_code=403, detail="Rapor oluşturma yetkiniz yok")
     
-    proje = await db.projeler.find_one({"id": rapor_create.proje_id}, {"_id": 0})
+    proje = await projeler_cache.get(rapor_create.proje_id)
     if not proje:
         raise HTTPException(status_code=404, detail="Proje bulunamadı")
     
@@ -139,6 +176,7 @@ async def create_rapor(rapor_create: RaporCreate, current_user: dict = Depends(g
     doc['created_at'] = doc['created_at'].isoformat()
     doc['updated_at'] = doc['updated_at'].isoformat()
     await db.raporlar.insert_one(doc)
+    await bump_version("raporlar")
     
     return rapor
 
@@ -159,6 +197,7 @@ async def update_rapor(
     update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
     
     await db.raporlar.update_one({"id": rapor_id}, {"$set": update_data})
+    await bump_version("raporlar")
     
     updated_rapor = await db.raporlar.find_one({"id": rapor_id}, {"_id": 0})
     if isinstance(updated_rapor['created_at'], str):
@@ -173,17 +212,12 @@ async def delete_rapor(rapor_id: str, current_user: dict = Depends(get_current_u
     if current_user["role"] not in ["admin", "inspector"]:
         raise HTTPException(status_code=403, detail="Rapor silme yetkiniz yok")
     
-    dosyalar = await db.medya_dosyalari.find({"rapor_id": rapor_id}, {"_id": 0}).to_list(100)
-    for dosya in dosyalar:
-        dosya_path = Path(dosya["dosya_yolu"])
-        if dosya_path.exists():
-            dosya_path.unlink()
-    
-    await db.medya_dosyalari.delete_many({"rapor_id": rapor_id})
+    await delete_media_for_reports([rapor_id])
     
     result = await db.raporlar.delete_one({"id": rapor_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Rapor bulunamadı")
+    await bump_version("raporlar")
     
     return {"message": "Rapor silindi"}
 
@@ -202,6 +236,7 @@ async def toggle_rapor_durum(rapor_id: str, current_user: dict = Depends(get_cur
         {"id": rapor_id},
         {"$set": {"durum": yeni_durum, "updated_at": datetime.now(timezone.utc).isoformat()}}
     )
+    await bump_version("raporlar")
     
     return {"message": f"Rapor durumu {yeni_durum} olarak güncellendi", "durum": yeni_durum}
 
@@ -210,51 +245,14 @@ async def bulk_delete_raporlar(rapor_ids: List[str], current_user: dict = Depend
     if current_user["role"] not in ["admin", "inspector"]:
         raise HTTPException(status_code=403, detail="Rapor silme yetkiniz yok")
     
-    for rapor_id in rapor_ids:
-        dosyalar = await db.medya_dosyalari.find({"rapor_id": rapor_id}, {"_id": 0}).to_list(100)
-        for dosya in dosyalar:
-            dosya_path = Path(dosya["dosya_yolu"])
-            if dosya_path.exists():
-                dosya_path.unlink()
-        await db.medya_dosyalari.delete_many({"rapor_id": rapor_id})
+    await delete_media_for_reports(rapor_ids)
     
     result = await db.raporlar.delete_many({"id": {"$in": rapor_ids}})
+    await bump_version("raporlar")
     return {"message": f"{result.deleted_count} rapor silindi", "deleted_count": result.deleted_count}
 
-# ZIP Export Route - Seçili raporları ZIP olarak indir
-@router.post("/zip-export")
-async def zip_export_raporlar(
-    request: ZipExportRequest,
-    current_user: dict = Depends(get_current_user)
-):
-    """
-    Seçilen raporları kategoriye göre gruplandırılmış klasör yapısıyla ZIP dosyası olarak indirir.
-    
-    Yapı:
-    ZIP/
-    ├── Kategori_A/
-    │   ├── RAPOR_001/
-    │   │   ├── bilgi.txt
-    │   │   └── dosyalar...
-    │   └── RAPOR_002/
-    ├── Kategori_B/
-    │   └── RAPOR_003/
-    └── ...
-    """
-    rapor_ids = request.rapor_ids
-    
-    if not rapor_ids:
-        raise HTTPException(status_code=400, detail="En az bir rapor seçilmelidir")
-    
-    if len(rapor_ids) > 100:
-        raise HTTPException(status_code=400, detail="En fazla 100 rapor seçilebilir")
-    
-    # Seçilen raporları getir
-    raporlar = await db.raporlar.find({"id": {"$in": rapor_ids}}, {"_id": 0}).to_list(100)
-    
-    if not raporlar:
-        raise HTTPException(status_code=404, detail="Seçilen raporlar bulunamadı")
-    
+def _build_zip_archive(raporlar: List[dict], rapor_dosyalari: dict):
+    """Raporları kategori/rapor klasörlerine yerleştirip ZIP'ler; disk ve CPU işi olduğu için thread'de çalışır"""
     # Geçici klasör oluştur
     temp_dir = tempfile.mkdtemp()
     
@@ -321,7 +319,7 @@ Tarih: {datetime.now(timezone.utc).strftime('%d.%m.%Y %H:%M:%S')} UTC
                 
                 # Rapora ait dosyaları kopyala
                 rapor_id = rapor.get("id")
-                dosyalar = await db.medya_dosyalari.find({"rapor_id": rapor_id}, {"_id": 0}).to_list(100)
+                dosyalar = rapor_dosyalari.get(rapor_id, [])[:100]
                 
                 for idx, dosya in enumerate(dosyalar):
                     dosya_path = Path(dosya.get("dosya_yolu", ""))
@@ -353,23 +351,70 @@ Tarih: {datetime.now(timezone.utc).strftime('%d.%m.%Y %H:%M:%S')} UTC
         
         zip_buffer.seek(0)
         
-        # Dosya adı oluştur - kategori sayısını da ekle
-        now = datetime.now(timezone.utc)
-        username = current_user.get("username", "user")
-        kategori_count = len(kategori_raporlar)
-        rapor_count = len(raporlar)
-        zip_filename = f"Raporlar_{kategori_count}Kategori_{rapor_count}Rapor_{now.strftime('%Y%m%d_%H%M')}.zip"
-        
-        return StreamingResponse(
-            zip_buffer,
-            media_type="application/zip",
-            headers={
-                "Content-Disposition": f'attachment; filename="{zip_filename}"',
-                "Content-Type": "application/zip"
-            }
-        )
+        return zip_buffer, len(kategori_raporlar)
         
     finally:
         # Geçici klasörü temizle
         shutil.rmtree(temp_dir, ignore_errors=True)
 
+
+# ZIP Export Route - Seçili raporları ZIP olarak indir
+@router.post("/zip-export")
+@limit_concurrency("zip_export")
+@with_time_limit("export")
+async def zip_export_raporlar(
+    request: ZipExportRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Seçilen raporları kategoriye göre gruplandırılmış klasör yapısıyla ZIP dosyası olarak indirir.
+    
+    Yapı:
+    ZIP/
+    ├── Kategori_A/
+    │   ├── RAPOR_001/
+    │   │   ├── bilgi.txt
+    │   │   └── dosyalar...
+    │   └── RAPOR_002/
+    ├── Kategori_B/
+    │   └── RAPOR_003/
+    └── ...
+    """
+    rapor_ids = request.rapor_ids
+    
+    if not rapor_ids:
+        raise HTTPException(status_code=400, detail="En az bir rapor seçilmelidir")
+    
+    if len(rapor_ids) > 100:
+        raise HTTPException(status_code=400, detail="En fazla 100 rapor seçilebilir")
+    
+    # Seçilen raporları getir (ikincil üyeden okunabilir; primary'deki yazmaları bekletmez)
+    source = read_db("export")
+    raporlar = await source.raporlar.find({"id": {"$in": rapor_ids}}, {"_id": 0}).to_list(100)
+    
+    if not raporlar:
+        raise HTTPException(status_code=404, detail="Seçilen raporlar bulunamadı")
+    
+    # Tüm raporların dosyaları tek sorguda alınıp rapora göre gruplanır
+    rapor_dosyalari = {}
+    async for dosya in source.medya_dosyalari.find({"rapor_id": {"$in": [r.get("id") for r in raporlar]}}, {"_id": 0}):
+        rapor_dosyalari.setdefault(dosya["rapor_id"], []).append(dosya)
+    
+    # Klasör yapısı ve sıkıştırma event loop'u bloklamasın; diğer istekler bu sırada yanıtlanır
+    zip_buffer, kategori_count = await asyncio.to_thread(_build_zip_archive, raporlar, rapor_dosyalari)
+    
+    # Dosya adı oluştur - kategori sayısını da ekle
+    now = datetime.now(timezone.utc)
+    username = current_user.get("username", "user")
+    rapor_count = len(raporlar)
+    zip_filename = f"Raporlar_{kategori_count}Kategori_{rapor_count}Rapor_{now.strftime('%Y%m%d_%H%M')}.zip"
+    
+    return StreamingResponse(
+        zip_buffer,
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{zip_filename}"',
+            "Content-Type": "application/zip"
+        }
+    )
+
@@ -1,15 +1,20 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 
 from constants import SEHIRLER, KATEGORI_ALT_KATEGORI
+from http_cache import precompute_json
 
 router = APIRouter(tags=["Static Data"])
 
+# Sabitler sadece deploy ile değişir; gövde ve ETag bir kez üretilir
+SEHIRLER_RESPONSE = precompute_json(SEHIRLER)
+KATEGORI_ALT_KATEGORI_RESPONSE = precompute_json(KATEGORI_ALT_KATEGORI)
+
 @router.get("/sehirler")
-async def get_sehirler():
+async def get_sehirler(request: Request):
     """Tüm şehirlerin listesini döndürür"""
-    return SEHIRLER
+    return SEHIRLER_RESPONSE.respond(request)
 
 @router.get("/kategori-alt-kategoriler")
-async def get_kategori_alt_kategoriler():
+async def get_kategori_alt_kategoriler(request: Request):
     """Kategori ve alt kategori eşleşmesini döndürür"""
-    return KATEGORI_ALT_KATEGORI
+    return KATEGORI_ALT_KATEGORI_RESPONSE.respond(request)
@@ -0,0 +1,293 @@
+"""
+Devam ettirilebilir (parçalı) dosya yükleme
+
+Büyük dosyalar için /upload/{rapor_id} yerine kullanılır:
+
+1. POST   /uploads                      -> oturum aç (sha256 zorunlu), upload_id ve offset=0 döner
+2. PUT    /uploads/{upload_id}?offset=N -> N'den başlayan parçayı (ham gövde) yaz
+3. GET    /uploads/{upload_id}          -> bağlantı koparsa güncel offset'i öğren
+4. POST   /uploads/{upload_id}/tamamla  -> sha256 doğrula, medya kaydını oluştur
+   DELETE /uploads/{upload_id}          -> yüklemeyi iptal et
+
+Parçalar doğrudan diskteki .partial dosyasına yazılır, bellekte birikmez.
+Aynı offset'e gelen eş zamanlı parçalardan yalnızca biri yazabilir: yazmadan
+önce oturumdaki offset atomik olarak sahiplenilir (yazan), kaybeden 409 alır.
+Tamamlama da oturumu atomik olarak "tamamlaniyor" durumuna alır; ikinci
+çağrı 409 döner. Tamamlanan oturum file_id ile birlikte saklanır.
+Uzun süre güncellenmeyen oturumları çöp toplayıcı (eski_yuklemeler) temizler.
+"""
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Request
+from pydantic import BaseModel, Field
+
+from routers.auth import get_current_user
+from routers.files import UPLOAD_DIR, MAX_FILE_SIZE, ALLOWED_TYPES, _file_sha256
+from database import db
+from image_processing import schedule_recompression
+
+router = APIRouter(prefix="/uploads", tags=["Files"])
+
+PARTIAL_DIR = UPLOAD_DIR / ".partial"
+PARTIAL_DIR.mkdir(exist_ok=True)
+
+SESSIONS_COLLECTION = "yukleme_oturumlari"
+MAX_CHUNK_SIZE = 16 * 1024 * 1024
+WRITE_BUFFER_SIZE = 1024 * 1024
+# Parça yazarken çöken bir isteğin offset sahipliği bu süreden sonra devralınabilir
+CHUNK_CLAIM_TTL_SECONDS = 300
+
+SHA256_PATTERN = r"^[0-9a-fA-F]{64}$"
+
+class UploadSessionCreate(BaseModel):
+    rapor_id: str
+    dosya_adi: str
+    dosya_tipi: str
+    dosya_boyutu: int
+    # Tamamlamada dosyanın bütünlüğü bu özetle doğrulanır
+    sha256: str = Field(..., pattern=SHA256_PATTERN)
+
+class UploadFinalize(BaseModel):
+    sha256: Optional[str] = Field(None, pattern=SHA256_PATTERN)
+
+def partial_path(upload_id: str) -> Path:
+    return PARTIAL_DIR / f"{upload_id}.part"
+
+def _require_uploader(current_user: dict):
+    if current_user["role"] not in ["admin", "inspector"]:
+        raise HTTPException(status_code=403, detail="Dosya yükleme yetkiniz yok")
+
+async def _get_session(upload_id: str, current_user: dict) -> dict:
+    session = await db[SESSIONS_COLLECTION].find_one({"id": upload_id}, {"_id": 0})
+    if not session:
+        raise HTTPException(status_code=404, detail="Yükleme oturumu bulunamadı")
+    if session["created_by"] != current_user["id"] and current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Bu yükleme oturumuna erişim yetkiniz yok")
+    return session
+
+def _session_status(session: dict) -> dict:
+    return {
+        "upload_id": session["id"],
+        "offset": session["offset"],
+        "dosya_boyutu": session["dosya_boyutu"],
+        "tamamlandi": session["offset"] >= session["dosya_boyutu"],
+        "durum": session.get("durum") or "yukleniyor",
+        "file_id": session.get("file_id"),
+        "max_chunk_size": MAX_CHUNK_SIZE
+    }
+
+async def _conflict(upload_id: str, message: str):
+    current = await db[SESSIONS_COLLECTION].find_one({"id": upload_id}, {"_id": 0})
+    detail = {"message": message, "offset": current["offset"] if current else 0}
+    if current and current.get("durum"):
+        detail["durum"] = current["durum"]
+        detail["file_id"] = current.get("file_id")
+    raise HTTPException(status_code=409, detail=detail)
+
+@router.post("")
+async def create_upload_session(data: UploadSessionCreate, current_user: dict = Depends(get_current_user)):
+    """Yeni devam ettirilebilir yükleme oturumu aç"""
+    _require_uploader(current_user)
+    
+    if data.dosya_tipi not in ALLOWED_TYPES:
+        raise HTTPException(status_code=400, detail="Sadece JPG, PNG ve PDF formatları desteklenir")
+    if data.dosya_boyutu <= 0 or data.dosya_boyutu > MAX_FILE_SIZE:
+        raise HTTPException(status_code=400, detail="Dosya boyutu 4GB'dan büyük olamaz")
+    
+    rapor = await db.raporlar.find_one({"id": data.rapor_id}, {"_id": 0, "id": 1})
+    if not rapor:
+        raise HTTPException(status_code=404, detail="Rapor bulunamadı")
+    
+    upload_id = str(uuid.uuid4())
+    await asyncio.to_thread(partial_path(upload_id).touch)
+    
+    now = datetime.now(timezone.utc).isoformat()
+    session = {
+        "id": upload_id,
+        "rapor_id": data.rapor_id,
+        "dosya_adi": data.dosya_adi,
+        "dosya_tipi": data.dosya_tipi,
+        "dosya_boyutu": data.dosya_boyutu,
+        "sha256": data.sha256.lower(),
+        "offset": 0,
+        "created_by": current_user["id"],
+        "created_at": now,
+        "updated_at": now
+    }
+    await db[SESSIONS_COLLECTION].insert_one(session)
+    
+    return _session_status(session)
+
+@router.get("/{upload_id}")
+async def get_upload_session(upload_id: str, current_user: dict = Depends(get_current_user)):
+    """Yüklemenin güncel offset'ini döndür"""
+    session = await _get_session(upload_id, current_user)
+    return _session_status(session)
+
+@router.put("/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    offset: int,
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """Ham istek gövdesini verilen offset'ten itibaren dosyaya yaz"""
+    _require_uploader(current_user)
+    session = await _get_session(upload_id, current_user)
+    
+    if offset != session["offset"] or session.get("durum"):
+        await _conflict(upload_id, "Offset uyuşmuyor")
+    
+    # Offset yazmadan ÖNCE atomik olarak sahiplenilir; aynı offset'e gelen ikinci istek 409 alır
+    claim = str(uuid.uuid4())
+    now = datetime.now(timezone.utc)
+    stale = (now - timedelta(seconds=CHUNK_CLAIM_TTL_SECONDS)).isoformat()
+    claimed = await db[SESSIONS_COLLECTION].find_one_and_update(
+        {
+            "id": upload_id, "offset": offset, "durum": None,
+            "$or": [{"yazan": None}, {"yazan_at": {"$lt": stale}}]
+        },
+        {"$set": {"yazan": claim, "yazan_at": now.isoformat()}}
+    )
+    if claimed is None:
+        await _conflict(upload_id, "Eşzamanlı yükleme algılandı")
+    
+    path = partial_path(upload_id)
+    limit = min(MAX_CHUNK_SIZE, session["dosya_boyutu"] - offset)
+    
+    def open_at_offset():
+        f = open(path, "r+b")
+        # Önceki yarım kalmış parçanın artıkları atılır
+        f.truncate(offset)
+        f.seek(offset)
+        return f
+    
+    written = 0
+    try:
+        f = await asyncio.to_thread(open_at_offset)
+        buffer = bytearray()
+        try:
+            async for piece in request.stream():
+                written += len(piece)
+                if written > limit:
+                    raise HTTPException(status_code=413, detail=f"Parça en fazla {limit} byte olabilir")
+                buffer.extend(piece)
+                if len(buffer) >= WRITE_BUFFER_SIZE:
+                    await asyncio.to_thread(f.write, bytes(buffer))
+                    buffer.clear()
+            if buffer:
+                await asyncio.to_thread(f.write, bytes(buffer))
+        finally:
+            await asyncio.to_thread(f.close)
+    except BaseException:
+        # Offset ilerlemez; bir sonraki deneme aynı offset'ten yarım parçayı ezerek yazar
+        await db[SESSIONS_COLLECTION].update_one(
+            {"id": upload_id, "yazan": claim}, {"$unset": {"yazan": "", "yazan_at": ""}}
+        )
+        raise
+    
+    new_offset = offset + written
+    result = await db[SESSIONS_COLLECTION].update_one(
+        {"id": upload_id, "yazan": claim},
+        {
+            "$set": {"offset": new_offset, "updated_at": datetime.now(timezone.utc).isoformat()},
+            "$unset": {"yazan": "", "yazan_at": ""}
+        }
+    )
+    if result.modified_count == 0:
+        # Sahiplik süresi dolup başka bir istek devraldıysa bu parça geçersizdir
+        await _conflict(upload_id, "Eşzamanlı yükleme algılandı")
+    
+    session["offset"] = new_offset
+    return _session_status(session)
+
+@router.post("/{upload_id}/tamamla")
+async def finalize_upload(
+    upload_id: str,
+    data: Optional[UploadFinalize] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Tüm parçalar geldiyse özet doğrula ve dosyayı rapora ekle"""
+    _require_uploader(current_user)
+    session = await _get_session(upload_id, current_user)
+    
+    if session.get("durum"):
+        await _conflict(upload_id, "Yükleme zaten tamamlandı")
+    if session["offset"] != session["dosya_boyutu"]:
+        await _conflict(upload_id, "Yükleme tamamlanmadı")
+    
+    expected = session["sha256"]
+    if data and data.sha256 and data.sha256.lower() != expected:
+        raise HTTPException(status_code=400, detail="Dosya özeti (sha256) oturumdakiyle uyuşmuyor")
+    
+    # Oturum atomik olarak tamamlamaya alınır; eş zamanlı ikinci çağrı 409 alır.
+    # offset == boyut iken alınmış bir parça sahipliği (ör. çöken istekten kalan)
+    # tek byte yazamaz; beklenmez, temizlenir.
+    claimed = await db[SESSIONS_COLLECTION].find_one_and_update(
+        {"id": upload_id, "offset": session["dosya_boyutu"], "durum": None},
+        {
+            "$set": {"durum": "tamamlaniyor", "updated_at": datetime.now(timezone.utc).isoformat()},
+            "$unset": {"yazan": "", "yazan_at": ""}
+        }
+    )
+    if claimed is None:
+        await _conflict(upload_id, "Yükleme zaten tamamlanıyor")
+    
+    async def release():
+        await db[SESSIONS_COLLECTION].update_one({"id": upload_id}, {"$unset": {"durum": ""}})
+    
+    path = partial_path(upload_id)
+    icerik_hash = await asyncio.to_thread(_file_sha256, str(path))
+    if expected != icerik_hash:
+        await release()
+        raise HTTPException(status_code=400, detail="Dosya özeti (sha256) uyuşmuyor")
+    
+    # Yükleme sürerken rapor silinmiş olabilir
+    if not await db.raporlar.find_one({"id": session["rapor_id"]}, {"_id": 0, "id": 1}):
+        await db[SESSIONS_COLLECTION].delete_one({"id": upload_id})
+        await asyncio.to_thread(path.unlink, True)
+        raise HTTPException(status_code=404, detail="Rapor bulunamadı")
+    
+    file_ext = session["dosya_adi"].split(".")[-1]
+    file_id = str(uuid.uuid4())
+    file_path = UPLOAD_DIR / f"{file_id}.{file_ext}"
+    try:
+        await asyncio.to_thread(os.replace, path, file_path)
+    except OSError:
+        await release()
+        raise
+    
+    medya = {
+        "id": file_id,
+        "rapor_id": session["rapor_id"],
+        "dosya_adi": session["dosya_adi"],
+        "dosya_yolu": str(file_path),
+        "dosya_tipi": session["dosya_tipi"],
+        "dosya_boyutu": session["dosya_boyutu"],
+        "icerik_hash": icerik_hash,
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+    await db.medya_dosyalari.insert_one(medya)
+    schedule_recompression(medya)
+    # Oturum silinmez; tekrar eden tamamlama isteği 409 ile aynı file_id'yi görür
+    await db[SESSIONS_COLLECTION].update_one(
+        {"id": upload_id},
+        {"$set": {"durum": "tamamlandi", "file_id": file_id, "updated_at": datetime.now(timezone.utc).isoformat()}}
+    )
+    
+    return {"message": "Dosya yüklendi", "file_id": file_id}
+
+@router.delete("/{upload_id}")
+async def abort_upload(upload_id: str, current_user: dict = Depends(get_current_user)):
+    """Yüklemeyi iptal et ve geçici dosyayı sil"""
+    await _get_session(upload_id, current_user)
+    result = await db[SESSIONS_COLLECTION].delete_one({"id": upload_id, "durum": None})
+    if result.deleted_count == 0:
+        await _conflict(upload_id, "Tamamlanmış veya tamamlanmakta olan yükleme iptal edilemez")
+    await asyncio.to_thread(partial_path(upload_id).unlink, True)
+    return {"message": "Yükleme iptal edildi"}
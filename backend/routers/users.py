@@ -7,9 +7,12 @@ import uuid
 from models import UserResponse, User
 from routers.auth import get_current_user, get_password_hash
 from database import db
+from serialization import LeanSerializer
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+user_serializer = LeanSerializer(UserResponse, overrides={"email_verified": False})
+
 # Admin User Create/Update Models
 class AdminUserCreate(BaseModel):
     username: str
@@ -32,25 +35,11 @@ async def get_users(current_user: dict = Depends(get_current_user)):
     
     users = await db.users.find({}, {"_id": 0, "password": 0}).to_list(1000)
     
-    result = []
     for user in users:
-        result.append(UserResponse(
-            id=user["id"],
-            username=user.get("username", user["email"].split("@")[0]),
-            email=user["email"],
-            role=user["role"],
-            firma_adi=user.get("firma_adi"),
-            email_verified=user.get("email_verified", False),
-            ad=user.get("ad"),
-            soyad=user.get("soyad"),
-            sehir=user.get("sehir"),
-            dogum_tarihi=user.get("dogum_tarihi"),
-            profil_resmi=user.get("profil_resmi"),
-            telefon=user.get("telefon"),
-            created_at=datetime.fromisoformat(user["created_at"]) if isinstance(user["created_at"], str) else user["created_at"]
-        ))
-    
-    return result
+        if "username" not in user:
+            user["username"] = user["email"].split("@")[0]
+    
+    return user_serializer.response(users)
 
 @router.post("", response_model=UserResponse)
 async def admin_create_user(user_data: AdminUserCreate, current_user: dict = Depends(get_current_user)):
@@ -0,0 +1,84 @@
+"""
+Liste endpoint'leri için hafif serileştirme yardımcıları.
+
+Veritabanından gelen dökümanlar zaten uygulamanın kendi yazdığı kayıtlardır;
+her satırı tekrar pydantic modeline doğrulatmak yerine modelin alan listesi ve
+varsayılanları bir kez çıkarılır ve satırlar sadece bu alanlara indirgenir.
+Tarih alanları veritabanındaki ISO string hâliyle olduğu gibi gönderilir.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+class LeanSerializer:
+    """Bir pydantic modelinin alanlarına göre dökümanları doğrulamasız şekillendirir"""
+
+    def __init__(self, model: Type[BaseModel], overrides: Optional[Dict[str, Any]] = None):
+        self.fields: List[str] = list(model.model_fields.keys())
+        self.defaults: Dict[str, Any] = {}
+        for name, field in model.model_fields.items():
+            if field.default_factory is not None:
+                # id / created_at gibi üretilen alanlar her zaman DB'de bulunur
+                self.defaults[name] = None
+            elif not field.is_required():
+                self.defaults[name] = field.default
+            else:
+                self.defaults[name] = None
+        # Boş/eksik değer geldiğinde kullanılacak sabit yedek değerler
+        self.overrides: Dict[str, Any] = overrides or {}
+
+    def one(self, doc: Dict[str, Any], fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        defaults = self.defaults
+        row = {name: doc.get(name, defaults[name]) for name in (fields or self.fields)}
+        for name, value in self.overrides.items():
+            if name in row and not row[name]:
+                row[name] = value
+        return row
+
+    def many(self, docs: Iterable[Dict[str, Any]], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        one = self.one
+        return [one(doc, fields) for doc in docs]
+
+    def response(self, docs: Iterable[Dict[str, Any]], fields: Optional[List[str]] = None, **kwargs) -> ORJSONResponse:
+        """Dökümanları response_model doğrulamasını atlayarak doğrudan JSON'a çevirir"""
+        return ORJSONResponse(self.many(docs, fields), **kwargs)
+
+
+class FieldSelector:
+    """
+    Liste endpoint'leri için `view=` / `fields=` parametrelerini Mongo projeksiyonuna çevirir.
+
+    `full` görünümü (varsayılan) tüm alanları döndürür; diğer görünümler ve
+    `fields` listesi sadece istenen alanları hem Mongo'dan okur hem de gönderir.
+    """
+
+    def __init__(self, model: Type[BaseModel], views: Dict[str, List[str]]):
+        self.allowed = set(model.model_fields.keys())
+        self.views = views
+
+    def resolve(self, view: Optional[str] = None, fields: Optional[str] = None) -> Optional[List[str]]:
+        """İstenen alan listesini döndürür, tüm alanlar isteniyorsa None"""
+        if fields:
+            names = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+            unknown = [name for name in names if name not in self.allowed]
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Geçersiz alan(lar): {', '.join(unknown)}")
+        elif not view or view == "full":
+            return None
+        elif view in self.views:
+            names = list(self.views[view])
+        else:
+            raise HTTPException(status_code=400, detail=f"Geçersiz görünüm: {view}")
+
+        if "id" not in names:
+            names.insert(0, "id")
+        return names
+
+    @staticmethod
+    def projection(names: Optional[List[str]]) -> Dict[str, int]:
+        if names is None:
+            return {"_id": 0}
+        return {"_id": 0, **{name: 1 for name in names}}
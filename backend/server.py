@@ -11,18 +11,28 @@ Bu dosya sadece:
 içerir. Tüm endpoint'ler /routers/ klasöründeki modüllere taşınmıştır.
 """
 
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Request, HTTPException
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 import os
+import asyncio
 import logging
 from pathlib import Path
-from datetime import datetime, timezone
 
-from database import db
-from constants import KATEGORI_ALT_KATEGORI
-from models import User, Kategori, Proje
-from routers.auth import get_password_hash
+from pymongo.errors import ExecutionTimeout, NetworkTimeout, PyMongoError, ServerSelectionTimeoutError
+
+from database import client, ping
+from reference_cache import watch_versions
+from media_cleanup import unlink_worker
+from image_processing import shutdown_image_pool
+from mongo_monitoring import explain_worker
+from request_context import RequestContextMiddleware
+from http_metrics import MetricsMiddleware, monitor_event_loop_lag, render_metrics
+import loop_watchdog
+from request_profiler import ProfilerMiddleware
+from startup_coordinator import ensure_schema
+from migrations import MIGRATIONS_AUTO, run_pending_migrations
 
 # Routers
 from routers import (
@@ -40,7 +50,9 @@ from routers import (
     ayarlar_router,
     makineler_router,
     operatorler_router,
-    cephe_iskeleleri_router
+    cephe_iskeleleri_router,
+    bakim_router,
+    uploads_router
 )
 
 ROOT_DIR = Path(__file__).parent
@@ -58,7 +70,8 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 app = FastAPI(
     title="EKOS - Ekipman Kontrol Otomasyon Sistemi",
     description="Ekipman kontrol ve rapor yönetim sistemi API'si",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # API Router with /api prefix
@@ -79,6 +92,8 @@ api_router.include_router(static_router)
 api_router.include_router(makineler_router)
 api_router.include_router(operatorler_router)
 api_router.include_router(cephe_iskeleleri_router)
+api_router.include_router(bakim_router)
+api_router.include_router(uploads_router)
 
 # Include the main API router
 app.include_router(api_router)
@@ -92,88 +107,82 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Admin isteklerinde X-Profile: 1 / ?_profile=1 ile tek istek profillenir
+app.add_middleware(ProfilerMiddleware)
+# Mongo komutlarının hangi route'tan geldiğini izleyebilmek için
+app.add_middleware(RequestContextMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.on_event("startup")
 async def startup_db():
     """Initialize database indexes and default data on startup"""
     
-    # Create indexes for better performance
-    try:
-        # Users collection indexes
-        await db.users.create_index("email", unique=True)
-        await db.users.create_index("username")
-        
-        # Raporlar collection indexes
-        await db.raporlar.create_index("rapor_no", unique=True)
-        await db.raporlar.create_index("kategori")
-        await db.raporlar.create_index("created_at")
-        await db.raporlar.create_index("gecerlilik_tarihi")
-        await db.raporlar.create_index("uygunluk")
-        await db.raporlar.create_index([("created_at", -1)])  # Descending for latest first
-        
-        # Kategoriler collection indexes
-        await db.kategoriler.create_index("isim", unique=True)
-        
-        logger.info("Database indexes created successfully")
-    except Exception as e:
-        logger.warning(f"Index creation error (may already exist): {e}")
-    
-    # Create default admin if not exists
-    admin_exists = await db.users.find_one({"email": "ibrahimznrmak@gmail.com"})
-    if not admin_exists:
-        admin = User(
-            username="miharbirnz",
-            email="ibrahimznrmak@gmail.com",
-            password=get_password_hash("admin234"),
-            role="admin",
-            email_verified=True
-        )
-        doc = admin.model_dump()
-        doc['created_at'] = doc['created_at'].isoformat()
-        await db.users.insert_one(doc)
-        logger.info("Default admin created")
+    # Referans önbelleğini diğer worker'ların yazmalarına karşı güncel tut
+    app.state.version_watcher = asyncio.create_task(watch_versions())
+    # Silinen medya dosyaları diskten arka planda kaldırılır
+    app.state.unlink_worker = asyncio.create_task(unlink_worker())
+    # Yavaş sorguların explain çıktıları arka planda toplanır
+    app.state.explain_worker = asyncio.create_task(explain_worker(client))
+    app.state.loop_lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+    # LOOP_BLOCK_DETECTOR=on/debug ise event loop'u bloklayan çağrılar yakalanır
+    if loop_watchdog.is_enabled():
+        app.state.loop_watchdog = asyncio.create_task(loop_watchdog.run_loop_watchdog())
     
-    # Create default categories with subcategories
-    for cat_name, alt_kats in KATEGORI_ALT_KATEGORI.items():
-        exists = await db.kategoriler.find_one({"isim": cat_name})
-        if not exists:
-            kategori = Kategori(
-                isim=cat_name,
-                alt_kategoriler=alt_kats,
-                aciklama=f"{cat_name} ekipmanları"
-            )
-            doc = kategori.model_dump()
-            doc['created_at'] = doc['created_at'].isoformat()
-            await db.kategoriler.insert_one(doc)
-    
-    # Create default project
-    default_proje_exists = await db.projeler.find_one({"proje_adi": "Çukurova Deprem Konutları Projesi"})
-    if not default_proje_exists:
-        default_proje = Proje(
-            proje_adi="Çukurova Deprem Konutları Projesi",
-            aciklama="Varsayılan proje"
-        )
-        doc = default_proje.model_dump()
-        doc['created_at'] = doc['created_at'].isoformat()
-        await db.projeler.insert_one(doc)
-        logger.info("Default project created")
-        
-        # Assign all existing reports to this project
-        default_proje_id = doc["id"]
-        await db.raporlar.update_many(
-            {"proje_id": {"$exists": False}},
-            {"$set": {
-                "proje_id": default_proje_id,
-                "proje_adi": "Çukurova Deprem Konutları Projesi",
-                "sehir": "Adana",
-                "sehir_kodu": "ADA"
-            }}
-        )
-        logger.info("Existing reports assigned to default project")
-
-
-# Health check endpoint
+    # İndeksler ve varsayılan veriler: şema sürümü güncelse atlanır, değilse tek worker kurar
+    await ensure_schema()
+    # Bekleyen veri migrasyonları canlı trafiği bloklamadan arka planda, partiler hâlinde uygulanır
+    if MIGRATIONS_AUTO:
+        app.state.migration_runner = asyncio.create_task(run_pending_migrations())
+
+
+@app.on_event("shutdown")
+async def shutdown_background_tasks():
+    await shutdown_image_pool()
+    tasks = []
+    for name in ("version_watcher", "unlink_worker", "explain_worker", "loop_lag_monitor", "loop_watchdog",
+                 "migration_runner"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+            tasks.append(task)
+    # Görevlerin finally blokları (ör. kilit bırakma) bitmeden bağlantılar kapatılmaz
+    await asyncio.gather(*tasks, return_exceptions=True)
+    client.close()
+
+
+# Veritabanı zaman aşımları 500 yerine anlamlı durum kodlarıyla döner
+@app.exception_handler(ExecutionTimeout)
+@app.exception_handler(NetworkTimeout)
+async def mongo_timeout_handler(request: Request, exc: PyMongoError):
+    logger.warning(f"Mongo zaman aşımı ({request.url.path}): {exc}")
+    return ORJSONResponse(status_code=504, content={"detail": "Veritabanı işlemi zaman aşımına uğradı"})
+
+@app.exception_handler(ServerSelectionTimeoutError)
+async def mongo_unavailable_handler(request: Request, exc: ServerSelectionTimeoutError):
+    logger.error(f"Mongo erişilemiyor ({request.url.path}): {exc}")
+    return ORJSONResponse(status_code=503, content={"detail": "Veritabanına şu anda erişilemiyor"})
+
+
+# Health check endpoint (liveness: süreç ayakta mı)
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "version": "2.0.0"}
+
+# Readiness: Mongo'ya ping atılamıyorsa 503; yük dengeleyici trafiği bu worker'a yönlendirmez
+@app.get("/health/ready")
+async def readiness_check():
+    try:
+        await ping()
+    except PyMongoError as e:
+        return ORJSONResponse(status_code=503, content={"status": "unavailable", "mongo": str(e)})
+    return {"status": "ready", "mongo": "ok"}
+
+# Prometheus metrikleri; METRICS_TOKEN tanımlıysa Bearer token ile korunur
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Geçersiz metrik token'ı")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,70 @@
+"""
+Eş zamanlı aynı isteklerin birleştirilmesi (single-flight)
+
+Sabah toplantısında onlarca kullanıcı dashboard'u ve aynı proje listesini
+aynı anda açtığında her istek aynı Mongo sorgularını çalıştırır. SingleFlight,
+aynı anahtarla gelen isteklerden yalnızca ilkinin sorguyu çalıştırmasını,
+o sürerken gelenlerin aynı sonucu beklemesini sağlar:
+
+    raporlar = await raporlar_flight.do(
+        (freeze(query), skip, limit, versions),
+        lambda: db.raporlar.find(query).skip(skip).limit(limit).to_list(limit)
+    )
+
+Anahtar; route, normalize edilmiş parametreler (filtrenin kendisi, yetki
+kapsamı dahil) ve koleksiyon sürümlerinden oluşmalıdır. Sürümler anahtarda
+olduğu için bir yazmadan sonra gelen istek, yazmadan önce başlamış bir sorguya
+katılmaz. Sonuç önbelleğe alınmaz; sorgu bitince anahtar silinir.
+
+Sorgu ayrı bir task'ta çalışır: ilk istemci bağlantıyı koparsa bekleyen diğer
+istekler etkilenmez. Task ilk isteğin context'ini (Mongo zaman sınırı, route
+etiketi, sorgu sayacı) devralır. Paylaşılan sonuç salt okunur kabul edilir.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from metrics import registry
+
+T = TypeVar("T")
+
+coalesced_requests = registry.counter(
+    "ekos_coalesced_requests_total",
+    "Single-flight istekleri; calistirildi: sorguyu çalıştıran, paylasildi: sonucu bekleyen",
+    ["route", "sonuc"]
+)
+
+
+def freeze(value: Any) -> Hashable:
+    """Sorgu/parametre yapısını sıradan bağımsız, hash'lenebilir bir anahtara çevirir"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, set):
+        return tuple(sorted(freeze(item) for item in value))
+    return value
+
+
+class SingleFlight:
+    def __init__(self, route: str):
+        self.route = route
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Tüm bekleyenler iptal edildiyse hata "retrieved" sayılsın, log kirlenmesin
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            coalesced_requests.inc(route=self.route, sonuc="calistirildi")
+        else:
+            coalesced_requests.inc(route=self.route, sonuc="paylasildi")
+        # Bekleyenlerden biri iptal edilirse ortak task çalışmaya devam eder
+        return await asyncio.shield(task)
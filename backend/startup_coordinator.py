@@ -0,0 +1,246 @@
+"""
+Çok worker'lı ortamlar için tek seferlik başlangıç kurulumu
+
+İndeks oluşturma ve varsayılan verilerin (admin, kategoriler, varsayılan
+proje) eklenmesi eskiden her worker'da her açılışta çalışıyordu. Artık:
+
+1. sema_durumu'ndaki uygulanmış şema sürümü SCHEMA_VERSION'a eşitse hiçbir
+   şey yapılmaz (tek find_one; açılış süresi veri boyutundan bağımsız).
+2. Değilse "baslangic" kilidi (leases.Lease) alınır; kilidi alamayan
+   worker'lar sahibinin işi bitirmesini en fazla STARTUP_WAIT_SECONDS bekler.
+3. Kilit sahibi indeksleri koleksiyon başına tek create_indexes komutuyla
+   kurar, varsayılan verileri $setOnInsert upsert'leriyle ekler ve sürümü yazar.
+
+İndeks oluşturma kalıcı bir nedenle başarısız olursa (ör. mevcut yinelenen
+rapor_no değerleri) sürüm yine yazılır, ancak `indexes_ok: False` ve hata
+mesajıyla birlikte. Sonraki açılışlar kurulumu baştan çalıştırmaz ve diğer
+worker'ları bekletmez; yalnızca indeksler en erken INDEX_RETRY_SECONDS sonra,
+kilidi alabilen tek worker tarafından tekrar denenir.
+
+İndekslerde veya varsayılan verilerde değişiklik yapıldığında SCHEMA_VERSION
+artırılmalıdır; bir sonraki açılışta kurulum bir kez tekrar çalışır.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from pymongo import DESCENDING, IndexModel, UpdateOne
+
+from database import db
+from change_versions import bump_version
+from constants import KATEGORI_ALT_KATEGORI, DEFAULT_PROJE_ADI
+from leases import Lease
+from models import User, Kategori, Proje
+from routers.auth import get_password_hash
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+SCHEMA_COLLECTION = "sema_durumu"
+SCHEMA_DOC_ID = "baslangic"
+LEASE_NAME = "baslangic"
+
+STARTUP_WAIT_SECONDS = float(os.environ.get("STARTUP_WAIT_SECONDS", "60"))
+INDEX_RETRY_SECONDS = float(os.environ.get("INDEX_RETRY_SECONDS", "3600"))
+POLL_INTERVAL_SECONDS = 0.5
+
+DEFAULT_ADMIN_EMAIL = "ibrahimznrmak@gmail.com"
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel("email", unique=True),
+        IndexModel("username"),
+    ],
+    "raporlar": [
+        IndexModel("rapor_no", unique=True),
+        IndexModel("kategori"),
+        IndexModel("created_at"),
+        IndexModel("gecerlilik_tarihi"),
+        IndexModel("uygunluk"),
+        IndexModel([("created_at", DESCENDING)]),  # Descending for latest first
+    ],
+    # Medya dosyaları - rapor bazlı toplu sorgular için
+    "medya_dosyalari": [
+        IndexModel("rapor_id"),
+        IndexModel("id"),
+    ],
+    "yukleme_oturumlari": [
+        IndexModel("id", unique=True),
+        IndexModel("updated_at"),
+    ],
+    "kategoriler": [
+        IndexModel("isim", unique=True),
+    ],
+}
+
+
+async def schema_state() -> dict:
+    return await db[SCHEMA_COLLECTION].find_one({"_id": SCHEMA_DOC_ID}) or {}
+
+
+async def applied_version() -> int:
+    return (await schema_state()).get("version", 0)
+
+
+def _index_state(error: Optional[Exception]) -> dict:
+    if error is None:
+        return {"indexes_ok": True, "index_hatasi": None, "index_tekrar_deneme": None}
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=INDEX_RETRY_SECONDS)
+    return {"indexes_ok": False, "index_hatasi": str(error), "index_tekrar_deneme": retry_at.isoformat()}
+
+
+async def _try_create_indexes() -> Optional[Exception]:
+    try:
+        await create_indexes()
+    except Exception as e:
+        logger.warning(f"Index creation error: {e}")
+        return e
+    return None
+
+
+async def create_indexes() -> None:
+    for collection, models in INDEXES.items():
+        await db[collection].create_indexes(models)
+    logger.info("Database indexes created successfully")
+
+
+async def seed_default_admin() -> bool:
+    admin = User(
+        username="miharbirnz",
+        email=DEFAULT_ADMIN_EMAIL,
+        password=await asyncio.to_thread(get_password_hash, "admin234"),
+        role="admin",
+        email_verified=True
+    )
+    doc = admin.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    doc.pop("email")
+    result = await db.users.update_one({"email": DEFAULT_ADMIN_EMAIL}, {"$setOnInsert": doc}, upsert=True)
+    if result.upserted_id is not None:
+        logger.info("Default admin created")
+    return result.upserted_id is not None
+
+
+async def seed_default_kategoriler() -> int:
+    """Eksik varsayılan kategorileri tek bulk_write ile ekler; mevcutlara dokunmaz"""
+    operations = []
+    for cat_name, alt_kats in KATEGORI_ALT_KATEGORI.items():
+        kategori = Kategori(
+            isim=cat_name,
+            alt_kategoriler=alt_kats,
+            aciklama=f"{cat_name} ekipmanları"
+        )
+        doc = kategori.model_dump()
+        doc['created_at'] = doc['created_at'].isoformat()
+        doc.pop("isim")
+        operations.append(UpdateOne({"isim": cat_name}, {"$setOnInsert": doc}, upsert=True))
+    result = await db.kategoriler.bulk_write(operations, ordered=False)
+    if result.upserted_count:
+        await bump_version("kategoriler")
+    return result.upserted_count
+
+
+async def seed_default_proje() -> bool:
+    """Varsayılan projeyi ekler; projesiz raporların bağlanması migrasyon 0002'dedir"""
+    default_proje = Proje(
+        proje_adi=DEFAULT_PROJE_ADI,
+        aciklama="Varsayılan proje"
+    )
+    doc = default_proje.model_dump()
+    doc['created_at'] = doc['created_at'].isoformat()
+    doc.pop("proje_adi")
+    result = await db.projeler.update_one({"proje_adi": DEFAULT_PROJE_ADI}, {"$setOnInsert": doc}, upsert=True)
+    if result.upserted_id is None:
+        return False
+    await bump_version("projeler")
+    logger.info("Default project created")
+    return True
+
+
+async def _apply(owner: str) -> None:
+    started = time.monotonic()
+    index_error = await _try_create_indexes()
+
+    await seed_default_admin()
+    await seed_default_kategoriler()
+    await seed_default_proje()
+
+    # İndeks hatasında da sürüm yazılır; aksi halde her açılış kurulumu tekrarlar
+    await db[SCHEMA_COLLECTION].update_one(
+        {"_id": SCHEMA_DOC_ID},
+        {"$set": {
+            "version": SCHEMA_VERSION,
+            "applied_at": datetime.now(timezone.utc).isoformat(),
+            "applied_by": owner,
+            "sure_sn": round(time.monotonic() - started, 3),
+            **_index_state(index_error),
+        }},
+        upsert=True
+    )
+    if index_error is None:
+        logger.info(f"Başlangıç şeması v{SCHEMA_VERSION} uygulandı")
+    else:
+        logger.error(
+            f"Başlangıç şeması v{SCHEMA_VERSION} indeksler eksik olarak uygulandı; "
+            f"{INDEX_RETRY_SECONDS:.0f} sn sonra tekrar denenecek: {index_error}"
+        )
+
+
+async def retry_indexes_if_due(state: dict) -> bool:
+    """
+    Önceki kurulumda başarısız olan indeksleri, bekleme süresi dolduysa tek
+    worker'da tekrar dener. Kilidi alamayan worker beklemeden devam eder.
+    """
+    if state.get("indexes_ok", True):
+        return False
+    retry_at = state.get("index_tekrar_deneme")
+    if retry_at and retry_at > datetime.now(timezone.utc).isoformat():
+        return False
+
+    lease = Lease(LEASE_NAME)
+    if not await lease.acquire():
+        return False
+    try:
+        index_error = await _try_create_indexes()
+        await db[SCHEMA_COLLECTION].update_one(
+            {"_id": SCHEMA_DOC_ID}, {"$set": _index_state(index_error)}
+        )
+        if index_error is None:
+            logger.info("Eksik indeksler oluşturuldu")
+        return index_error is None
+    finally:
+        await lease.release()
+
+
+async def ensure_schema() -> bool:
+    """
+    Şema güncel değilse kurulumu tek bir worker'da çalıştırır.
+    Bu worker kurulumu yaptıysa True döner.
+    """
+    state = await schema_state()
+    if state.get("version", 0) >= SCHEMA_VERSION:
+        await retry_indexes_if_due(state)
+        return False
+
+    lease = Lease(LEASE_NAME)
+    deadline = time.monotonic() + STARTUP_WAIT_SECONDS
+    while not await lease.acquire():
+        # Başka bir worker kuruyor; bitirmesini bekle (çökerse kilit süresi dolunca devralınır)
+        if time.monotonic() > deadline:
+            logger.warning(f"Başlangıç kurulumu {STARTUP_WAIT_SECONDS:.0f} sn içinde bitmedi; beklemeden devam ediliyor")
+            return False
+        await asyncio.sleep(POLL_INTERVAL_SECONDS)
+        if await applied_version() >= SCHEMA_VERSION:
+            return False
+
+    try:
+        # Kilit beklenirken başka bir worker bitirmiş olabilir
+        if await applied_version() >= SCHEMA_VERSION:
+            return False
+        await _apply(lease.owner)
+        return True
+    finally:
+        await lease.release()
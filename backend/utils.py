@@ -1,4 +1,6 @@
 from datetime import datetime, timezone
+from typing import Dict, Iterable, List
+from pymongo.errors import BulkWriteError
 from constants import SEHIRLER
 from database import db
 
@@ -35,3 +37,45 @@ async def generate_rapor_no(sehir: str):
         new_no = 1
     
     return f"{prefix}{str(new_no).zfill(3)}"
+
+async def last_rapor_numbers(sehirler: Iterable[str]) -> Dict[str, int]:
+    """
+    Verilen şehirlerin bu yılki son rapor numaralarını tek sorguda döndürür.
+    Anahtar rapor no öneki (PK2025-ANK), değer son sıra numarasıdır; hiç raporu
+    olmayan önekler sözlükte yer almaz. Toplu içe aktarmada satır başına
+    generate_rapor_no çağırmak yerine kullanılır.
+    """
+    year = datetime.now(timezone.utc).strftime("%Y")
+    kodlar = sorted({get_sehir_kodu(sehir) for sehir in sehirler})
+    if not kodlar:
+        return {}
+    
+    # Şehir kodları sabit uzunlukta; önek rapor_no'nun ilk prefix_len karakteri
+    prefix_len = len(f"PK{year}-{kodlar[0]}")
+    son_raporlar = await db.raporlar.aggregate([
+        {"$match": {"rapor_no": {"$regex": f"^PK{year}-({'|'.join(kodlar)})"}}},
+        {"$sort": {"created_at": -1}},
+        {"$group": {"_id": {"$substrCP": ["$rapor_no", 0, prefix_len]}, "rapor_no": {"$first": "$rapor_no"}}}
+    ]).to_list(None)
+    
+    sayaclar = {}
+    for rapor in son_raporlar:
+        prefix = rapor["_id"]
+        sayaclar[prefix] = int(rapor["rapor_no"][len(prefix):])
+    return sayaclar
+
+async def insert_rows(collection, docs: List[dict], row_numbers: List[int], errors: List[str]) -> int:
+    """
+    Excel içe aktarımında hazırlanan satırları tek insert_many ile yazar.
+    Yazılamayan satırlar (ör. benzersiz indeks çakışması) errors listesine
+    satır numarasıyla eklenir; eklenen kayıt sayısı döner.
+    """
+    if not docs:
+        return 0
+    try:
+        result = await collection.insert_many(docs, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            errors.append(f"Satır {row_numbers[error['index']]}: {error.get('errmsg', 'Kayıt eklenemedi')}")
+        return e.details.get("nInserted", 0)
@@ -45,6 +45,7 @@ const Raporlar = () => {
   const navigate = useNavigate();
   const location = useLocation();
   const [raporlar, setRaporlar] = useState([]);
+  const [dosyaSayilari, setDosyaSayilari] = useState({});
   const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
   const [filters, setFilters] = useState({
@@ -121,6 +122,7 @@ const Raporlar = () => {
         timeout: 10000, // 10 second timeout
       });
       setRaporlar(response.data);
+      fetchDosyaSayilari(response.data, token);
     } catch (error) {
       if (error.response?.status === 401) {
         localStorage.removeItem('token');
@@ -136,6 +138,25 @@ const Raporlar = () => {
     }
   };
 
+  // Listedeki tüm raporların ek dosya sayıları tek istekte
+  const fetchDosyaSayilari = async (liste, token) => {
+    if (!liste.length) {
+      setDosyaSayilari({});
+      return;
+    }
+    try {
+      const response = await axios.post(`${API}/dosyalar/toplu`, {
+        rapor_ids: liste.map(r => r.id),
+        sadece_sayi: true,
+      }, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      setDosyaSayilari(response.data);
+    } catch (error) {
+      setDosyaSayilari({});
+    }
+  };
+
   const handleSearch = () => {
     setCurrentPage(1);
     fetchRaporlar();
@@ -714,6 +735,12 @@ const Raporlar = () => {
                             <span className="font-medium text-gray-800">{rapor.marka_model}</span>
                           </div>
                         )}
+                        {dosyaSayilari[rapor.id] > 0 && (
+                          <div className="truncate" data-testid={`dosya-sayisi-${rapor.id}`}>
+                            <span className="text-gray-500">Dosyalar: </span>
+                            <span className="font-medium text-gray-800">📎 {dosyaSayilari[rapor.id]}</span>
+                          </div>
+                        )}
                       </div>
                     
                       {/* Actions - Horizontal on mobile, stacked on larger screens */}
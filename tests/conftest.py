@@ -0,0 +1,12 @@
+import os
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+# Modüller backend/ içinden düz import ile yüklenir (uvicorn server:app gibi)
+sys.path.insert(0, str(BACKEND_DIR))
+
+# database modülü import sırasında bağlanmaz; istemci ilk komutta bağlanır
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "ekos_test")
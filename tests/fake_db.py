@@ -0,0 +1,320 @@
+"""
+Sorgu bütçesi testleri için bellek içi Motor benzeri veritabanı
+
+Gerçek Mongo olmadan endpoint'leri çalıştırmak için kullanılır. Her işlem,
+mongo_monitoring dinleyicisinin gerçek sunucu komutlarında yaptığı gibi
+query_counters'taki sayaçlara pymongo komut adıyla (find, insert, update,
+delete, aggregate, distinct) kaydedilir; böylece query_counter'ın
+count_queries() / assert_at_most() API'si değişmeden kullanılır.
+
+Filtrelerde eşitlik, $in, $nin, $exists, $ne, $regex, $gt/$gte/$lt/$lte ve $or;
+güncellemelerde $set, $setOnInsert, $unset ve $inc desteklenir. aggregate
+komutu sayılır ama yalnızca $match/$sort/$limit aşamalarını uygular; diğer
+aşamalarda boş sonuç döner (sayım için sonucun içeriği önemsizdir).
+"""
+import copy
+import itertools
+import re
+from types import SimpleNamespace
+from typing import Iterable, List, Optional
+
+from pymongo import DeleteMany, DeleteOne, InsertOne, UpdateMany, UpdateOne
+
+from request_context import query_counters
+
+_object_ids = itertools.count(1)
+
+
+def _record(command: str, collection: str) -> None:
+    for counter in query_counters.get():
+        counter.record(command, collection, "primary")
+
+
+def _get(doc: dict, path: str):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+_MISSING = object()
+
+
+def _match_value(value, condition) -> bool:
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        for op, arg in condition.items():
+            present = value is not _MISSING
+            current = value if present else None
+            if op == "$in":
+                if current not in arg:
+                    return False
+            elif op == "$nin":
+                if current in arg:
+                    return False
+            elif op == "$exists":
+                if present != bool(arg):
+                    return False
+            elif op == "$regex":
+                if not isinstance(current, str) or not re.search(arg, current):
+                    return False
+            elif op == "$ne":
+                if current == arg:
+                    return False
+            elif op in ("$gt", "$gte", "$lt", "$lte"):
+                if not present or current is None:
+                    return False
+                if op == "$gt" and not current > arg:
+                    return False
+                if op == "$gte" and not current >= arg:
+                    return False
+                if op == "$lt" and not current < arg:
+                    return False
+                if op == "$lte" and not current <= arg:
+                    return False
+            else:
+                raise NotImplementedError(f"fake_db: desteklenmeyen operatör {op}")
+        return True
+    if value is _MISSING:
+        return condition is None
+    return value == condition
+
+
+def matches(doc: dict, query: Optional[dict]) -> bool:
+    for key, condition in (query or {}).items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif not _match_value(_get(doc, key), condition):
+            return False
+    return True
+
+
+def _project(doc: dict, projection: Optional[dict]) -> dict:
+    doc = copy.deepcopy(doc)
+    if not projection:
+        return doc
+    include = {key for key, value in projection.items() if value and key != "_id"}
+    if include:
+        result = {key: doc[key] for key in include if key in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        return result
+    return {key: value for key, value in doc.items() if projection.get(key, 1)}
+
+
+def _apply_update(doc: dict, update: dict, inserting: bool) -> None:
+    for op, fields in update.items():
+        if op == "$set" or (op == "$setOnInsert" and inserting):
+            doc.update(copy.deepcopy(fields))
+        elif op == "$unset":
+            for key in fields:
+                doc.pop(key, None)
+        elif op == "$inc":
+            for key, amount in fields.items():
+                doc[key] = doc.get(key, 0) + amount
+        elif op != "$setOnInsert":
+            raise NotImplementedError(f"fake_db: desteklenmeyen güncelleme {op}")
+
+
+class FakeCursor:
+    def __init__(self, collection: "FakeCollection", query: Optional[dict], projection: Optional[dict]):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._sort: List[tuple] = []
+        self._skip = 0
+        self._limit = 0
+        self._results: Optional[List[dict]] = None
+
+    def sort(self, key, direction: int = 1) -> "FakeCursor":
+        self._sort = list(key) if isinstance(key, list) else [(key, direction)]
+        return self
+
+    def skip(self, count: int) -> "FakeCursor":
+        self._skip = count
+        return self
+
+    def limit(self, count: int) -> "FakeCursor":
+        self._limit = count
+        return self
+
+    def _execute(self) -> List[dict]:
+        if self._results is None:
+            # Sunucudaki gibi komut ilk okumada gönderilir
+            _record("find", self._collection.name)
+            docs = [doc for doc in self._collection.docs if matches(doc, self._query)]
+            for key, direction in reversed(self._sort):
+                docs.sort(key=lambda doc: (_get(doc, key) is _MISSING, _get(doc, key)), reverse=direction < 0)
+            docs = docs[self._skip:]
+            if self._limit:
+                docs = docs[:self._limit]
+            self._results = [_project(doc, self._projection) for doc in docs]
+        return self._results
+
+    async def to_list(self, length: Optional[int]) -> List[dict]:
+        docs = self._execute()
+        return docs[:length] if length else list(docs)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._execute():
+            yield doc
+
+
+class FakeCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self.docs: List[dict] = []
+
+    def _matching(self, query: Optional[dict]) -> List[dict]:
+        return [doc for doc in self.docs if matches(doc, query)]
+
+    def _insert(self, doc: dict):
+        doc = copy.deepcopy(doc)
+        doc.setdefault("_id", next(_object_ids))
+        self.docs.append(doc)
+        return doc["_id"]
+
+    def _update(self, query: dict, update: dict, upsert: bool, multi: bool) -> SimpleNamespace:
+        targets = self._matching(query)
+        if not multi:
+            targets = targets[:1]
+        for doc in targets:
+            _apply_update(doc, update, inserting=False)
+        upserted_id = None
+        if not targets and upsert:
+            doc = {key: value for key, value in query.items() if not key.startswith("$") and not isinstance(value, dict)}
+            _apply_update(doc, update, inserting=True)
+            upserted_id = self._insert(doc)
+        return SimpleNamespace(
+            matched_count=len(targets), modified_count=len(targets), upserted_id=upserted_id
+        )
+
+    def _delete(self, query: dict, multi: bool) -> int:
+        targets = self._matching(query)
+        if not multi:
+            targets = targets[:1]
+        ids = {id(doc) for doc in targets}
+        self.docs = [doc for doc in self.docs if id(doc) not in ids]
+        return len(targets)
+
+    # ---------- okumalar ----------
+
+    def find(self, query: Optional[dict] = None, projection: Optional[dict] = None) -> FakeCursor:
+        return FakeCursor(self, query, projection)
+
+    async def find_one(self, query: Optional[dict] = None, projection: Optional[dict] = None) -> Optional[dict]:
+        docs = await self.find(query, projection).limit(1).to_list(1)
+        return docs[0] if docs else None
+
+    async def count_documents(self, query: dict) -> int:
+        _record("aggregate", self.name)
+        return len(self._matching(query))
+
+    async def distinct(self, key: str, query: Optional[dict] = None) -> list:
+        _record("distinct", self.name)
+        values = []
+        for doc in self._matching(query):
+            value = _get(doc, key)
+            if value is not _MISSING and value not in values:
+                values.append(value)
+        return values
+
+    def aggregate(self, pipeline: List[dict]) -> "FakeAggregate":
+        return FakeAggregate(self, pipeline)
+
+    # ---------- yazmalar ----------
+
+    async def insert_one(self, doc: dict) -> SimpleNamespace:
+        _record("insert", self.name)
+        return SimpleNamespace(inserted_id=self._insert(doc))
+
+    async def insert_many(self, docs: Iterable[dict], ordered: bool = True) -> SimpleNamespace:
+        _record("insert", self.name)
+        return SimpleNamespace(inserted_ids=[self._insert(doc) for doc in docs])
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False) -> SimpleNamespace:
+        _record("update", self.name)
+        return self._update(query, update, upsert, multi=False)
+
+    async def update_many(self, query: dict, update: dict, upsert: bool = False) -> SimpleNamespace:
+        _record("update", self.name)
+        return self._update(query, update, upsert, multi=True)
+
+    async def delete_one(self, query: dict) -> SimpleNamespace:
+        _record("delete", self.name)
+        return SimpleNamespace(deleted_count=self._delete(query, multi=False))
+
+    async def delete_many(self, query: dict) -> SimpleNamespace:
+        _record("delete", self.name)
+        return SimpleNamespace(deleted_count=self._delete(query, multi=True))
+
+    async def bulk_write(self, operations: list, ordered: bool = True) -> SimpleNamespace:
+        # Sürücü ardışık aynı tür işlemleri tek komutta gönderir
+        result = SimpleNamespace(inserted_count=0, modified_count=0, deleted_count=0, upserted_count=0)
+        for kind, group in itertools.groupby(operations, key=type):
+            group = list(group)
+            if kind is InsertOne:
+                _record("insert", self.name)
+                for op in group:
+                    self._insert(op._doc)
+                result.inserted_count += len(group)
+            elif kind in (UpdateOne, UpdateMany):
+                _record("update", self.name)
+                for op in group:
+                    updated = self._update(op._filter, op._doc, bool(op._upsert), multi=kind is UpdateMany)
+                    result.modified_count += updated.modified_count
+                    result.upserted_count += updated.upserted_id is not None
+            elif kind in (DeleteOne, DeleteMany):
+                _record("delete", self.name)
+                for op in group:
+                    result.deleted_count += self._delete(op._filter, multi=kind is DeleteMany)
+            else:
+                raise NotImplementedError(f"fake_db: desteklenmeyen bulk işlemi {kind.__name__}")
+        return result
+
+
+class FakeAggregate:
+    def __init__(self, collection: FakeCollection, pipeline: List[dict]):
+        self._collection = collection
+        self._pipeline = pipeline
+
+    async def to_list(self, length: Optional[int]) -> List[dict]:
+        _record("aggregate", self._collection.name)
+        docs = list(self._collection.docs)
+        for stage in self._pipeline:
+            (name, arg), = stage.items()
+            if name == "$match":
+                docs = [doc for doc in docs if matches(doc, arg)]
+            elif name == "$sort":
+                for key, direction in reversed(list(arg.items())):
+                    docs.sort(key=lambda doc: (_get(doc, key) is _MISSING, _get(doc, key)), reverse=direction < 0)
+            elif name == "$limit":
+                docs = docs[:arg]
+            else:
+                return []
+        docs = [copy.deepcopy(doc) for doc in docs]
+        return docs[:length] if length else docs
+
+
+class FakeDatabase:
+    def __init__(self, name: str = "ekos_test"):
+        self.name = name
+        self._collections = {}
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(name)
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
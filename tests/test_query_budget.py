@@ -0,0 +1,208 @@
+"""
+Sorgu bütçesi (N+1) testleri
+
+Girdi boyutuyla orantılı sorgu yapmaya yatkın kod yolları bellek içi
+veritabanıyla (tests/fake_db.py) iki girdi boyutunda çalıştırılır. Sorgu
+sayısı benchmarks/query_budget.py'daki BUDGETS sınırını aşarsa veya büyük
+girdide küçük girdiden fazla olursa test başarısız olur. Gerçek veritabanında
+aynı kontrol `python -m benchmarks.query_budget` ile yapılır.
+"""
+import asyncio
+import io
+import sys
+import uuid
+
+import pytest
+
+from tests.fake_db import FakeDatabase
+
+SIZES = (3, 30)
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    import server  # noqa: F401 - tüm router modülleri yüklensin
+    import database
+    from reference_cache import _watched
+
+    fake = FakeDatabase()
+    real_db, real_read_db = database.db, database.read_db
+    # Modüller `from database import db, read_db` ile içe aktardığı için her birinde değiştirilir
+    for module in list(sys.modules.values()):
+        namespace = getattr(module, "__dict__", {})
+        if namespace.get("db") is real_db:
+            monkeypatch.setattr(module, "db", fake)
+        if namespace.get("read_db") is real_read_db:
+            monkeypatch.setattr(module, "read_db", lambda kind: fake)
+    for cache in _watched():
+        cache.invalidate()
+    yield fake
+    for cache in _watched():
+        cache.invalidate()
+
+
+@pytest.fixture
+def app_client(fake_db):
+    """(çalıştırıcı, yetki başlıkları): çalıştırıcı bir coroutine fabrikasını uygulamaya karşı çalıştırır"""
+    import httpx
+    from routers.auth import create_access_token
+    from server import app
+
+    fake_db.users.docs.append({
+        "id": "test-admin", "username": "test_admin", "email": "test_admin@ekos.local", "role": "admin"
+    })
+    fake_db.projeler.docs.append({"id": "test-proje", "proje_adi": "Test Projesi"})
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'test-admin'})}"}
+
+    def run(scenario):
+        async def main():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await scenario(client)
+        return asyncio.run(main())
+
+    return run, headers
+
+
+def _budget(name: str) -> int:
+    from benchmarks.query_budget import BUDGETS
+
+    return BUDGETS[name]
+
+
+def _workbook(header, rows) -> bytes:
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def _assert_constant(name: str, counts) -> None:
+    small, large = counts
+    large.assert_at_most(_budget(name), name)
+    assert large.total <= small.total, (
+        f"{name}: n={SIZES[0]} -> {small.total}, n={SIZES[1]} -> {large.total} sorgu; {large.summary()}"
+    )
+
+
+def _measure_endpoint(app_client, prepare):
+    """prepare(client, headers, size) isteği gönderen bir coroutine fabrikası döndürür"""
+    from query_counter import count_queries
+
+    run, headers = app_client
+
+    async def scenario(client):
+        counts = []
+        # Isınma: önbelleklerin ilk ıskası ölçüme karışmasın
+        for size in (1,) + SIZES:
+            call = await prepare(client, headers, size)
+            with count_queries() as counter:
+                response = await call()
+            assert response.status_code < 400, response.text
+            counts.append(counter)
+        return counts[1:]
+
+    return run(scenario)
+
+
+def test_bulk_delete_raporlar(fake_db, app_client):
+    async def prepare(client, headers, size):
+        ids = [f"qb-{uuid.uuid4()}" for _ in range(size)]
+        fake_db.raporlar.docs.extend({"id": rapor_id, "rapor_no": rapor_id} for rapor_id in ids)
+        fake_db.medya_dosyalari.docs.extend(
+            {"id": str(uuid.uuid4()), "rapor_id": rapor_id, "dosya_yolu": None} for rapor_id in ids
+        )
+        return lambda: client.post("/api/raporlar/bulk-delete", json=ids, headers=headers)
+
+    _assert_constant("bulk_delete_raporlar", _measure_endpoint(app_client, prepare))
+    assert not fake_db.raporlar.docs and not fake_db.medya_dosyalari.docs
+
+
+def test_zip_export(fake_db, app_client):
+    ids = [f"qb-{i}" for i in range(max(SIZES))]
+    fake_db.raporlar.docs.extend(
+        {"id": rapor_id, "rapor_no": rapor_id, "kategori": "Asansör", "ekipman_adi": "Test"} for rapor_id in ids
+    )
+    fake_db.medya_dosyalari.docs.extend(
+        {"id": f"m-{rapor_id}", "rapor_id": rapor_id, "dosya_adi": "yok.jpg", "dosya_yolu": "/nonexistent"}
+        for rapor_id in ids
+    )
+
+    async def prepare(client, headers, size):
+        return lambda: client.post("/api/raporlar/zip-export", json={"rapor_ids": ids[:size]}, headers=headers)
+
+    _assert_constant("zip_export", _measure_endpoint(app_client, prepare))
+
+
+def test_excel_import(fake_db, app_client):
+    async def prepare(client, headers, size):
+        content = _workbook(
+            ["Şehir", "Ekipman Adı", "Kategori", "Firma"],
+            [[("Adana", "Ankara", "İstanbul")[i % 3], f"Ekipman {i}", "Asansör", "Test Firma"] for i in range(size)]
+        )
+        return lambda: client.post(
+            "/api/excel/import", files={"file": ("rapor.xlsx", content, XLSX)},
+            data={"proje_id": "test-proje"}, headers=headers
+        )
+
+    _assert_constant("excel_import", _measure_endpoint(app_client, prepare))
+    assert len(fake_db.raporlar.docs) == 1 + sum(SIZES)
+
+
+def test_makine_excel_import(fake_db, app_client):
+    async def prepare(client, headers, size):
+        run = uuid.uuid4().hex[:8]
+        content = _workbook(
+            ["Makine Türü", "Firma", "Plaka/Seri No"],
+            [["Forklift", "Test Firma", f"QB{run}{i:05d}"] for i in range(size)]
+        )
+        return lambda: client.post(
+            "/api/makineler/excel/import", files={"file": ("makine.xlsx", content, XLSX)},
+            data={"proje_id": "test-proje"}, headers=headers
+        )
+
+    _assert_constant("makine_excel_import", _measure_endpoint(app_client, prepare))
+    assert len(fake_db.makineler.docs) == 1 + sum(SIZES)
+
+
+def test_iskele_excel_import(fake_db, app_client):
+    async def prepare(client, headers, size):
+        content = _workbook(
+            ["Bileşen Adı", "Malzeme Kodu", "Adet", "Firma"],
+            [["Dikme", f"QB-{i:05d}", 1, "Test Firma"] for i in range(size)]
+        )
+        return lambda: client.post(
+            "/api/iskele-bilesenleri/excel/import", files={"file": ("iskele.xlsx", content, XLSX)},
+            data={"proje_id": "test-proje"}, headers=headers
+        )
+
+    _assert_constant("iskele_excel_import", _measure_endpoint(app_client, prepare))
+    assert len(fake_db.iskele_bilesenleri.docs) == 1 + sum(SIZES)
+
+
+def test_seed_default_kategoriler(fake_db):
+    from constants import KATEGORI_ALT_KATEGORI
+    from query_counter import count_queries
+    from startup_coordinator import seed_default_kategoriler
+
+    async def scenario():
+        counts = []
+        # Girdi boyutu: eksik varsayılan kategori sayısı
+        for eksik in (1, len(KATEGORI_ALT_KATEGORI)):
+            fake_db.kategoriler.docs = [
+                {"isim": isim} for isim in list(KATEGORI_ALT_KATEGORI)[eksik:]
+            ]
+            with count_queries() as counter:
+                assert await seed_default_kategoriler() == eksik
+            counts.append(counter)
+        return counts
+
+    _assert_constant("varsayilan_kategoriler", asyncio.run(scenario()))
+    assert len(fake_db.kategoriler.docs) == len(KATEGORI_ALT_KATEGORI)
@@ -0,0 +1,46 @@
+"""
+Açılış bütçesi: server modülü ağır bağımlılıkları yüklemeden içe aktarılmalı
+"""
+import json
+import os
+import subprocess
+import sys
+
+from tests.conftest import BACKEND_DIR
+
+# Yalnızca ilgili endpoint'lerin ilk çağrısında yüklenmesi gereken modüller
+LAZY_MODULES = ["openpyxl", "passlib", "bcrypt", "PIL"]
+
+# Yavaş CI makineleri için geniş tutulur; ayrıntılı ölçüm benchmarks.bench_startup'ta
+IMPORT_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "5000"))
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import server
+print(json.dumps({
+    "import_ms": (time.perf_counter() - started) * 1000,
+    "moduller": sorted(sys.modules),
+}))
+"""
+
+
+def _import_server() -> dict:
+    env = dict(os.environ)
+    env.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    env.setdefault("DB_NAME", "ekos_test")
+    output = subprocess.check_output([sys.executable, "-c", CHILD], cwd=BACKEND_DIR, env=env)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def test_server_import_skips_lazy_modules():
+    loaded = set(_import_server()["moduller"])
+    eager = [name for name in LAZY_MODULES if name in loaded]
+    assert not eager, f"açılışta yüklenmemesi gereken modüller: {', '.join(eager)}"
+
+
+def test_server_import_within_budget():
+    # İlk import .pyc derlemesini de içerir; ölçüme katılmaz
+    _import_server()
+    import_ms = _import_server()["import_ms"]
+    assert import_ms <= IMPORT_BUDGET_MS, f"import süresi {import_ms:.0f} ms > {IMPORT_BUDGET_MS:.0f} ms"